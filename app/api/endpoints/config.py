@@ -1,16 +1,25 @@
-from fastapi import APIRouter, HTTPException
-from app.core.config import load_company_config, load_compliance_rules
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from app.services.rule_registry import get_rule_registry
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+def _conditional_response(request: Request, payload: dict, etag: str) -> Response:
+    """Serve payload with an ETag, or 304 if the client already has this version"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=payload, headers=headers)
+
 @router.get("/company")
-async def get_company_config():
+async def get_company_config(request: Request):
     """Get company-specific configuration"""
     try:
-        config = load_company_config()
-        return config
+        rule_set = get_rule_registry().current
+        return _conditional_response(request, rule_set.company_config, f'"company-{rule_set.version}"')
     except Exception as e:
         logger.error(f"Error loading company config: {str(e)}")
         # Return default config on error
@@ -24,11 +33,11 @@ async def get_company_config():
         }
 
 @router.get("/compliance-rules")
-async def get_compliance_rules():
+async def get_compliance_rules(request: Request):
     """Get compliance rules configuration"""
     try:
-        rules = load_compliance_rules()
-        return rules
+        rule_set = get_rule_registry().current
+        return _conditional_response(request, rule_set.compliance_rules, f'"rules-{rule_set.version}"')
     except Exception as e:
         logger.error(f"Error loading compliance rules: {str(e)}")
         # Return default rules on error
@@ -49,4 +58,14 @@ async def get_compliance_rules():
                     "recommendation": "Provide and maintain appropriate PPE for all workers"
                 }
             ]
-        } 
\ No newline at end of file
+        }
+
+@router.get("/rules/version")
+async def get_rules_version():
+    """Get the version hash of the active rule set"""
+    rule_set = get_rule_registry().current
+    return {
+        "version": rule_set.version,
+        "loaded_at": rule_set.loaded_at.isoformat(),
+        "clauses": len(rule_set.clauses)
+    }
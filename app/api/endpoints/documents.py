@@ -1,55 +1,257 @@
 import os
+import functools
 import logging
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
-from typing import Dict, Any, List
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
+import json
 import tempfile
+import threading
+from app.services.admission import AdmissionRejected, get_admission_controller
 from app.services.document_processor import DocumentProcessor
 from app.services.clause_traceability import ClauseTracer
+from app.services.job_manager import JobQueueFullError, get_job_manager
+from app.services.result_cache import get_result_cache
+from app.services.bulk_ingestion import iter_bulk_documents, process_bulk
+from app.services.uploads import UploadTooLargeError, UploadedDocument, read_upload
 from app.config.settings import UPLOAD_DIR
+from app.core.config import settings
+from app.core.metrics import span
 import asyncio
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Track ongoing uploads to prevent duplicates
+# Track ongoing uploads; identical content is coalesced by the result cache
 ongoing_uploads = set()
 
+async def _admit() -> float:
+    """Wait for an analysis slot, or fail fast with 429/503 and Retry-After when saturated"""
+    try:
+        return await get_admission_controller().acquire()
+    except AdmissionRejected as e:
+        logger.warning(f"Upload rejected by admission control: {e.detail}")
+        raise HTTPException(status_code=e.status_code, detail=e.detail,
+                            headers={"Retry-After": str(e.retry_after)})
+
 @router.post("/upload")
-async def upload_document(file: UploadFile = File(...)) -> Dict[str, Any]:
+async def upload_document(file: UploadFile = File(...), site: Optional[str] = Form(None)) -> Dict[str, Any]:
     """
     Upload and process a document
     """
+    upload_id = id(file)
+    admitted = await _admit()
     try:
-        # Check if file is already being processed
-        if file.filename in ongoing_uploads:
-            raise HTTPException(status_code=400, detail="File is already being processed")
-        
         # Add to ongoing uploads
-        ongoing_uploads.add(file.filename)
-        
-        logger.info(f"Saving file to uploads/{file.filename}")
-        
+        ongoing_uploads.add(upload_id)
+
+        logger.info(f"Receiving file {file.filename}")
+        with span("receive"):
+            upload = await read_upload(file, site=site)
+
         # Initialize processors
         doc_processor = DocumentProcessor()
-        
-        # Process the document
-        result = doc_processor.process_document(file)
-        
+
+        # Process the document off the event loop so other requests keep being served
+        result = await run_in_threadpool(doc_processor.process_upload, upload)
+
         logger.info("Response prepared successfully")
         return result
-        
+
+    except HTTPException:
+        raise
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"Error handling file upload: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
     finally:
         # Remove from ongoing uploads
-        ongoing_uploads.discard(file.filename)
+        ongoing_uploads.discard(upload_id)
+        get_admission_controller().release(admitted)
+
+def _format_event(stage: str, payload: Any, sse: bool) -> str:
+    data = json.dumps(payload, default=str)
+    if sse:
+        return f"event: {stage}\ndata: {data}\n\n"
+    return json.dumps({"event": stage, "data": payload}, default=str) + "\n"
+
+def _once(cleanup: Callable[[], None]) -> Callable[[], None]:
+    """
+    Wrap a streamed response's cleanup so only its first call runs it. The stream calls
+    it when it ends and the response's background task after the response is sent,
+    since a client that disconnects before the body starts never runs the generator.
+    """
+    lock = threading.Lock()
+    done = []
+
+    def run() -> None:
+        with lock:
+            if done:
+                return
+            done.append(True)
+        cleanup()
+
+    return run
+
+def _finish_stream(events: Iterator[Tuple[str, Any]], upload: UploadedDocument,
+                   upload_id: int, admitted: float) -> None:
+    try:
+        events.close()
+        upload.cleanup()
+    except ValueError:
+        # Still running in the threadpool; the analysis releases the upload when it stops
+        pass
+    ongoing_uploads.discard(upload_id)
+    get_admission_controller().release(admitted)
+
+def _stream_events(events: Iterator[Tuple[str, Any]], sse: bool, finish: Callable[[], None]) -> Iterator[str]:
+    """Serialize analysis stages as they finish; failures become a final error event"""
+    try:
+        for stage, payload in events:
+            yield _format_event(stage, payload, sse)
+    except HTTPException as e:
+        yield _format_event("error", {"status_code": e.status_code, "detail": e.detail}, sse)
+    except Exception as e:
+        logger.error(f"Error streaming document analysis: {str(e)}")
+        yield _format_event("error", {"status_code": 500, "detail": str(e)}, sse)
+    finally:
+        finish()
+
+@router.post("/upload/stream")
+async def upload_document_stream(request: Request, file: UploadFile = File(...),
+                                 site: Optional[str] = Form(None)) -> StreamingResponse:
+    """
+    Upload a document and stream its analysis stage by stage.
+
+    Responds with Server-Sent Events when the client accepts ``text/event-stream`` and
+    with newline-delimited JSON otherwise. Events are ``extraction``, then
+    ``compliance_report``, ``clause_traceability``, ``entities`` and ``summary`` as each
+    finishes, then ``complete`` with the full result, or ``error``.
+    """
+    admitted = await _admit()
+    try:
+        logger.info(f"Receiving file {file.filename} for streaming analysis")
+        with span("receive"):
+            upload = await read_upload(file, site=site)
+    except Exception as e:
+        get_admission_controller().release(admitted)
+        if isinstance(e, UploadTooLargeError):
+            raise HTTPException(status_code=413, detail=str(e))
+        raise
+
+    upload_id = id(file)
+    ongoing_uploads.add(upload_id)
+    sse = "text/event-stream" in request.headers.get("accept", "")
+    events = DocumentProcessor().iter_upload_analysis(upload)
+    finish = _once(functools.partial(_finish_stream, events, upload, upload_id, admitted))
+    return StreamingResponse(
+        _stream_events(events, sse, finish),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        # Keep proxies from buffering the stream until it ends
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(finish)
+    )
+
+def _finish_bulk(uploads: List[UploadedDocument], upload_id: int) -> None:
+    for upload in uploads:
+        upload.cleanup()
+    ongoing_uploads.discard(upload_id)
+
+def _stream_bulk(uploads: List[UploadedDocument], finish: Callable[[], None]) -> Iterator[str]:
+    try:
+        processor = DocumentProcessor()
+        admission = get_admission_controller()
+        # Every document takes a slot of its own while it is analyzed
+        process = functools.partial(admission.run, processor.process_upload)
+        for record in process_bulk(iter_bulk_documents(uploads), process):
+            yield json.dumps(record, default=str) + "\n"
+    finally:
+        finish()
+
+@router.post("/bulk")
+async def upload_documents_bulk(files: List[UploadFile] = File(...),
+                                site: Optional[str] = Form(None)) -> StreamingResponse:
+    """
+    Upload several documents, or ZIP archives of documents, and stream back one
+    newline-delimited JSON record per document, in upload order, as each is analyzed
+    """
+    # The request is admitted like any upload, so a saturated server turns it away at
+    # once; its documents then take one slot each, BULK_CONCURRENCY of them at a time
+    admitted = await _admit()
+    uploads = []
+    try:
+        for file in files:
+            # Archives may be far larger than a single document
+            max_size = settings.BULK_MAX_UPLOAD_SIZE if file.filename.lower().endswith(".zip") else None
+            uploads.append(await read_upload(file, max_size=max_size, site=site))
+    except Exception as e:
+        for upload in uploads:
+            upload.cleanup()
+        if isinstance(e, UploadTooLargeError):
+            raise HTTPException(status_code=413, detail=str(e))
+        raise
+    finally:
+        get_admission_controller().release(admitted)
+
+    upload_id = id(files)
+    ongoing_uploads.add(upload_id)
+    finish = _once(functools.partial(_finish_bulk, uploads, upload_id))
+    return StreamingResponse(
+        _stream_bulk(uploads, finish),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(finish)
+    )
+
+@router.post("/jobs", status_code=202)
+async def submit_document_job(file: UploadFile = File(...), site: Optional[str] = Form(None)) -> Dict[str, Any]:
+    """
+    Queue a document for background analysis and return its job id immediately
+    """
+    try:
+        upload = await read_upload(file, site=site)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    job_manager = get_job_manager()
+    admission = get_admission_controller()
+    try:
+        # The worker waits for an admission slot, so jobs count against the global limit,
+        # and fails the job with 503 when none frees up in time, as an upload would
+        job = job_manager.submit(
+            admission.run,
+            DocumentProcessor().process_upload,
+            upload,
+            timeout=admission.queue_timeout,
+            filename=file.filename
+        )
+    except JobQueueFullError as e:
+        upload.cleanup()
+        retry_after = admission.retry_after(job_manager.stats()["queued"])
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(retry_after)})
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"{settings.API_V1_STR}/documents/jobs/{job.id}"
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_document_job(job_id: str) -> Dict[str, Any]:
+    """Get the status, and once finished the result, of an analysis job"""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
 
 @router.get("/health")
 async def health_check() -> Dict:
     """Check the health of document processing services"""
     return {
         "status": "healthy",
-        "ongoing_uploads": len(ongoing_uploads)
-    } 
\ No newline at end of file
+        "ongoing_uploads": len(ongoing_uploads),
+        "admission": get_admission_controller().stats(),
+        "jobs": get_job_manager().stats(),
+        "result_cache": get_result_cache().info() if settings.RESULT_CACHE_ENABLED else None
+    }
@@ -0,0 +1,45 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.metrics import REGISTRY
+from app.services.admission import get_admission_controller
+from app.services.job_manager import get_job_manager
+from app.services.model_registry import get_model_registry
+from .documents import ongoing_uploads
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+def _collect_queues():
+    """Queue depths owned by other services, read at scrape time"""
+    admission = get_admission_controller().stats()
+    yield ("docintel_admission_running", "gauge", "Analyses holding an admission slot", [
+        ("docintel_admission_running", {}, admission["running"])
+    ])
+    yield ("docintel_admission_queued", "gauge", "Requests waiting for an admission slot", [
+        ("docintel_admission_queued", {}, admission["queued"])
+    ])
+    jobs = get_job_manager().stats()
+    yield ("docintel_jobs_running", "gauge", "Background analysis jobs running", [
+        ("docintel_jobs_running", {}, jobs["running"])
+    ])
+    yield ("docintel_jobs_queued", "gauge", "Background analysis jobs waiting for a worker", [
+        ("docintel_jobs_queued", {}, jobs["queued"])
+    ])
+    yield ("docintel_uploads_in_flight", "gauge", "Uploads currently being analyzed", [
+        ("docintel_uploads_in_flight", {}, len(ongoing_uploads))
+    ])
+    summarization = get_model_registry().peek("summarization")
+    if summarization is not None:
+        yield ("docintel_summary_queue_depth", "gauge", "Summary chunks waiting for the next batch", [
+            ("docintel_summary_queue_depth", {}, summarization.batcher.queue_depth)
+        ])
+
+REGISTRY.add_collector(_collect_queues)
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics() -> PlainTextResponse:
+    """Stage and request histograms, in-flight counts, queue depths and cache lookups for Prometheus"""
+    return PlainTextResponse(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
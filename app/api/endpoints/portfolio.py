@@ -0,0 +1,34 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Any, Dict, Optional
+from app.services.portfolio import get_portfolio
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# Aggregates are read from the database, so handlers are plain functions run in the threadpool
+
+@router.get("")
+def get_portfolio_summary(
+    site: Optional[str] = Query(None, description="Only aggregate documents of this site"),
+    recent: int = Query(5, ge=0, le=50, description="Number of recently analyzed documents to include")
+) -> Dict[str, Any]:
+    """
+    Compliance across every analyzed document: risk distribution, missing clauses by
+    severity, and coverage per category, clause and site
+    """
+    try:
+        return get_portfolio().summary(site=site, recent=recent)
+    except Exception as e:
+        logger.error(f"Error reading portfolio aggregates: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/rebuild")
+def rebuild_portfolio() -> Dict[str, Any]:
+    """Recompute the aggregates from the stored documents"""
+    try:
+        get_portfolio().rebuild()
+    except Exception as e:
+        logger.error(f"Error rebuilding portfolio aggregates: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"status": "rebuilt"}
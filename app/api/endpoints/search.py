@@ -0,0 +1,59 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Any, Dict, Optional
+from app.services.document_store import get_document_store, search_terms
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# Queries hit the database, so handlers are plain functions run in the threadpool
+
+@router.get("/paragraphs")
+def search_paragraphs(
+    q: str = Query(..., min_length=1, description="Terms that must all appear in the paragraph"),
+    limit: int = Query(20, ge=1, le=200),
+    offset: int = Query(0, ge=0)
+) -> Dict[str, Any]:
+    """Full-text search over the paragraphs of every analyzed document"""
+    if not search_terms(q):
+        raise HTTPException(status_code=422, detail="q must contain a letter or digit")
+    try:
+        results = get_document_store().search_paragraphs(q, limit=limit, offset=offset)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error searching paragraphs: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"query": q, "count": len(results), "results": results}
+
+@router.get("/clauses/{clause_id}")
+def documents_by_clause(
+    clause_id: str,
+    status: str = Query("Missing", pattern="^(Found|Missing)$"),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0)
+) -> Dict[str, Any]:
+    """Documents in which a clause was found, or which lack it"""
+    results = get_document_store().documents_by_clause(clause_id, status=status, limit=limit, offset=offset)
+    return {"clause_id": clause_id, "status": status, "count": len(results), "documents": results}
+
+@router.get("/entities")
+def search_entities(
+    q: Optional[str] = Query(None, description="Prefix of the entity text, case-insensitive"),
+    label: Optional[str] = Query(None, description="spaCy entity label such as ORG or GPE"),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0)
+) -> Dict[str, Any]:
+    """Entity mentions across every analyzed document"""
+    if not q and not label:
+        raise HTTPException(status_code=400, detail="Provide q, label or both")
+    results = get_document_store().search_entities(q, label, limit=limit, offset=offset)
+    return {"count": len(results), "results": results}
+
+@router.get("/documents/{document_id}")
+def get_document(document_id: int) -> Dict[str, Any]:
+    """A stored document with the status of every clause"""
+    document = get_document_store().get_document(document_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return document
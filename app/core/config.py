@@ -3,7 +3,9 @@ from typing import Dict, List, Optional
 from functools import lru_cache
 import os
 from pathlib import Path
-import json
+
+# Root of the repository, used to resolve relative configuration paths
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 
 class Settings(BaseSettings):
     # API Settings
@@ -14,10 +16,13 @@ class Settings(BaseSettings):
     UPLOAD_DIR: str = "uploads"
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_EXTENSIONS: List[str] = ["pdf", "doc", "docx", "txt"]
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 1MB read per chunk
+    UPLOAD_MEMORY_LIMIT: int = 4 * 1024 * 1024  # Larger uploads are spilled to UPLOAD_DIR
     
-    # Compliance Rules Settings
-    COMPLIANCE_RULES_FILE: str = "app/config/compliance_rules.json"
-    COMPANY_CONFIG_FILE: str = "app/config/company_config.json"
+    # Compliance Rules Settings (relative paths are resolved against the project root)
+    COMPLIANCE_RULES_FILE: str = "config/compliance_rules.json"
+    COMPANY_CONFIG_FILE: str = "config/company_config.json"
+    RULES_RELOAD_INTERVAL_SECONDS: float = 5.0  # How often rule file mtimes are checked
     
     # Analysis Settings
     RISK_THRESHOLDS: Dict[str, int] = {
@@ -26,20 +31,94 @@ class Settings(BaseSettings):
         "low": 0
     }
     
+    # PDF Extraction Settings
+    PDF_EXTRACTION_WORKERS: int = 0  # Processes for page-parallel extraction; 0 uses every core
+    PDF_PARALLEL_MIN_PAGES: int = 32  # Smaller documents are extracted in-process
+    PDF_PAGES_PER_TASK: int = 16
+
+    # OCR Settings
+    OCR_BACKEND: str = "none"  # "tesseract" reads PDF pages that have no text layer; off by default
+    OCR_LANGUAGE: str = "eng"  # Tesseract languages, e.g. "eng+ara"
+    OCR_DPI: int = 300  # Resolution scanned pages are rendered at
+    OCR_TESSDATA: Optional[str] = None  # Tesseract language data directory; defaults to TESSDATA_PREFIX
+    OCR_CACHE_ENABLED: bool = True  # Keep OCR text in the paragraph cache, keyed by page image
+
+    # Clause Tracing Settings
+    FUZZY_MATCH_WORKERS: int = -1  # rapidfuzz cdist workers; -1 uses every core
+
     # Date Settings
     DRILL_COMPLIANCE_DAYS: int = 180  # 6 months
-    
+
+    # Model Settings
+    SPACY_MODEL: str = "en_core_web_sm"
+    SUMMARIZER_MODEL: str = "facebook/bart-large-cnn"
+    SUMMARIZER_BACKEND: str = "pipeline"  # pipeline (fp32), quantized (dynamic int8) or onnx
+    SUMMARIZER_ONNX_DIR: str = "models/summarizer-onnx"  # ONNX export, created on first load
+    PRELOAD_MODELS: bool = True  # Load and warm models during application startup
+    SUMMARY_MAX_INPUT_TOKENS: int = 1024  # Capped at the tokenizer's model_max_length
+    SUMMARY_BATCH_SIZE: int = 8  # Chunks per summarization pipeline call
+    SUMMARY_BATCH_WINDOW_SECONDS: float = 0.02  # How long to wait for chunks from other requests
+    SUMMARY_ANCHOR_PERIOD: int = 8  # About one paragraph in this many can end a summary chunk
+    NER_CHUNK_CHARS: int = 5000  # Paragraph-aligned chunk size passed to spaCy
+    NER_BATCH_SIZE: int = 16  # Chunks per nlp.pipe batch
+    NER_N_PROCESS: int = 1  # Processes used by nlp.pipe
+    WARMUP_MODELS: bool = True
+
+    # Admission Control Settings
+    ADMISSION_MAX_CONCURRENT: int = 4  # Analyses run at once across uploads, jobs and bulk requests
+    ADMISSION_MAX_QUEUE: int = 16  # Requests allowed to wait for a slot; more get 429
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 30.0  # Longest wait for a slot before a 503
+
+    # Background Job Settings
+    ANALYSIS_WORKERS: int = 2  # Documents analyzed concurrently by the job pool
+    ANALYSIS_QUEUE_SIZE: int = 16  # Jobs allowed to wait for a free worker
+    JOB_RESULT_TTL_SECONDS: int = 60 * 60  # 1 hour
+
+    # Bulk Ingestion Settings
+    BULK_MAX_UPLOAD_SIZE: int = 1024 * 1024 * 1024  # 1GB per ZIP archive
+    BULK_MAX_DOCUMENTS: int = 20000  # Documents read from one archive
+    BULK_CONCURRENCY: int = 2  # Documents of a bulk request analyzed at once
+
     # Azure Cognitive Services
     AZURE_VISION_KEY: Optional[str] = None
     AZURE_VISION_ENDPOINT: Optional[str] = None
     AZURE_FORM_RECOGNIZER_KEY: Optional[str] = None
     AZURE_FORM_RECOGNIZER_ENDPOINT: Optional[str] = None
+
+    # Form Recognizer Extraction Settings
+    FORM_RECOGNIZER_ENABLED: bool = False  # Extract PDFs with Azure layout analysis; needs AZURE_FORM_RECOGNIZER_*
+    FORM_RECOGNIZER_MODEL: str = "prebuilt-layout"
+    FORM_RECOGNIZER_API_VERSION: str = "2023-07-31"
+    FORM_RECOGNIZER_MAX_CONNECTIONS: int = 16  # Pooled HTTP connections to the service
+    FORM_RECOGNIZER_MAX_CONCURRENT: int = 8  # Analyze operations in flight across all documents
+    FORM_RECOGNIZER_REQUESTS_PER_SECOND: float = 15.0  # Transaction limit of a standard (S0) resource
+    FORM_RECOGNIZER_PAGES_PER_REQUEST: int = 16  # Pages sent in one analyze operation
+    FORM_RECOGNIZER_POLL_INTERVAL_SECONDS: float = 1.0  # Used when the service sends no Retry-After
+    FORM_RECOGNIZER_TIMEOUT_SECONDS: float = 300.0  # Longest wait for one analyze operation
     
     # OpenAI
     OPENAI_API_KEY: Optional[str] = None
     
     # Database
     DATABASE_URL: str = "sqlite:///./docintel.db"
+
+    # Result Cache Settings
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # 256MB of stored results
+
+    # Document Store Settings
+    DOCUMENT_STORE_ENABLED: bool = True  # Keep paragraphs, clause hits and entities for search
+
+    # Incremental Analysis Settings
+    INCREMENTAL_ANALYSIS_ENABLED: bool = True  # Reuse per-paragraph outputs across revisions
+    PARAGRAPH_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # 512MB of stored paragraph outputs
+
+    # Profiling Settings
+    PROFILING_ENABLED: bool = False  # Allow X-Profile: 1 or ?profile=1 to profile a request
+    PROFILING_SAMPLE_EVERY: int = 0  # Also profile 1 in N requests automatically; 0 disables
+    PROFILING_DIR: str = "profiles"  # Relative paths are resolved against the project root
+    PROFILING_MAX_BYTES: int = 256 * 1024 * 1024  # Oldest profiles are deleted past this size
+    PROFILING_SAMPLE_INTERVAL_SECONDS: float = 0.005  # Stack sampling period for flamegraphs
     
     # Security
     SECRET_KEY: str = "your-secret-key-here"  # Change in production
@@ -61,42 +140,18 @@ def get_settings() -> Settings:
 # Create a settings instance
 settings = get_settings()
 
+def resolve_path(path: str) -> str:
+    """Resolve a configured path relative to the project root"""
+    if os.path.isabs(path):
+        return path
+    return str(PROJECT_ROOT / path)
+
 def load_compliance_rules() -> Dict:
-    """Load compliance rules from configuration file"""
-    try:
-        config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'compliance_rules.json')
-        if os.path.exists(config_path):
-            with open(config_path, 'r') as f:
-                return json.load(f)
-        return {}
-    except Exception as e:
-        print(f"Error loading compliance rules: {e}")
-        return {}
+    """Load compliance rules from the shared rule registry"""
+    from app.services.rule_registry import get_rule_registry
+    return get_rule_registry().current.compliance_rules
 
 def load_company_config() -> Dict:
-    """Load company-specific configuration"""
-    try:
-        config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'company_config.json')
-        if os.path.exists(config_path):
-            with open(config_path, 'r') as f:
-                return json.load(f)
-        # Return default config if file doesn't exist
-        return {
-            "company_name": "Default Company",
-            "compliance_rules": {
-                "ppe_requirements": ["hard hat", "safety boots", "gloves"],
-                "emergency_procedures": ["evacuation", "first aid", "fire safety"],
-                "training_requirements": ["safety training", "certification"]
-            }
-        }
-    except Exception as e:
-        print(f"Error loading company config: {e}")
-        # Return default config on error
-        return {
-            "company_name": "Default Company",
-            "compliance_rules": {
-                "ppe_requirements": ["hard hat", "safety boots", "gloves"],
-                "emergency_procedures": ["evacuation", "first aid", "fire safety"],
-                "training_requirements": ["safety training", "certification"]
-            }
-        } 
\ No newline at end of file
+    """Load company-specific configuration from the shared rule registry"""
+    from app.services.rule_registry import get_rule_registry
+    return get_rule_registry().current.company_config
@@ -0,0 +1,59 @@
+from typing import Iterator
+from contextlib import contextmanager
+from functools import lru_cache
+from sqlalchemy import MetaData, create_engine, event
+from sqlalchemy.engine import Connection, Engine
+from app.core.config import get_settings
+
+# Tables of every service are registered on this metadata
+metadata = MetaData()
+
+
+@lru_cache()
+def get_engine() -> Engine:
+    """Return the process-wide engine for DATABASE_URL"""
+    url = get_settings().DATABASE_URL
+    if url.startswith("sqlite"):
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+
+        @event.listens_for(engine, "connect")
+        def _set_sqlite_pragmas(dbapi_connection, connection_record):
+            # WAL lets readers proceed while a worker thread writes
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+    else:
+        engine = create_engine(url, pool_pre_ping=True)
+    return engine
+
+
+def init_db() -> Engine:
+    """Create any missing tables and return the engine"""
+    engine = get_engine()
+    metadata.create_all(engine)
+    return engine
+
+
+@contextmanager
+def write_transaction(engine: Engine) -> Iterator[Connection]:
+    """
+    ``engine.begin()`` for transactions that read what they are about to change. On SQLite
+    the write lock is taken up front (BEGIN IMMEDIATE), so concurrent writers run one after
+    another instead of both acting on what they read before either wrote.
+    """
+    with engine.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        yield conn
+
+
+def upsert_insert(conn: Connection):
+    """The dialect's ``insert``, which has ``on_conflict_do_update``, on SQLite and PostgreSQL; None elsewhere"""
+    if conn.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    if conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    return None
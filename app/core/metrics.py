@@ -0,0 +1,264 @@
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers fast rule scans through long summarization runs
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_sample(name: str, labels: Dict[str, str], value: float) -> str:
+    if labels:
+        rendered = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+        name = f"{name}{{{rendered}}}"
+    if value == math.inf:
+        return f"{name} +Inf"
+    return f"{name} {value:g}" if isinstance(value, float) else f"{name} {value}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def _labels(self, key: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.label_names, key))
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            return [(self.name, self._labels(key), value) for key, value in self._values.items()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def samples(self) -> List[Sample]:
+        samples = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                labels = self._labels(key)
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    samples.append((f"{self.name}_bucket", dict(labels, le="+Inf" if bound == math.inf else f"{bound:g}"),
+                                    cumulative))
+                samples.append((f"{self.name}_sum", labels, total))
+                samples.append((f"{self.name}_count", labels, count))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics rendered in the Prometheus text exposition format.
+
+    Counters, gauges and histograms are updated as work happens; collectors are called
+    at scrape time for values that are cheaper to read than to track, such as queue
+    depths owned by other services.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]) -> None:
+        """``collector()`` yields ``(name, type, help, samples)`` for every metric it reports"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        families = [(m.name, m.kind, m.documentation, m.samples()) for m in list(self._metrics.values())]
+        for collector in list(self._collectors):
+            try:
+                families.extend(collector())
+            except Exception as e:
+                logger.warning(f"Error collecting metrics: {str(e)}")
+        lines = []
+        for name, kind, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(_format_sample(*sample) for sample in samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "docintel_stage_duration_seconds", "Time spent in each analysis stage", ["stage"]
+)
+STAGES_IN_FLIGHT = REGISTRY.gauge(
+    "docintel_stages_in_flight", "Analysis stages currently running", ["stage"]
+)
+REQUEST_SECONDS = REGISTRY.histogram(
+    "docintel_http_request_duration_seconds", "Time to the end of the response, by handler",
+    ["method", "handler", "status"]
+)
+REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "docintel_http_requests_in_flight", "HTTP requests currently being served"
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "docintel_cache_lookups_total", "Cache lookups by cache and outcome (hit, miss or coalesced)",
+    ["cache", "outcome"]
+)
+
+# Spans of the current request; the list is shared with every context copied from it
+_request_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_spans", default=None)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a block as stage ``name``, in the stage histogram and the current request's spans"""
+    STAGES_IN_FLIGHT.inc(stage=name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGES_IN_FLIGHT.dec(stage=name)
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((name, elapsed))
+
+
+def timed(name: str, fn: Callable) -> Callable:
+    """Wrap ``fn`` so every call is recorded as span ``name``"""
+    def run(*args, **kwargs):
+        with span(name):
+            return fn(*args, **kwargs)
+    return run
+
+
+def submit_in_context(executor, fn: Callable, *args, **kwargs):
+    """Submit to an executor so the task records its spans into the submitting request"""
+    return executor.submit(copy_context().run, fn, *args, **kwargs)
+
+
+def server_timing(spans: List[Tuple[str, float]], total: Optional[float] = None) -> str:
+    """A Server-Timing header value; repeated spans of one name are summed"""
+    durations: Dict[str, float] = {}
+    for name, elapsed in spans:
+        durations[name] = durations.get(name, 0.0) + elapsed
+    if total is not None:
+        durations["total"] = total
+    return ", ".join(f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in durations.items())
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware that records every request in the request histogram and adds a
+    ``Server-Timing`` header listing the spans recorded before the response started.
+    Streaming responses start early, so their header only covers work done up to then.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        spans: List[Tuple[str, float]] = []
+        token = _request_spans.set(spans)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                header = server_timing(spans, time.perf_counter() - started)
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", header.encode("latin-1"))]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            endpoint = scope.get("endpoint")
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=scope.get("method", ""),
+                handler=getattr(endpoint, "__name__", "unmatched"),
+                status=str(status)
+            )
+            _request_spans.reset(token)
@@ -0,0 +1,268 @@
+from typing import Callable, Dict, Iterator, List, Optional
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+import cProfile
+import itertools
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import uuid
+from starlette.concurrency import run_in_threadpool
+from app.core.config import get_settings, resolve_path
+
+logger = logging.getLogger(__name__)
+
+# Client-supplied request ids end up in file names
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+PROFILE_EXTENSIONS = (".prof", ".collapsed")
+
+# From Python 3.12 cProfile runs on sys.monitoring: an enabled profiler sees every thread,
+# and only one can be enabled in the process at a time
+PROCESS_WIDE_PROFILER = sys.version_info >= (3, 12)
+
+
+class RequestProfile:
+    """
+    Profiles of every thread that works on one request.
+
+    Each participating thread runs under its own cProfile profiler, merged into a single
+    stats file when the request ends. From Python 3.12, where one profiler covers every
+    thread, the request instead enables a single profiler while any of its threads is
+    working; it then also records whatever other threads run meanwhile, and a request
+    profiled while another one is gets no stats file. Meanwhile a sampler thread records
+    the stacks of the participating threads every ``interval`` seconds, written in the
+    collapsed format that flamegraph.pl and speedscope read.
+    """
+
+    def __init__(self, request_id: str, interval: float):
+        self.request_id = request_id
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._profiles: List[cProfile.Profile] = []
+        # The request's one profiler and how many of its threads are working, when process-wide
+        self._shared: Optional[cProfile.Profile] = None
+        self._working = 0
+        self._threads: Dict[int, str] = {}
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name=f"profile-sampler-{request_id}", daemon=True)
+
+    def start(self) -> None:
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._sampler.join()
+
+    @contextmanager
+    def thread(self) -> Iterator[None]:
+        """Profile the calling thread until the block exits"""
+        ident = threading.get_ident()
+        with self._lock:
+            nested = ident in self._threads
+            if not nested:
+                self._threads[ident] = threading.current_thread().name
+        if nested:
+            # Already profiled further up the stack
+            yield
+            return
+        profile = self._enable()
+        try:
+            yield
+        finally:
+            with self._lock:
+                del self._threads[ident]
+            self._disable(profile)
+
+    def _enable(self) -> Optional[cProfile.Profile]:
+        if PROCESS_WIDE_PROFILER:
+            with self._lock:
+                self._working += 1
+                if self._working == 1:
+                    profile = self._shared or cProfile.Profile()
+                    try:
+                        profile.enable()
+                    except ValueError as e:
+                        logger.warning(f"Cannot profile request {self.request_id}: {str(e)}; recording samples only")
+                    else:
+                        if self._shared is None:
+                            self._shared = profile
+                            self._profiles.append(profile)
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Another profiler is already active on this thread
+            logger.warning(f"Cannot profile thread for request {self.request_id}: {str(e)}")
+            return None
+        return profile
+
+    def _disable(self, profile: Optional[cProfile.Profile]) -> None:
+        if PROCESS_WIDE_PROFILER:
+            with self._lock:
+                self._working -= 1
+                if self._working == 0 and self._shared is not None:
+                    self._shared.disable()
+            return
+        if profile is not None:
+            profile.disable()
+            with self._lock:
+                self._profiles.append(profile)
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                threads = dict(self._threads)
+            if not threads:
+                continue
+            frames = sys._current_frames()
+            for ident, name in threads.items():
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                if stack:
+                    self._stacks[";".join([name] + stack[::-1])] += 1
+
+    def save(self, directory: str) -> List[str]:
+        """Write ``<request id>.prof`` (pstats) and ``<request id>.collapsed``; returns the paths written"""
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        with self._lock:
+            profiles = list(self._profiles)
+            stacks = dict(self._stacks)
+        if profiles:
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            path = os.path.join(directory, f"{self.request_id}.prof")
+            stats.dump_stats(path)
+            paths.append(path)
+        if stacks:
+            path = os.path.join(directory, f"{self.request_id}.collapsed")
+            with open(path, "w") as f:
+                for stack, count in sorted(stacks.items()):
+                    f.write(f"{stack} {count}\n")
+            paths.append(path)
+        return paths
+
+
+_active_profile: ContextVar[Optional[RequestProfile]] = ContextVar("active_profile", default=None)
+
+
+@contextmanager
+def profile_thread() -> Iterator[None]:
+    """Profile the calling thread if the current request is being profiled"""
+    profile = _active_profile.get()
+    if profile is None:
+        yield
+        return
+    with profile.thread():
+        yield
+
+
+def profiled(fn: Callable) -> Callable:
+    """Wrap ``fn`` so it runs under the current request's profile, if any"""
+    def run(*args, **kwargs):
+        with profile_thread():
+            return fn(*args, **kwargs)
+    return run
+
+
+def enforce_disk_limit(directory: str, max_bytes: int) -> None:
+    """Delete the oldest profile files until the directory fits in ``max_bytes``"""
+    try:
+        entries = []
+        for name in os.listdir(directory):
+            if name.endswith(PROFILE_EXTENSIONS):
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+    except FileNotFoundError:
+        return
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Error removing profile {path}: {str(e)}")
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles selected requests.
+
+    A request is profiled when it carries ``X-Profile: 1`` or ``?profile=1`` and
+    PROFILING_ENABLED is set, or, with PROFILING_SAMPLE_EVERY set to N, when it is the Nth
+    POST request since the last sampled one. Only the threads that analyze the document
+    are profiled; the response carries ``X-Profile-Id`` naming the files written to
+    PROFILING_DIR, which is kept under PROFILING_MAX_BYTES.
+    """
+
+    def __init__(self, app, settings=None):
+        self.app = app
+        self.settings = settings or get_settings()
+        self.directory = resolve_path(self.settings.PROFILING_DIR)
+        self._requests = itertools.count(1)
+
+    def _wanted(self, scope) -> bool:
+        if self.settings.PROFILING_ENABLED:
+            headers = dict(scope.get("headers") or [])
+            query = scope.get("query_string", b"").decode("latin-1")
+            flag = headers.get(b"x-profile", b"").decode("latin-1").lower()
+            if flag in ("1", "true") or re.search(r"(^|&)profile=(1|true)(&|$)", query):
+                return True
+        every = self.settings.PROFILING_SAMPLE_EVERY
+        return every > 0 and scope.get("method") == "POST" and next(self._requests) % every == 0
+
+    @staticmethod
+    def _request_id(scope) -> str:
+        """A unique profile id, starting with the client's X-Request-ID when it is usable"""
+        supplied = dict(scope.get("headers") or []).get(b"x-request-id", b"").decode("latin-1")
+        if REQUEST_ID_PATTERN.match(supplied):
+            # Clients may reuse an id; the suffix keeps one profile from overwriting another
+            return f"{supplied}-{uuid.uuid4().hex[:12]}"
+        return uuid.uuid4().hex
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+        profile = RequestProfile(self._request_id(scope), self.settings.PROFILING_SAMPLE_INTERVAL_SECONDS)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile.request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        token = _active_profile.set(profile)
+        profile.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _active_profile.reset(token)
+            profile.stop()
+            await run_in_threadpool(self._save, profile)
+
+    def _save(self, profile: RequestProfile) -> None:
+        try:
+            paths = profile.save(self.directory)
+            enforce_disk_limit(self.directory, self.settings.PROFILING_MAX_BYTES)
+            logger.info(f"Profile of request {profile.request_id} written to {', '.join(paths) or 'nothing'}")
+        except Exception as e:
+            logger.warning(f"Error saving profile of request {profile.request_id}: {str(e)}")
@@ -1,14 +1,34 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.endpoints import documents, config
+from app.api.endpoints import documents, config, search, portfolio, metrics
 from app.core.config import get_settings
+from app.core.metrics import TimingMiddleware
+from app.core.profiling import ProfilingMiddleware
+from app.services.admission import get_admission_controller
+from app.services.form_recognizer import shutdown_form_recognizer
+from app.services.job_manager import get_job_manager
+from app.services.model_registry import get_model_registry
+from app.services.pdf_extraction import shutdown_pool
 
 settings = get_settings()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load models and rule sets once per process, before serving requests
+    if settings.PRELOAD_MODELS:
+        await run_in_threadpool(get_model_registry().preload, settings.WARMUP_MODELS)
+    yield
+    get_job_manager().shutdown()
+    shutdown_pool()
+    shutdown_form_recognizer()
+
 app = FastAPI(
     title="DocIntel AI API",
     description="Document Intelligence and Compliance Analysis API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -18,8 +38,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let the frontend read the per-stage breakdown
+    expose_headers=["Server-Timing"],
 )
 
+# Per-request histograms and the Server-Timing header
+app.add_middleware(TimingMiddleware)
+
+# Opt-in and sampled request profiling, see PROFILING_* settings
+app.add_middleware(ProfilingMiddleware)
+
 # Include routers
 app.include_router(
     documents.router,
@@ -33,17 +61,42 @@ app.include_router(
     tags=["config"]
 )
 
+app.include_router(
+    search.router,
+    prefix="/api/v1/search",
+    tags=["search"]
+)
+
+app.include_router(
+    metrics.router,
+    tags=["metrics"]
+)
+
+app.include_router(
+    portfolio.router,
+    prefix="/api/v1/portfolio",
+    tags=["portfolio"]
+)
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to DocIntel AI API"}
 
 @app.get("/health")
 async def health_check():
+    registry = get_model_registry()
+    models = registry.status()
+    if registry.ready:
+        status = "healthy"
+    elif any(model["error"] for model in models.values()):
+        status = "degraded"
+    else:
+        status = "loading"
     return {
-        "status": "healthy",
+        "status": status,
         "services": {
             "api": "operational",
-            "ocr": "operational",
-            "nlp": "operational"
+            "models": models,
+            "admission": get_admission_controller().stats()
         }
     } 
\ No newline at end of file
@@ -0,0 +1,199 @@
+from typing import Any, Callable, Dict, Optional
+from collections import deque
+from functools import lru_cache
+import asyncio
+import logging
+import math
+import threading
+import time
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Weight of the latest analysis in the running average used for Retry-After
+DURATION_SMOOTHING = 0.2
+
+
+class AdmissionRejected(Exception):
+    """Raised when an analysis cannot be admitted; carries the HTTP status and Retry-After"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    """
+    A queued acquire: an event-loop future for request handlers, or a threading.Event
+    for worker threads
+    """
+
+    __slots__ = ("loop", "future", "event", "granted_at")
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop
+        self.future = loop.create_future() if loop is not None else None
+        self.event = threading.Event() if loop is None else None
+        # Set under the controller's lock when a slot is handed over
+        self.granted_at: Optional[float] = None
+
+    def wake(self) -> None:
+        if self.event is not None:
+            self.event.set()
+            return
+        try:
+            in_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            in_loop = False
+        if in_loop:
+            _wake(self.future)
+        else:
+            self.loop.call_soon_threadsafe(_wake, self.future)
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class AdmissionController:
+    """
+    Limits how many document analyses run at once across the process.
+
+    Up to ``max_concurrent`` analyses hold a slot; up to ``max_queue`` more wait for one,
+    in arrival order, for at most ``queue_timeout`` seconds. A request that finds the
+    queue full is rejected at once with 429, one whose wait runs out with 503; both
+    carry a Retry-After estimated from recent analysis times.
+
+    Request handlers acquire slots on the event loop. Job workers and the documents of a
+    bulk request run in threads and take one slot per analysis through
+    ``acquire_blocking`` or ``run``; they wait in the same queue, but its size limit does
+    not apply to them, since their own pools already bound them. Jobs wait no longer than
+    ``queue_timeout`` either and fail with 503 when it runs out. Slots may be released
+    from any thread, since streaming responses finish in the threadpool.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._running = 0
+        self._waiters: deque = deque()
+        self._average_seconds: Optional[float] = None
+        self._counts = {"admitted": 0, "rejected_queue_full": 0, "rejected_timeout": 0}
+
+    async def acquire(self) -> float:
+        """Wait for a slot; returns the monotonic time it was granted, to pass to ``release``"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._running < self.max_concurrent and not self._waiters:
+                return self._grant()
+            if len(self._waiters) >= self.max_queue:
+                self._counts["rejected_queue_full"] += 1
+                raise AdmissionRejected(429, "Too many documents are being analyzed, please retry later",
+                                        self._retry_after())
+            waiter = _Waiter(loop)
+            self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                if waiter.granted_at is None:
+                    self._waiters.remove(waiter)
+                    self._counts["rejected_timeout"] += 1
+                    raise AdmissionRejected(503, "Timed out waiting for an analysis slot", self._retry_after())
+            # The slot was handed over just as the wait ran out; keep it
+        except asyncio.CancelledError:
+            # The client went away; give up our place, or the slot if it was already ours
+            with self._lock:
+                if waiter.granted_at is None:
+                    self._waiters.remove(waiter)
+                    raise
+            self.release(waiter.granted_at)
+            raise
+        return waiter.granted_at
+
+    def acquire_blocking(self, timeout: Optional[float] = None) -> float:
+        """
+        Wait in the calling thread for a slot, as long as ``timeout`` allows (forever by
+        default); returns the time it was granted, to pass to ``release``
+        """
+        with self._lock:
+            if self._running < self.max_concurrent and not self._waiters:
+                return self._grant()
+            waiter = _Waiter()
+            self._waiters.append(waiter)
+        if not waiter.event.wait(timeout):
+            with self._lock:
+                if waiter.granted_at is None:
+                    self._waiters.remove(waiter)
+                    self._counts["rejected_timeout"] += 1
+                    raise AdmissionRejected(503, "Timed out waiting for an analysis slot", self._retry_after())
+        return waiter.granted_at
+
+    def run(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Call ``fn(*args, **kwargs)`` in the calling thread while holding a slot, waiting
+        for one as long as ``timeout`` allows
+        """
+        granted_at = self.acquire_blocking(timeout)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.release(granted_at)
+
+    def release(self, granted_at: float) -> None:
+        """Return a slot, handing it to the next waiter if there is one"""
+        elapsed = time.monotonic() - granted_at
+        with self._lock:
+            self._average_seconds = elapsed if self._average_seconds is None else (
+                DURATION_SMOOTHING * elapsed + (1 - DURATION_SMOOTHING) * self._average_seconds
+            )
+            self._running -= 1
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.granted_at = self._grant()
+                waiter.wake()
+
+    def _grant(self) -> float:
+        self._running += 1
+        self._counts["admitted"] += 1
+        return time.monotonic()
+
+    def retry_after(self, queued_elsewhere: int = 0) -> int:
+        """
+        Seconds until a new analysis could expect a slot, counting ``queued_elsewhere``
+        analyses that wait outside this controller, such as jobs not yet picked up
+        """
+        with self._lock:
+            return self._retry_after(queued_elsewhere)
+
+    def _retry_after(self, queued_elsewhere: int = 0) -> int:
+        """Seconds until the queue ahead should have drained, between 1 and 60"""
+        average = self._average_seconds or 1.0
+        waves = (len(self._waiters) + queued_elsewhere + 1) / self.max_concurrent
+        return min(60, max(1, math.ceil(average * waves)))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(
+                self._counts,
+                running=self._running,
+                queued=len(self._waiters),
+                max_concurrent=self.max_concurrent,
+                queue_capacity=self.max_queue,
+                average_seconds=round(self._average_seconds, 3) if self._average_seconds is not None else None,
+            )
+
+
+@lru_cache()
+def get_admission_controller() -> AdmissionController:
+    settings = get_settings()
+    return AdmissionController(
+        max_concurrent=settings.ADMISSION_MAX_CONCURRENT,
+        max_queue=settings.ADMISSION_MAX_QUEUE,
+        queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    )
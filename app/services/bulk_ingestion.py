@@ -0,0 +1,98 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import logging
+import os
+import zipfile
+from app.core.config import settings
+from .uploads import UploadedDocument, read_upload_stream
+
+logger = logging.getLogger(__name__)
+
+# A document ready for analysis, or the reason it could not be read
+BulkItem = Tuple[str, Union[UploadedDocument, Exception]]
+
+
+def is_supported(filename: str) -> bool:
+    extension = os.path.splitext(filename)[1].lower().lstrip(".")
+    return extension in settings.ALLOWED_EXTENSIONS
+
+
+def iter_zip_documents(archive: UploadedDocument, max_documents: Optional[int] = None) -> Iterator[BulkItem]:
+    """
+    Yield every supported member of a ZIP archive as an upload, one at a time.
+    Members are read through the same size limit as single uploads.
+    """
+    max_documents = max_documents or settings.BULK_MAX_DOCUMENTS
+    with archive.open() as stream, zipfile.ZipFile(stream) as zf:
+        count = 0
+        for info in zf.infolist():
+            if info.is_dir() or os.path.basename(info.filename).startswith("."):
+                continue
+            if not is_supported(info.filename):
+                yield info.filename, ValueError("Unsupported file type")
+                continue
+            count += 1
+            if count > max_documents:
+                yield info.filename, ValueError(f"Archive has more than {max_documents} documents")
+                return
+            if info.file_size > settings.MAX_UPLOAD_SIZE:
+                yield info.filename, ValueError("File exceeds the maximum upload size")
+                continue
+            try:
+                with zf.open(info) as member:
+                    yield info.filename, read_upload_stream(member, os.path.basename(info.filename), site=archive.site)
+            except Exception as e:
+                yield info.filename, e
+
+
+def iter_bulk_documents(uploads: List[UploadedDocument]) -> Iterator[BulkItem]:
+    """Expand ZIP archives and yield every document of a bulk request in order"""
+    for upload in uploads:
+        if upload.extension == ".zip":
+            try:
+                yield from iter_zip_documents(upload)
+            except zipfile.BadZipFile as e:
+                yield upload.filename, e
+            finally:
+                upload.cleanup()
+        elif is_supported(upload.filename):
+            yield upload.filename, upload
+        else:
+            upload.cleanup()
+            yield upload.filename, ValueError("Unsupported file type")
+
+
+def process_bulk(items: Iterator[BulkItem], process: Callable[[UploadedDocument], Dict],
+                 concurrency: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Analyze documents with up to ``concurrency`` in flight and yield one record per
+    document, in input order. Documents are read from ``items`` only as workers free up,
+    so a large archive is never unpacked all at once.
+    """
+    concurrency = concurrency or settings.BULK_CONCURRENCY
+    pending: deque = deque()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        def submit(index: int, item: BulkItem) -> None:
+            filename, document = item
+            if isinstance(document, Exception):
+                future: Future = Future()
+                future.set_exception(document)
+            else:
+                future = executor.submit(process, document)
+            pending.append((index, filename, future))
+
+        for index, item in enumerate(items):
+            submit(index, item)
+            while len(pending) >= concurrency * 2 or (pending and pending[0][2].done()):
+                yield _record(*pending.popleft())
+        while pending:
+            yield _record(*pending.popleft())
+
+
+def _record(index: int, filename: str, future: Future) -> Dict[str, Any]:
+    try:
+        return {"index": index, "filename": filename, "status": "completed", "result": future.result()}
+    except Exception as e:
+        logger.error(f"Error processing {filename} in bulk: {str(e)}")
+        return {"index": index, "filename": filename, "status": "failed", "error": getattr(e, "detail", None) or str(e)}
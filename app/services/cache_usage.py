@@ -0,0 +1,33 @@
+from sqlalchemy import BigInteger, Column, String, Table, func, insert, select, update
+from sqlalchemy.engine import Connection, Engine
+from app.core.database import metadata, write_transaction
+
+# Bytes stored by each database-backed cache, kept in step with its rows so eviction
+# does not have to sum the whole table on every write
+cache_usage = Table(
+    "cache_usage",
+    metadata,
+    Column("cache", String(32), primary_key=True),
+    Column("size_bytes", BigInteger, nullable=False),
+)
+
+
+def init_usage(engine: Engine, cache: str, size_bytes: Column) -> None:
+    """Start the running total of ``cache`` from the sum of ``size_bytes``, unless it has one"""
+    cache_usage.create(engine, checkfirst=True)
+    with write_transaction(engine) as conn:
+        found = conn.execute(select(cache_usage.c.cache).where(cache_usage.c.cache == cache)).first()
+        if found is None:
+            total = conn.execute(select(func.coalesce(func.sum(size_bytes), 0))).scalar()
+            conn.execute(insert(cache_usage).values(cache=cache, size_bytes=total))
+
+
+def add_usage(conn: Connection, cache: str, delta: int) -> int:
+    """Add ``delta`` bytes to the running total of ``cache`` in the caller's transaction and return it"""
+    if delta:
+        conn.execute(
+            update(cache_usage)
+            .where(cache_usage.c.cache == cache)
+            .values(size_bytes=cache_usage.c.size_bytes + delta)
+        )
+    return conn.execute(select(cache_usage.c.size_bytes).where(cache_usage.c.cache == cache)).scalar() or 0
@@ -1,105 +1,25 @@
 from typing import Dict, List, Union, Optional, Any
-import docx
-from docx.document import Document
-from docx.text.paragraph import Paragraph
 import re
-from rapidfuzz import fuzz
 import logging
-import json
-import os
+from .fuzzy_matcher import FuzzyMatcher
+from .parsed_document import ParsedDocument
+from .rule_engine import RuleEngine
+from .rule_registry import RuleSet, get_rule_registry
 
 logger = logging.getLogger(__name__)
 
 class ClauseTracer:
-    def __init__(self):
-        config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'compliance_rules.json')
-        self.clauses = {}
-        self.config_loaded = False
-        try:
-            with open(config_path, 'r') as f:
-                rules = json.load(f)
-                for section in ["general", "ppe", "emergency", "training", "incident"]:
-                    for clause in rules.get(section, []):
-                        name = clause.get("clause") or clause.get("text") or clause.get("id")
-                        self.clauses[name] = {
-                            "keywords": [clause.get("pattern") or clause.get("text") or name],
-                            "severity": clause.get("severity", "medium"),
-                            "required": True,
-                            "recommendation": clause.get("recommendation", "")
-                        }
-            self.config_loaded = True
-        except FileNotFoundError:
-            logger.error(f"Clause config file not found at {config_path}. Using hardcoded defaults. Please add config/compliance_rules.json for full functionality.")
-            self.clauses = {
-                "Emergency Drill": {
-                    "keywords": ["emergency drill", "evacuation drill", "safety drill", "emergency response"],
-                    "severity": "high",
-                    "required": True
-                },
-                "PPE Requirements": {
-                    "keywords": ["ppe", "personal protective equipment", "safety gear", "protective gear"],
-                    "severity": "high",
-                    "required": True
-                },
-                "Safety Training": {
-                    "keywords": ["safety training", "safety course", "training program", "safety certification"],
-                    "severity": "medium",
-                    "required": True
-                },
-                "Incident Reporting": {
-                    "keywords": ["incident report", "accident report", "safety incident", "near miss"],
-                    "severity": "medium",
-                    "required": True
-                }
-            }
-        except json.JSONDecodeError:
-            logger.error(f"Clause config file at {config_path} is not valid JSON. Using hardcoded defaults. Please fix the file format.")
-            self.clauses = {
-                "Emergency Drill": {
-                    "keywords": ["emergency drill", "evacuation drill", "safety drill", "emergency response"],
-                    "severity": "high",
-                    "required": True
-                },
-                "PPE Requirements": {
-                    "keywords": ["ppe", "personal protective equipment", "safety gear", "protective gear"],
-                    "severity": "high",
-                    "required": True
-                },
-                "Safety Training": {
-                    "keywords": ["safety training", "safety course", "training program", "safety certification"],
-                    "severity": "medium",
-                    "required": True
-                },
-                "Incident Reporting": {
-                    "keywords": ["incident report", "accident report", "safety incident", "near miss"],
-                    "severity": "medium",
-                    "required": True
-                }
-            }
-        except Exception as e:
-            logger.error(f"Unexpected error loading clause config: {str(e)}. Using hardcoded defaults.")
-            self.clauses = {
-                "Emergency Drill": {
-                    "keywords": ["emergency drill", "evacuation drill", "safety drill", "emergency response"],
-                    "severity": "high",
-                    "required": True
-                },
-                "PPE Requirements": {
-                    "keywords": ["ppe", "personal protective equipment", "safety gear", "protective gear"],
-                    "severity": "high",
-                    "required": True
-                },
-                "Safety Training": {
-                    "keywords": ["safety training", "safety course", "training program", "safety certification"],
-                    "severity": "medium",
-                    "required": True
-                },
-                "Incident Reporting": {
-                    "keywords": ["incident report", "accident report", "safety incident", "near miss"],
-                    "severity": "medium",
-                    "required": True
-                }
-            }
+    def __init__(self, threshold: int = 80, rule_set: Optional[RuleSet] = None):
+        # Clauses are parsed and compiled once per rule set version by the registry
+        rule_set = rule_set or get_rule_registry().current
+        self.matcher = FuzzyMatcher(threshold=threshold)
+        self.clauses = rule_set.clauses
+        self.config_loaded = rule_set.config_loaded
+        self.rules_version = rule_set.version
+        if threshold == rule_set.engine.fuzzy_matcher.threshold:
+            self.engine = rule_set.engine
+        else:
+            self.engine = RuleEngine(self.clauses, self.matcher)
 
     def find_matches(self, text: str, keywords: List[str], threshold: int = 80) -> List[Dict[str, Any]]:
         """Find matches for keywords in text using fuzzy matching"""
@@ -107,57 +27,53 @@ class ClauseTracer:
             matches = []
             # Split text into paragraphs
             paragraphs = [p.strip() for p in text.split('\n') if p.strip()]
+            matcher = self.matcher if threshold == self.matcher.threshold else FuzzyMatcher(threshold=threshold)
+            keyword_matches = matcher.match(keywords, paragraphs)
             
             for keyword in keywords:
-                for i, paragraph in enumerate(paragraphs):
-                    if fuzz.partial_ratio(keyword.lower(), paragraph.lower()) >= threshold:
-                        matches.append({
-                            "keyword": keyword,
-                            "match": paragraph,
-                            "location": f"Paragraph {i+1}"
-                        })
+                for i in keyword_matches[keyword.lower()]:
+                    paragraph = paragraphs[i]
+                    matches.append({
+                        "keyword": keyword,
+                        "match": paragraph,
+                        "location": f"Paragraph {i+1}"
+                    })
             return matches
         except Exception as e:
             logger.error(f"Error finding matches: {str(e)}")
             return []
 
-    def trace_clauses(self, text: str) -> Dict[str, Any]:
+    def trace_clauses(self, document: Union[str, ParsedDocument]) -> Dict[str, Any]:
         """Trace compliance clauses in the document and return detailed match info"""
         try:
-            results = {}
-            # Split text into paragraphs for matching
-            paragraphs = [p.strip() for p in text.split('\n') if p.strip()]
-            for clause_name, clause_info in self.clauses.items():
-                # Attempt to extract id, title, severity, recommendation from clause_info
-                clause_id = clause_info.get("id") or clause_name
-                title = clause_name
-                severity = clause_info.get("severity", "medium")
-                recommendation = clause_info.get("recommendation", "")
-                keywords = clause_info.get("keywords", [])
-                matched_paragraphs = []
-                for keyword in keywords:
-                    for i, paragraph in enumerate(paragraphs):
-                        if fuzz.partial_ratio(keyword.lower(), paragraph.lower()) >= 80:
-                            matched_paragraphs.append({
-                                "paragraph_number": i + 1,
-                                "snippet": paragraph,
-                                "keyword": keyword
-                            })
-                status = "Found" if matched_paragraphs else "Missing"
-                results[clause_id] = {
-                    "id": clause_id,
-                    "title": title,
-                    "severity": severity,
-                    "recommendation": recommendation,
-                    "status": status,
-                    "matched_paragraphs": matched_paragraphs,
-                    "required": clause_info.get("required", True)
-                }
-            return results
+            # Match every clause in its own mode (regex, exact or fuzzy) in one scan
+            return self.build_report(self.engine.scan(document))
         except Exception as e:
             logger.error(f"Error tracing clauses: {str(e)}")
             return {}
 
+    def build_report(self, clause_hits: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Turn the engine's hits per clause into the traceability report"""
+        results = {}
+        for clause_name, clause_info in self.clauses.items():
+            # Attempt to extract id, title, severity, recommendation from clause_info
+            clause_id = clause_info.get("id") or clause_name
+            title = clause_name
+            severity = clause_info.get("severity", "medium")
+            recommendation = clause_info.get("recommendation", "")
+            matched_paragraphs = clause_hits[clause_name]
+            status = "Found" if matched_paragraphs else "Missing"
+            results[clause_id] = {
+                "id": clause_id,
+                "title": title,
+                "severity": severity,
+                "recommendation": recommendation,
+                "status": status,
+                "matched_paragraphs": matched_paragraphs,
+                "required": clause_info.get("required", True)
+            }
+        return results
+
     def get_compliance_summary(self, trace_results: Dict) -> Dict:
         """
         Generate a compliance summary from trace results.
@@ -1,32 +1,11 @@
-from typing import Dict, List, Any
-import json
-import os
-from pathlib import Path
+from typing import Dict, List, Any, Optional
+from .rule_registry import RuleSet, get_rule_registry
 
 class ComplianceRules:
-    def __init__(self):
-        self.rules = self._load_rules()
-        self.company_config = self._load_company_config()
-
-    def _load_rules(self) -> Dict:
-        """Load compliance rules from configuration"""
-        try:
-            config_path = Path(__file__).parent.parent.parent / 'config' / 'compliance_rules.json'
-            with open(config_path, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading compliance rules: {str(e)}")
-            return {}
-
-    def _load_company_config(self) -> Dict:
-        """Load company configuration"""
-        try:
-            config_path = Path(__file__).parent.parent.parent / 'config' / 'company_config.json'
-            with open(config_path, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading company config: {str(e)}")
-            return {}
+    def __init__(self, rule_set: Optional[RuleSet] = None):
+        rule_set = rule_set or get_rule_registry().current
+        self.rules = rule_set.compliance_rules
+        self.company_config = rule_set.company_config
 
     def analyze_document(self, text: str) -> Dict[str, Any]:
         """Analyze document for compliance"""
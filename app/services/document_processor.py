@@ -1,181 +1,385 @@
-from typing import Dict, List, Any, Optional
-import os
-import PyPDF2
-import docx
-import spacy
-from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+import concurrent.futures
+import time
 from .compliance_rules import ComplianceRules
 from app.core.config import settings
+from app.core.metrics import span, submit_in_context, timed
+from app.core.profiling import profile_thread, profiled
 import logging
-from docx import Document
-from rapidfuzz import fuzz
 from .clause_traceability import ClauseTracer
-import fitz  # PyMuPDF
-import torch
-from transformers import pipeline
 from fastapi import HTTPException
+from .document_store import get_document_store
+from .form_recognizer import get_form_recognizer
+from .incremental_analysis import IncrementalAnalyzer
+from .keyword_matcher import get_keyword_matcher
+from .model_registry import ModelRegistry, get_model_registry
+from .ner_engine import NerEngine
+from .ocr import get_page_ocr
+from .parsed_document import ParsedDocument, parse_text
+from .pdf_extraction import PdfSource, iter_pdf_pages
+from .result_cache import ResultCache, get_result_cache
+from .uploads import UploadedDocument, read_upload_stream
 
 logger = logging.getLogger(__name__)
 
+# Basic compliance rules checked by DocumentProcessor.analyze_compliance
+COMPLIANCE_REQUIREMENTS = {
+    "safety_training": {
+        "id": "safety_training",
+        "title": "Safety Training Requirements",
+        "severity": "high",
+        "keywords": ["safety training", "training program", "safety certification", "training records"],
+        "recommendation": "Ensure all employees complete mandatory safety training"
+    },
+    "ppe_requirements": {
+        "id": "ppe_requirements",
+        "title": "Personal Protective Equipment",
+        "severity": "high",
+        "keywords": ["PPE", "personal protective equipment", "safety gear", "protective clothing"],
+        "recommendation": "Provide and maintain appropriate PPE for all workers"
+    },
+    "emergency_procedures": {
+        "id": "emergency_procedures",
+        "title": "Emergency Response Procedures",
+        "severity": "high",
+        "keywords": ["emergency response", "evacuation plan", "emergency procedures", "first aid"],
+        "recommendation": "Maintain up-to-date emergency response procedures"
+    },
+    "incident_reporting": {
+        "id": "incident_reporting",
+        "title": "Incident Reporting",
+        "severity": "medium",
+        "keywords": ["incident report", "accident report", "near miss", "incident investigation"],
+        "recommendation": "Implement comprehensive incident reporting system"
+    },
+    "risk_assessment": {
+        "id": "risk_assessment",
+        "title": "Risk Assessment",
+        "severity": "medium",
+        "keywords": ["risk assessment", "hazard identification", "risk analysis", "risk management"],
+        "recommendation": "Conduct regular risk assessments"
+    }
+}
+
+COMPLIANCE_KEYWORDS = tuple(
+    keyword for rule in COMPLIANCE_REQUIREMENTS.values() for keyword in rule["keywords"]
+)
+
+# Sections of the analysis result, fastest first; reuse reports what incremental analysis reused
+RESULT_STAGES = ("compliance_report", "clause_traceability", "entities", "summary", "reuse")
+
+STAGE_TIMEOUT_SECONDS = 30
+
 class DocumentProcessor:
-    def __init__(self):
-        # Load spaCy model for entity recognition
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            # If model is not downloaded, download it
-            spacy.cli.download("en_core_web_sm")
-            self.nlp = spacy.load("en_core_web_sm")
-        self.compliance_rules = ComplianceRules()
-        self.upload_dir = "uploads"
-        os.makedirs(self.upload_dir, exist_ok=True)
-        self.clause_tracer = ClauseTracer()
-        # Initialize summarizer
-        self._summarizer = None
+    def __init__(self, registry: Optional[ModelRegistry] = None, result_cache: Optional[ResultCache] = None):
+        # Models and rule sets are shared process-wide through the registry
+        self.registry = registry or get_model_registry()
+        if result_cache is None and settings.RESULT_CACHE_ENABLED:
+            result_cache = get_result_cache()
+        self.result_cache = result_cache
+        self.document_store = get_document_store() if settings.DOCUMENT_STORE_ENABLED else None
+        # Reuses per-paragraph outputs from earlier revisions of a document
+        self.incremental = IncrementalAnalyzer(self.registry) if settings.INCREMENTAL_ANALYSIS_ENABLED else None
+        # Reads scanned PDF pages; None when OCR is disabled
+        self.ocr = get_page_ocr()
+        # Azure layout analysis replaces local PDF extraction when configured
+        self.form_recognizer = get_form_recognizer()
+
+    @property
+    def nlp(self):
+        return self.registry.nlp
+
+    @property
+    def compliance_rules(self) -> ComplianceRules:
+        return ComplianceRules(self.registry.rules.current)
+
+    @property
+    def clause_tracer(self) -> ClauseTracer:
+        return ClauseTracer(rule_set=self.registry.rules.current)
 
     def process_document(self, file) -> Dict:
         """
-        Process a document and extract information
+        Process an uploaded document and extract information
+        """
+        return self.process_upload(read_upload_stream(file.file, file.filename))
+
+    def process_content(self, filename: str, content: bytes) -> Dict:
+        """
+        Process the raw bytes of a document and extract information
+        """
+        return self.process_upload(UploadedDocument.from_bytes(filename, content))
+
+    def process_upload(self, upload: UploadedDocument) -> Dict:
+        """
+        Process a buffered upload and extract information.
+        Results are cached by content hash, and concurrent uploads of identical content
+        share one computation. The upload's buffer and any spilled temporary file are
+        released afterwards.
         """
         try:
-            # Save the file
-            file_path = self.save_file(file)
-            
+            with profile_thread():
+                if self.result_cache is None:
+                    return self._analyze_upload(upload)
+                computed = []
+
+                def compute() -> Dict:
+                    computed.append(True)
+                    return self._analyze_upload(upload)
+
+                result = self.result_cache.get_or_compute(upload.sha256, self.registry.analysis_version, compute)
+                return result if computed else self._mark_cached(result)
+        finally:
+            upload.cleanup()
+
+    def iter_upload_analysis(self, upload: UploadedDocument) -> Iterator[Tuple[str, Any]]:
+        """
+        Analyze a buffered upload, yielding ``(stage, payload)`` pairs as each stage finishes.
+
+        ``extraction`` comes first with text statistics, then ``compliance_report``,
+        ``clause_traceability``, ``entities`` and ``summary`` in the order they complete,
+        and finally ``complete`` with the full result. Results are read from and stored in
+        the result cache, and like ``process_upload`` concurrent uploads of identical
+        content share one computation; the upload is released when the generator finishes
+        or is closed.
+        """
+        if self.result_cache is None:
+            events = self._iter_analysis(upload)
+        else:
+            events = self.result_cache.stream_or_compute(
+                upload.sha256, self.registry.analysis_version, lambda: self._iter_analysis(upload)
+            )
+        try:
+            for stage, payload in events:
+                if stage != "cached":
+                    yield stage, payload
+                    continue
+                result = self._mark_cached(payload)
+                yield "extraction", {"cached": True}
+                for stage in RESULT_STAGES:
+                    yield stage, result.get(stage)
+                yield "complete", result
+        finally:
+            events.close()
+            upload.cleanup()
+
+    @staticmethod
+    def _mark_cached(result: Dict) -> Dict:
+        """A copy of a result this request did not compute itself, flagged as reused whole"""
+        if result.get("reuse") is None:
+            return result
+        return dict(result, reuse=dict(result["reuse"], document_cached=True))
+
+    def _iter_analysis(self, upload: UploadedDocument) -> Iterator[Tuple[str, Any]]:
+        """The stages of ``_iter_stages``, then ``complete`` with the assembled result"""
+        result = {}
+        for stage, payload in self._iter_stages(upload):
+            if stage in RESULT_STAGES:
+                result[stage] = payload
+            yield stage, payload
+        yield "complete", {stage: result[stage] for stage in RESULT_STAGES}
+
+    def _analyze_upload(self, upload: UploadedDocument) -> Dict:
+        for stage, payload in self._iter_analysis(upload):
+            if stage == "complete":
+                return payload
+
+    def _iter_stages(self, upload: UploadedDocument) -> Iterator[Tuple[str, Any]]:
+        try:
             # Extract text
-            text = self.extract_text(file_path)
-            if not text:
+            started = time.perf_counter()
+            with span("extract_text"):
+                document = self.parse(upload)
+            if not document.text:
                 raise ValueError("No text could be extracted from the document")
-            logger.info(f"Extracted text length: {len(text)} characters")
-            
-            # Process text in parallel
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-                # Submit tasks
-                entities_future = executor.submit(self.extract_entities, text)
-                summary_future = executor.submit(self.generate_summary, text)
-                compliance_future = executor.submit(self.analyze_compliance, text)
-                clause_traceability_future = executor.submit(self.clause_tracer.trace_clauses, text)
-                
-                # Get results with timeouts
-                try:
-                    entities = entities_future.result(timeout=30)
-                    summary = summary_future.result(timeout=30)
-                    compliance_report = compliance_future.result(timeout=30)
-                    clause_traceability = clause_traceability_future.result(timeout=30)
-                except concurrent.futures.TimeoutError:
-                    logger.error("Processing timed out")
-                    raise HTTPException(status_code=504, detail="Processing timed out")
-            
-            logger.info(f"Found {len(entities)} entities")
-            logger.info(f"Generated summary length: {len(summary)} characters")
-            logger.info("Compliance analysis completed")
-            logger.info(f"Clause traceability completed with {len(clause_traceability)} clauses")
-            
-            # Clean up
-            try:
-                os.remove(file_path)
-                logger.info("Temporary file removed")
-            except Exception as e:
-                logger.warning(f"Error removing temporary file: {str(e)}")
-            
-            return {
-                "summary": summary,
-                "entities": entities,
-                "compliance_report": compliance_report,
-                "clause_traceability": clause_traceability
+            logger.info(f"Extracted text length: {len(document.text)} characters")
+            yield "extraction", {
+                "filename": upload.filename,
+                "characters": len(document.text),
+                "paragraphs": len(document.paragraphs),
+                "seconds": round(time.perf_counter() - started, 3)
             }
+
+            # Process text in parallel, reporting each stage as soon as it finishes
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=3)
+            try:
+                reuse = None if self.incremental is None else {"document_cached": False}
+                tasks = self._stage_tasks(document, reuse)
+                futures = {
+                    submit_in_context(executor, profiled(timed(stage, task))): stage for stage, task in tasks.items()
+                }
+                results = {}
+                for future in concurrent.futures.as_completed(futures, timeout=STAGE_TIMEOUT_SECONDS):
+                    logger.info(f"Stage {futures[future]} completed")
+                    results[futures[future]] = future.result()
+                    yield futures[future], results[futures[future]]
+                with span("persist"):
+                    self._persist(upload, document, results)
+                yield "reuse", reuse
+            except concurrent.futures.TimeoutError:
+                logger.error("Processing timed out")
+                raise HTTPException(status_code=504, detail="Processing timed out")
+            finally:
+                # A closed stream or a timeout leaves nothing waiting on the remaining stages
+                executor.shutdown(wait=False, cancel_futures=True)
         except Exception as e:
             logger.error(f"Error processing document: {str(e)}")
-            # Clean up file if it exists
-            try:
-                if 'file_path' in locals():
-                    os.remove(file_path)
-            except:
-                pass
             raise
 
-    def save_file(self, file) -> str:
-        """Save uploaded file to disk and return the file path"""
+    def _persist(self, upload: UploadedDocument, document: ParsedDocument, results: Dict[str, Any]) -> None:
+        """Record the analyzed document for cross-document queries; failures only log"""
+        if self.document_store is None:
+            return
         try:
-            file_path = os.path.join(self.upload_dir, file.filename)
-            with open(file_path, "wb") as buffer:
-                content = file.file.read()
-                buffer.write(content)
-            logger.info(f"File saved successfully to {file_path}")
-            return file_path
+            rule_set = self.registry.rules.current
+            categories = {info.get("id") or name: info.get("category") for name, info in rule_set.clauses.items()}
+            self.document_store.save(
+                upload.sha256, upload.filename, document, results,
+                clause_categories=categories, rules_version=rule_set.version, site=upload.site
+            )
         except Exception as e:
-            logger.error(f"Error saving file: {str(e)}")
-            raise
+            logger.warning(f"Error storing analyzed document {upload.filename}: {str(e)}")
+
+    def _stage_tasks(self, document: ParsedDocument, reuse: Optional[Dict]) -> Dict[str, Callable[[], Any]]:
+        """
+        The analysis stages to run on the document. With incremental analysis, entities,
+        clause hits and summaries come from per-paragraph and per-chunk caches and ``reuse``
+        records how many paragraphs and chunks each stage reused.
+        """
+        tracer = self.clause_tracer
+        if self.incremental is None:
+            return {
+                "compliance_report": lambda: self.analyze_compliance(document),
+                "clause_traceability": lambda: tracer.trace_clauses(document),
+                "entities": lambda: self.extract_entities(document),
+                "summary": lambda: self.generate_summary(document)
+            }
+
+        paragraphs, offsets = document.paragraphs, document.offsets
+        reuse["paragraphs"] = len(paragraphs)
+
+        def trace_clauses() -> Dict:
+            try:
+                report, reuse["clause_traceability"] = self.incremental.trace_clauses(tracer, paragraphs, offsets)
+                return report
+            except Exception as e:
+                logger.error(f"Error tracing clauses: {str(e)}")
+                return {}
+
+        def extract_entities() -> List[Dict]:
+            try:
+                entities, reuse["entities"] = self.incremental.extract_entities(document)
+                return entities
+            except Exception as e:
+                logger.error(f"Error extracting entities: {str(e)}")
+                raise
 
-    def extract_text(self, file_path: str) -> str:
+        return {
+            "compliance_report": lambda: self.analyze_compliance(document),
+            "clause_traceability": trace_clauses,
+            "entities": extract_entities,
+            "summary": lambda: self.generate_summary(document, reuse)
+        }
+
+    def parse(self, source: Union[str, UploadedDocument]) -> ParsedDocument:
+        """
+        Extract a document's text and split it once into the paragraphs every analyzer
+        uses. PDFs are read page by page so the result also knows where each page starts.
         """
-        Extract text from a document.
-        Supports PDF (via PyMuPDF) and DOCX (via python-docx).
+        if self._is_pdf(source):
+            try:
+                return ParsedDocument.from_pages(self.iter_pages(source))
+            except Exception as e:
+                logger.error(f"Error extracting text from PDF: {str(e)}")
+                raise
+        return ParsedDocument(self.extract_text(source))
+
+    def extract_text(self, source: Union[str, UploadedDocument]) -> str:
+        """
+        Extract text from a document given as a file path or a buffered upload.
+        Supports PDF (via PyMuPDF with OCR of scanned pages, or Azure Form Recognizer) and
+        DOCX (via python-docx).
+        In-memory uploads are parsed straight from their buffer without touching disk.
         """
         try:
-            if file_path.lower().endswith('.pdf'):
+            path = source.path if isinstance(source, UploadedDocument) else source
+            if self._is_pdf(source):
                 try:
-                    doc = fitz.open(file_path)
-                    text = "\n".join(page.get_text() for page in doc)
-                    return text
+                    return "\n".join(self.iter_pages(source))
                 except Exception as e:
                     logger.error(f"Error extracting text from PDF: {str(e)}")
                     raise
             else:
-                doc = Document(file_path)
+                # python-docx pulls in lxml; only load it once a DOCX is being read
+                from docx import Document
+
+                if path is None:
+                    with source.open() as stream:
+                        doc = Document(stream)
+                else:
+                    doc = Document(path)
                 return "\n".join([paragraph.text for paragraph in doc.paragraphs])
         except Exception as e:
             logger.error(f"Error extracting text: {str(e)}")
             raise
 
-    def extract_entities(self, text: str) -> List[Dict]:
+    def iter_pages(self, source: Union[str, UploadedDocument]) -> Iterator[str]:
+        """
+        Yield the text of a PDF page by page, in order, while later pages are still being
+        extracted in parallel. With Form Recognizer configured, the pages come from its
+        layout analysis, falling back to local extraction if that fails.
+        """
+        if self.form_recognizer is not None:
+            try:
+                return iter(self.form_recognizer.extract_pages(self._pdf_source(source)))
+            except Exception as e:
+                logger.warning(f"Form Recognizer extraction failed, extracting locally: {str(e)}")
+        return iter_pdf_pages(self._pdf_source(source), ocr=self.ocr)
+
+    @staticmethod
+    def _is_pdf(source: Union[str, UploadedDocument]) -> bool:
+        if isinstance(source, UploadedDocument):
+            return source.extension == '.pdf'
+        return source.lower().endswith('.pdf')
+
+    @staticmethod
+    def _pdf_source(source: Union[str, UploadedDocument]) -> PdfSource:
+        if isinstance(source, UploadedDocument):
+            return source.getvalue() if source.in_memory else source.path
+        return source
+
+    def extract_entities(self, document: Union[str, ParsedDocument]) -> List[Dict]:
         """
         Extract named entities from text.
         
         Args:
-            text (str): Text to process
+            document (str or ParsedDocument): Text to process
             
         Returns:
             List[Dict]: List of entities with their types
         """
         try:
-            doc = self.nlp(text)
-            entities = []
-            for ent in doc.ents:
-                entities.append({
-                    "text": ent.text,
-                    "label": ent.label_,
-                    "start": ent.start_char,
-                    "end": ent.end_char
-                })
-            return entities
+            text = document.text if isinstance(document, ParsedDocument) else document
+            return NerEngine(self.nlp).extract(text)
         except Exception as e:
             logger.error(f"Error extracting entities: {str(e)}")
             raise
 
-    def generate_summary(self, text: str) -> str:
+    def generate_summary(self, document: Union[str, ParsedDocument], reuse: Optional[Dict] = None) -> str:
         """
         Generate a high-level summary of the text using Hugging Face transformers (BART).
         If the text is too long, chunk and summarize in batches, then combine.
         Returns a 5-7 sentence summary.
         """
+        document = parse_text(document)
+        text = document.text
         try:
-            # Initialize summarizer if not already done
-            if self._summarizer is None:
-                self._summarizer = pipeline(
-                    "summarization",
-                    model="facebook/bart-large-cnn",
-                    tokenizer="facebook/bart-large-cnn",
-                    device=0 if torch.cuda.is_available() else -1
-                )
-            
             # For very short texts, return first few sentences
-            if len(text.split()) < 100:
+            if document.word_count < 100:
                 sentences = text.split('.')
                 return '. '.join(sentences[:3]) + '.'
             
             # For medium texts, use simple extractive summarization
-            if len(text.split()) < 1000:
+            if document.word_count < 1000:
                 doc = self.nlp(text)
                 sentences = [sent.text for sent in doc.sents]
                 # Take first 3-5 sentences that are not too short
@@ -187,37 +391,11 @@ class DocumentProcessor:
                         break
                 return ' '.join(summary_sentences)
             
-            # For long texts, use BART
-            max_input = 1024
-            paragraphs = [p for p in text.split('\n') if p.strip()]
-            chunks = []
-            current_chunk = ""
-            
-            for para in paragraphs:
-                if len((current_chunk + para).split()) > max_input:
-                    chunks.append(current_chunk)
-                    current_chunk = para
-                else:
-                    current_chunk += " " + para
-            if current_chunk:
-                chunks.append(current_chunk)
-            
-            # Summarize each chunk
-            summaries = []
-            for chunk in chunks:
-                if len(chunk.split()) > 50:  # Only summarize chunks with sufficient content
-                    summary = self._summarizer(chunk, max_length=130, min_length=40, do_sample=False)[0]['summary_text']
-                    summaries.append(summary)
-                else:
-                    summaries.append(chunk)
-            
-            # Combine summaries and ensure it's not too long
-            final_summary = " ".join(summaries)
-            if len(final_summary.split()) > 200:
-                # If still too long, summarize again
-                final_summary = self._summarizer(final_summary, max_length=200, min_length=100, do_sample=False)[0]['summary_text']
-            
-            return final_summary
+            # For long texts, use BART on token-sized chunks, batched across requests
+            if self.incremental is not None and reuse is not None:
+                summary, reuse["summary_chunks"] = self.incremental.summarize(document)
+                return summary
+            return self.registry.summarization.summarize(document)
         except Exception as e:
             logger.error(f"Error generating summary: {str(e)}")
             # Fallback to simple extractive summarization
@@ -228,71 +406,39 @@ class DocumentProcessor:
             except:
                 return text[:500] + "..."
 
-    def analyze_compliance(self, text: str) -> Dict:
+    def analyze_compliance(self, document: Union[str, ParsedDocument]) -> Dict:
         """Analyze document for compliance using clause traceability"""
         try:
-            # Basic compliance rules to check
-            compliance_rules = {
-                "safety_training": {
-                    "id": "safety_training",
-                    "title": "Safety Training Requirements",
-                    "severity": "high",
-                    "keywords": ["safety training", "training program", "safety certification", "training records"],
-                    "recommendation": "Ensure all employees complete mandatory safety training"
-                },
-                "ppe_requirements": {
-                    "id": "ppe_requirements",
-                    "title": "Personal Protective Equipment",
-                    "severity": "high",
-                    "keywords": ["PPE", "personal protective equipment", "safety gear", "protective clothing"],
-                    "recommendation": "Provide and maintain appropriate PPE for all workers"
-                },
-                "emergency_procedures": {
-                    "id": "emergency_procedures",
-                    "title": "Emergency Response Procedures",
-                    "severity": "high",
-                    "keywords": ["emergency response", "evacuation plan", "emergency procedures", "first aid"],
-                    "recommendation": "Maintain up-to-date emergency response procedures"
-                },
-                "incident_reporting": {
-                    "id": "incident_reporting",
-                    "title": "Incident Reporting",
-                    "severity": "medium",
-                    "keywords": ["incident report", "accident report", "near miss", "incident investigation"],
-                    "recommendation": "Implement comprehensive incident reporting system"
-                },
-                "risk_assessment": {
-                    "id": "risk_assessment",
-                    "title": "Risk Assessment",
-                    "severity": "medium",
-                    "keywords": ["risk assessment", "hazard identification", "risk analysis", "risk management"],
-                    "recommendation": "Conduct regular risk assessments"
-                }
-            }
+            compliance_rules = COMPLIANCE_REQUIREMENTS
+            matcher = get_keyword_matcher(COMPLIANCE_KEYWORDS)
 
             # Analyze text against compliance rules
             missing_requirements = []
             compliant_requirements = []
-            matched_paragraphs = []
 
-            # Split text into paragraphs
-            paragraphs = [p.strip() for p in text.split('\n') if p.strip()]
+            # Find every keyword in the document's paragraphs in one scan
+            document = parse_text(document)
+            paragraphs = document.paragraphs
+            paragraph_hits = matcher.paragraph_hits(paragraphs, document.lowered)
+            hit_paragraphs = sorted(paragraph_hits)
             
             for rule_id, rule in compliance_rules.items():
-                found = False
                 rule_matches = []
+                keywords = [(keyword, keyword.lower()) for keyword in rule["keywords"]]
                 
-                for i, para in enumerate(paragraphs):
-                    # Check for keyword matches
-                    for keyword in rule["keywords"]:
-                        if keyword.lower() in para.lower():
-                            found = True
+                for i in hit_paragraphs:
+                    found_keywords = paragraph_hits[i]
+                    # Report the first of the rule's keywords present in the paragraph
+                    for keyword, keyword_lower in keywords:
+                        if keyword_lower in found_keywords:
+                            para = paragraphs[i]
                             rule_matches.append({
                                 "paragraph_number": i + 1,
                                 "keyword": keyword,
                                 "snippet": para[:200] + "..." if len(para) > 200 else para
                             })
                             break
+                found = bool(rule_matches)
                 
                 requirement = {
                     "id": rule["id"],
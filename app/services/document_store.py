@@ -0,0 +1,318 @@
+from typing import Any, Dict, List, Optional, Union
+from datetime import datetime
+from functools import lru_cache
+import logging
+from sqlalchemy import (
+    Column, DateTime, ForeignKey, Index, Integer, String, Table, Text, and_, delete, func, insert, select, text,
+    update
+)
+from sqlalchemy.exc import OperationalError
+from app.core.database import get_engine, metadata, write_transaction
+from .parsed_document import ParsedDocument, parse_text
+from .portfolio import apply_document, portfolio_clauses, portfolio_risk
+
+logger = logging.getLogger(__name__)
+
+documents = Table(
+    "documents",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("document_hash", String(64), nullable=False, unique=True),
+    Column("filename", String(512), nullable=False),
+    Column("site", String(255), nullable=True, index=True),
+    Column("rules_version", String(64), nullable=True),
+    Column("risk_level", String(16), nullable=True),
+    Column("paragraph_count", Integer, nullable=False, default=0),
+    Column("created_at", DateTime, nullable=False, default=datetime.utcnow),
+    Column("updated_at", DateTime, nullable=False, default=datetime.utcnow, index=True),
+)
+
+document_paragraphs = Table(
+    "document_paragraphs",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("document_id", Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False),
+    Column("paragraph_number", Integer, nullable=False),
+    Column("start_offset", Integer, nullable=False),
+    Column("text", Text, nullable=False),
+    Index("ix_document_paragraphs_document", "document_id", "paragraph_number"),
+)
+
+document_clauses = Table(
+    "document_clauses",
+    metadata,
+    Column("document_id", Integer, ForeignKey("documents.id", ondelete="CASCADE"), primary_key=True),
+    Column("clause_id", String(128), primary_key=True),
+    Column("status", String(16), nullable=False),
+    Column("severity", String(16), nullable=True),
+    Column("category", String(64), nullable=True),
+    Index("ix_document_clauses_clause_status", "clause_id", "status"),
+)
+
+clause_hits = Table(
+    "clause_hits",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("document_id", Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True),
+    Column("clause_id", String(128), nullable=False, index=True),
+    Column("paragraph_number", Integer, nullable=False),
+    Column("keyword", Text, nullable=True),
+    Column("start_offset", Integer, nullable=True),
+    Column("end_offset", Integer, nullable=True),
+)
+
+document_entities = Table(
+    "document_entities",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("document_id", Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True),
+    Column("label", String(32), nullable=False),
+    Column("text", String(512), nullable=False),
+    Column("normalized", String(512), nullable=False),
+    Column("start_offset", Integer, nullable=False),
+    Column("end_offset", Integer, nullable=False),
+    Index("ix_document_entities_normalized", "normalized", "label"),
+)
+
+# External-content FTS5 index over document_paragraphs, kept in sync by triggers
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS paragraphs_fts USING fts5("
+    "text, content='document_paragraphs', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS document_paragraphs_ai AFTER INSERT ON document_paragraphs BEGIN "
+    "INSERT INTO paragraphs_fts(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS document_paragraphs_ad AFTER DELETE ON document_paragraphs BEGIN "
+    "INSERT INTO paragraphs_fts(paragraphs_fts, rowid, text) VALUES ('delete', old.id, old.text); END",
+]
+
+# Rows per executemany batch
+INSERT_BATCH = 1000
+
+
+def search_terms(query: str) -> List[str]:
+    """The whitespace-separated terms of a query that hold a letter or digit to search for"""
+    return [term for term in query.split() if any(char.isalnum() for char in term)]
+
+
+def fts_query(query: str) -> str:
+    """Quote every term so user input is matched literally instead of as FTS5 syntax"""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in search_terms(query))
+
+
+class DocumentStore:
+    """
+    Persists the paragraphs, clause statuses and hits, and entities of every analyzed
+    document in DATABASE_URL so they can be queried across the corpus without
+    reprocessing. On SQLite paragraphs are full-text indexed with FTS5; other databases
+    fall back to a case-insensitive substring search.
+    """
+
+    def __init__(self, engine=None):
+        self.engine = engine or get_engine()
+        self.full_text = self.engine.dialect.name == "sqlite"
+        metadata.create_all(self.engine, tables=[
+            documents, document_paragraphs, document_clauses, clause_hits, document_entities,
+            portfolio_risk, portfolio_clauses
+        ])
+        if self.full_text:
+            with self.engine.begin() as conn:
+                for statement in SQLITE_FTS_DDL:
+                    conn.execute(text(statement))
+
+    def save(self, document_hash: str, filename: str, document: Union[str, ParsedDocument], result: Dict[str, Any],
+             clause_categories: Optional[Dict[str, str]] = None, rules_version: Optional[str] = None,
+             site: Optional[str] = None) -> int:
+        """
+        Store an analyzed document, replacing whatever was stored for the same content,
+        and update the portfolio aggregates in the same transaction. Returns the document id.
+        """
+        clause_categories = clause_categories or {}
+        document = parse_text(document)
+        paragraphs, offsets = document.paragraphs, document.offsets
+        now = datetime.utcnow()
+        values = {
+            "filename": filename,
+            "site": site,
+            "rules_version": rules_version,
+            "risk_level": (result.get("compliance_report") or {}).get("risk_level"),
+            "paragraph_count": len(paragraphs),
+            "updated_at": now,
+        }
+        # Saves of the same document must not both find it missing, or both subtract the
+        # same previous contribution from the aggregates
+        with write_transaction(self.engine) as conn:
+            previous = self._previous(conn, document_hash)
+            if previous is None:
+                document_id = self._insert_document(
+                    conn, dict(values, document_hash=document_hash, created_at=now)
+                )
+                if document_id is None:
+                    previous = self._previous(conn, document_hash)
+            if previous is not None:
+                document_id = previous["id"]
+                previous_clauses = conn.execute(
+                    select(document_clauses.c.clause_id, document_clauses.c.status,
+                           document_clauses.c.severity, document_clauses.c.category)
+                    .where(document_clauses.c.document_id == document_id)
+                ).mappings().all()
+                apply_document(conn, previous["site"], previous["risk_level"], previous_clauses, sign=-1)
+                conn.execute(update(documents).where(documents.c.id == document_id).values(**values))
+                for table in (document_paragraphs, document_clauses, clause_hits, document_entities):
+                    conn.execute(delete(table).where(table.c.document_id == document_id))
+
+            self._insert(conn, document_paragraphs, [
+                {"document_id": document_id, "paragraph_number": i + 1, "start_offset": offset, "text": paragraph}
+                for i, (paragraph, offset) in enumerate(zip(paragraphs, offsets))
+            ])
+            clause_rows, hit_rows = [], []
+            for clause_id, clause in (result.get("clause_traceability") or {}).items():
+                clause_rows.append({
+                    "document_id": document_id,
+                    "clause_id": clause_id,
+                    "status": clause.get("status"),
+                    "severity": clause.get("severity"),
+                    "category": clause_categories.get(clause_id),
+                })
+                for hit in clause.get("matched_paragraphs", []):
+                    hit_rows.append({
+                        "document_id": document_id,
+                        "clause_id": clause_id,
+                        "paragraph_number": hit.get("paragraph_number"),
+                        "keyword": hit.get("keyword"),
+                        "start_offset": hit.get("start"),
+                        "end_offset": hit.get("end"),
+                    })
+            self._insert(conn, document_clauses, clause_rows)
+            apply_document(conn, site, values["risk_level"], clause_rows)
+            self._insert(conn, clause_hits, hit_rows)
+            self._insert(conn, document_entities, [
+                {
+                    "document_id": document_id,
+                    "label": entity["label"],
+                    "text": entity["text"][:512],
+                    "normalized": entity["text"].lower()[:512],
+                    "start_offset": entity["start"],
+                    "end_offset": entity["end"],
+                }
+                for entity in result.get("entities") or []
+            ])
+        return document_id
+
+    @staticmethod
+    def _previous(conn, document_hash: str):
+        return conn.execute(
+            select(documents.c.id, documents.c.site, documents.c.risk_level)
+            .where(documents.c.document_hash == document_hash)
+            .with_for_update()
+        ).mappings().first()
+
+    @staticmethod
+    def _insert_document(conn, values: Dict[str, Any]) -> Optional[int]:
+        """Insert the documents row; None if a concurrent save inserted it first"""
+        if conn.dialect.name == "postgresql":
+            # SQLite's write lock already serializes saves; PostgreSQL waits here for the
+            # other transaction, and the caller then locks the row it committed
+            from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+            return conn.execute(
+                pg_insert(documents).values(**values)
+                .on_conflict_do_nothing(index_elements=[documents.c.document_hash])
+                .returning(documents.c.id)
+            ).scalar()
+        return conn.execute(insert(documents).values(**values)).inserted_primary_key[0]
+
+    @staticmethod
+    def _insert(conn, table: Table, rows: List[Dict[str, Any]]) -> None:
+        for start in range(0, len(rows), INSERT_BATCH):
+            conn.execute(insert(table), rows[start:start + INSERT_BATCH])
+
+    def search_paragraphs(self, query: str, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Paragraphs containing every term of the query, best matches first. A query without
+        letters or digits matches nothing; one FTS5 still cannot parse raises ValueError.
+        """
+        if not search_terms(query):
+            return []
+        with self.engine.connect() as conn:
+            if self.full_text:
+                try:
+                    rows = conn.execute(text(
+                        "SELECT p.document_id, d.filename, d.site, p.paragraph_number, p.text, "
+                        "snippet(paragraphs_fts, 0, '[', ']', '...', 16) AS snippet "
+                        "FROM paragraphs_fts "
+                        "JOIN document_paragraphs p ON p.id = paragraphs_fts.rowid "
+                        "JOIN documents d ON d.id = p.document_id "
+                        "WHERE paragraphs_fts MATCH :query ORDER BY bm25(paragraphs_fts) "
+                        "LIMIT :limit OFFSET :offset"
+                    ), {"query": fts_query(query), "limit": limit, "offset": offset}).mappings().all()
+                except OperationalError as e:
+                    if "fts5" not in str(e):
+                        raise
+                    raise ValueError(f"Invalid search query: {str(e.orig)}") from e
+                return [dict(row) for row in rows]
+
+            lowered = func.lower(document_paragraphs.c.text)
+            condition = and_(*[lowered.contains(term.lower(), autoescape=True) for term in query.split()])
+            rows = conn.execute(
+                select(document_paragraphs.c.document_id, documents.c.filename, documents.c.site,
+                       document_paragraphs.c.paragraph_number, document_paragraphs.c.text)
+                .join(documents, documents.c.id == document_paragraphs.c.document_id)
+                .where(condition)
+                .order_by(document_paragraphs.c.document_id, document_paragraphs.c.paragraph_number)
+                .limit(limit).offset(offset)
+            ).mappings().all()
+            return [dict(row, snippet=row["text"]) for row in rows]
+
+    def documents_by_clause(self, clause_id: str, status: str = "Missing",
+                            limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """Documents in which the clause has the given status"""
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(documents.c.id, documents.c.filename, documents.c.site, documents.c.risk_level,
+                       documents.c.updated_at, document_clauses.c.severity)
+                .join(document_clauses, document_clauses.c.document_id == documents.c.id)
+                .where(document_clauses.c.clause_id == clause_id, document_clauses.c.status == status)
+                .order_by(documents.c.id)
+                .limit(limit).offset(offset)
+            ).mappings().all()
+        return [dict(row) for row in rows]
+
+    def search_entities(self, query: Optional[str] = None, label: Optional[str] = None,
+                        limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """Entity mentions whose text starts with the query, optionally of one label"""
+        conditions = []
+        if query:
+            conditions.append(document_entities.c.normalized.startswith(query.lower(), autoescape=True))
+        if label:
+            conditions.append(document_entities.c.label == label.upper())
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(document_entities.c.document_id, documents.c.filename, document_entities.c.label,
+                       document_entities.c.text, document_entities.c.start_offset, document_entities.c.end_offset)
+                .join(documents, documents.c.id == document_entities.c.document_id)
+                .where(*conditions)
+                .order_by(document_entities.c.document_id, document_entities.c.start_offset)
+                .limit(limit).offset(offset)
+            ).mappings().all()
+        return [dict(row) for row in rows]
+
+    def get_document(self, document_id: int) -> Optional[Dict[str, Any]]:
+        """A stored document with the status of every clause"""
+        with self.engine.connect() as conn:
+            document = conn.execute(select(documents).where(documents.c.id == document_id)).mappings().first()
+            if document is None:
+                return None
+            clauses = conn.execute(
+                select(document_clauses.c.clause_id, document_clauses.c.status,
+                       document_clauses.c.severity, document_clauses.c.category)
+                .where(document_clauses.c.document_id == document_id)
+                .order_by(document_clauses.c.clause_id)
+            ).mappings().all()
+            entity_count = conn.execute(
+                select(func.count()).select_from(document_entities).where(document_entities.c.document_id == document_id)
+            ).scalar()
+        return dict(document, clauses=[dict(row) for row in clauses], entity_count=entity_count)
+
+
+@lru_cache()
+def get_document_store() -> DocumentStore:
+    return DocumentStore()
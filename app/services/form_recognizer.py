@@ -0,0 +1,248 @@
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import threading
+import time
+from app.core.config import get_settings
+from .pdf_extraction import PdfSource
+
+logger = logging.getLogger(__name__)
+
+# Responses that mean "try again later": throttling and transient unavailability
+RETRY_STATUSES = (429, 503)
+MAX_RETRIES = 5
+
+
+class FormRecognizerError(Exception):
+    """Raised when the service rejects a document, or an analysis fails or times out"""
+
+
+def split_pdf(document: bytes, pages_per_batch: int) -> List[bytes]:
+    """Split a PDF into documents of at most ``pages_per_batch`` pages, in order"""
+    import fitz  # PyMuPDF
+
+    with fitz.open(stream=document, filetype="pdf") as doc:
+        count = doc.page_count
+        if count <= pages_per_batch:
+            return [document]
+        batches = []
+        for start in range(0, count, pages_per_batch):
+            with fitz.open() as part:
+                part.insert_pdf(doc, from_page=start, to_page=min(start + pages_per_batch, count) - 1)
+                batches.append(part.tobytes(garbage=3))
+        return batches
+
+
+def page_text(page: Dict[str, Any]) -> str:
+    """The text of an analyzed page, one line of the layout per line"""
+    return "\n".join(line.get("content", "") for line in page.get("lines", []))
+
+
+def _retry_after(response, default: float) -> float:
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", default)))
+    except ValueError:
+        return default
+
+
+class RateLimiter:
+    """
+    Token bucket allowing ``rate`` acquisitions per second, at most ``burst`` at once;
+    the default spaces calls evenly. Waiting never blocks the loop.
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.capacity = max(1.0, burst)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class FormRecognizerClient:
+    """
+    Async client for the Azure Form Recognizer analyze REST API.
+
+    One ``httpx.AsyncClient`` keeps up to ``max_connections`` connections open for every
+    call. A PDF is split into documents of ``pages_per_request`` pages that are analyzed
+    concurrently, with at most ``max_concurrent`` analyze operations in flight across all
+    documents, and every call to the service, polls included, first takes a token from a
+    rate limiter sized to the resource's transaction limit. Operations are polled with
+    ``asyncio.sleep`` between attempts, honouring Retry-After, so waiting on them never
+    blocks the event loop. Throttled and unavailable responses are retried.
+    """
+
+    def __init__(self, endpoint: str, key: str, model_id: str = "prebuilt-layout",
+                 api_version: str = "2023-07-31", max_connections: int = 16, max_concurrent: int = 8,
+                 requests_per_second: float = 15.0, pages_per_request: int = 16,
+                 poll_interval: float = 1.0, timeout: float = 300.0, transport=None):
+        # Imported here so the API only loads httpx once cloud extraction is configured
+        import httpx
+
+        self.model_id = model_id
+        self.api_version = api_version
+        self.pages_per_request = max(1, pages_per_request)
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self._client = httpx.AsyncClient(
+            base_url=endpoint.rstrip("/"),
+            headers={"Ocp-Apim-Subscription-Key": key},
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            transport=transport,
+        )
+        self._slots = asyncio.Semaphore(max(1, max_concurrent))
+        self._limiter = RateLimiter(requests_per_second)
+
+    async def analyze(self, document: bytes) -> List[Dict[str, Any]]:
+        """Analyze a PDF; returns its pages in order, numbered from 1 across all batches"""
+        batches = await asyncio.to_thread(split_pdf, document, self.pages_per_request)
+        results = await asyncio.gather(*(self._analyze_batch(batch) for batch in batches))
+        pages: List[Dict[str, Any]] = []
+        for batch_pages in results:
+            for page in batch_pages:
+                pages.append(dict(page, pageNumber=len(pages) + 1))
+        return pages
+
+    async def extract_pages(self, document: bytes) -> List[str]:
+        return [page_text(page) for page in await self.analyze(document)]
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def _analyze_batch(self, document: bytes) -> List[Dict[str, Any]]:
+        async with self._slots:
+            response = await self._request(
+                "POST", f"/formrecognizer/documentModels/{self.model_id}:analyze",
+                params={"api-version": self.api_version},
+                content=document,
+                headers={"Content-Type": "application/pdf"},
+            )
+            if response.status_code != 202:
+                raise FormRecognizerError(f"Analyze request failed with {response.status_code}: {response.text[:200]}")
+            operation = response.headers.get("Operation-Location")
+            if not operation:
+                raise FormRecognizerError("Analyze response has no Operation-Location")
+            result = await self._poll(operation, _retry_after(response, self.poll_interval))
+            return result.get("pages", [])
+
+    async def _poll(self, operation: str, delay: float) -> Dict[str, Any]:
+        deadline = time.monotonic() + self.timeout
+        while True:
+            await asyncio.sleep(delay)
+            if time.monotonic() > deadline:
+                raise FormRecognizerError(f"Analysis did not finish within {self.timeout}s")
+            response = await self._request("GET", operation)
+            if response.status_code != 200:
+                raise FormRecognizerError(f"Polling failed with {response.status_code}: {response.text[:200]}")
+            body = response.json()
+            status = body.get("status")
+            if status == "succeeded":
+                return body.get("analyzeResult") or {}
+            if status == "failed":
+                error = body.get("error") or {}
+                raise FormRecognizerError(f"Analysis failed: {error.get('message', 'unknown error')}")
+            delay = _retry_after(response, self.poll_interval)
+
+    async def _request(self, method: str, url: str, **kwargs):
+        import httpx
+
+        for attempt in range(MAX_RETRIES + 1):
+            await self._limiter.acquire()
+            try:
+                response = await self._client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == MAX_RETRIES:
+                    raise FormRecognizerError(f"Request to Form Recognizer failed: {str(e)}") from e
+                await asyncio.sleep(min(2 ** attempt, 30))
+                continue
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                return response
+            delay = _retry_after(response, min(2 ** attempt, 30))
+            logger.warning(f"Form Recognizer answered {response.status_code}; retrying in {delay}s")
+            await asyncio.sleep(delay)
+
+
+class FormRecognizerBackend:
+    """
+    Runs a ``FormRecognizerClient`` on an event loop thread of its own so the threaded
+    analysis pipeline can call it. All documents share that loop and with it the client's
+    connections, rate limit and concurrency limit.
+    """
+
+    def __init__(self, client: FormRecognizerClient):
+        self.client = client
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="form-recognizer", daemon=True)
+        self._thread.start()
+
+    def extract_pages(self, source: PdfSource) -> List[str]:
+        """The text of every page of a PDF given as bytes or a file path"""
+        if isinstance(source, bytes):
+            document = source
+        else:
+            with open(source, "rb") as f:
+                document = f.read()
+        future = asyncio.run_coroutine_threadsafe(self.client.extract_pages(document), self._loop)
+        try:
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+    def close(self) -> None:
+        try:
+            asyncio.run_coroutine_threadsafe(self.client.aclose(), self._loop).result(timeout=5)
+        except Exception as e:
+            logger.warning(f"Error closing Form Recognizer client: {str(e)}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+_backend: Optional[FormRecognizerBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_form_recognizer() -> Optional[FormRecognizerBackend]:
+    """The shared backend, or None unless FORM_RECOGNIZER_ENABLED and the Azure credentials are set"""
+    global _backend
+    settings = get_settings()
+    if not settings.FORM_RECOGNIZER_ENABLED:
+        return None
+    if not settings.AZURE_FORM_RECOGNIZER_ENDPOINT or not settings.AZURE_FORM_RECOGNIZER_KEY:
+        logger.warning("FORM_RECOGNIZER_ENABLED is set without an endpoint and key; extracting locally")
+        return None
+    with _backend_lock:
+        if _backend is None:
+            _backend = FormRecognizerBackend(FormRecognizerClient(
+                settings.AZURE_FORM_RECOGNIZER_ENDPOINT,
+                settings.AZURE_FORM_RECOGNIZER_KEY,
+                model_id=settings.FORM_RECOGNIZER_MODEL,
+                api_version=settings.FORM_RECOGNIZER_API_VERSION,
+                max_connections=settings.FORM_RECOGNIZER_MAX_CONNECTIONS,
+                max_concurrent=settings.FORM_RECOGNIZER_MAX_CONCURRENT,
+                requests_per_second=settings.FORM_RECOGNIZER_REQUESTS_PER_SECOND,
+                pages_per_request=settings.FORM_RECOGNIZER_PAGES_PER_REQUEST,
+                poll_interval=settings.FORM_RECOGNIZER_POLL_INTERVAL_SECONDS,
+                timeout=settings.FORM_RECOGNIZER_TIMEOUT_SECONDS,
+            ))
+        return _backend
+
+
+def shutdown_form_recognizer() -> None:
+    global _backend
+    with _backend_lock:
+        if _backend is not None:
+            _backend.close()
+            _backend = None
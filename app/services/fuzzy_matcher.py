@@ -0,0 +1,210 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from functools import lru_cache
+import math
+import numpy as np
+from rapidfuzz import fuzz, process
+from app.core.config import settings
+
+# Character n-gram lengths the candidate filter may count, longest first; longer grams
+# are more selective but only give a usable bound at high thresholds
+GRAM_SIZES = (3, 2)
+
+
+@lru_cache(maxsize=4096)
+def shared_gram_bound(length: int, size: int, threshold: float) -> int:
+    """
+    Fewest ``size``-grams of a string of ``length`` characters that a substring of at
+    most ``length`` characters of another string must contain for their ``partial_ratio``
+    to reach ``threshold``; zero or less means no bound.
+
+    A window of ``m`` characters scores ``200 * l / (length + m)`` where ``l`` is the
+    longest common subsequence. Every character of the string outside it removes at most
+    ``size`` of its n-grams from the window and every extra window character breaks at
+    most ``size - 1``; the n-grams left intact appear in the window.
+    """
+    grams = length - size + 1
+    bound = grams
+    for m in range(1, length + 1):
+        common = math.ceil(threshold * (length + m) / 200 - 1e-9)
+        if common > m:
+            continue
+        bound = min(bound, grams - size * (length - common) - (size - 1) * (m - common))
+    return bound
+
+
+def _code_points(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+
+
+def _pack_grams(chars: np.ndarray, size: int, base: int) -> np.ndarray:
+    """
+    One integer per n-gram of characters numbered below ``base``, in order; small enough
+    alphabets give 16-bit codes, which numpy sorts in linear time
+    """
+    count = max(len(chars) - size + 1, 0)
+    dtype = np.uint16 if base ** size <= 1 << 16 else np.int64
+    chars = chars.astype(dtype)
+    codes = np.zeros(count, dtype=dtype)
+    for offset in range(size):
+        codes = codes * dtype(base) + chars[offset:offset + count]
+    return codes
+
+
+class _GramIndex:
+    """
+    The n-grams of paragraphs joined by newlines, grouped by n-gram: the positions each
+    one starts at and how often it occurs in each paragraph. Characters are numbered by
+    rank among those the text uses.
+    """
+
+    def __init__(self, chars: np.ndarray, base: int, owners: np.ndarray, paragraphs: int, size: int):
+        codes = _pack_grams(chars, size, base)
+        self.base = base
+        self.size = size
+        self.owners = owners[:len(codes)]
+        self.paragraphs = paragraphs
+        # One stable sort groups the positions by n-gram, each group in text order, so
+        # within a group the paragraphs ascend too and their counts are run lengths
+        self.positions = np.argsort(codes, kind="stable")
+        grouped = codes[self.positions]
+        owned = self.owners[self.positions]
+        first = np.ones(len(codes), dtype=bool)
+        first[1:] = grouped[1:] != grouped[:-1]
+        run = first.copy()
+        run[1:] |= owned[1:] != owned[:-1]
+        gram_starts = np.nonzero(first)[0]
+        run_starts = np.nonzero(run)[0]
+        self.codes = grouped[gram_starts]
+        self.position_ptr = np.append(gram_starts, len(codes))
+        self.entry_owners = owned[run_starts]
+        self.entry_counts = np.diff(np.append(run_starts, len(codes)))
+        self.entry_ptr = np.append((np.cumsum(run) - 1)[gram_starts], len(run_starts))
+
+    def lookup(self, chars: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The ids of a keyword's n-grams that occur in the text, and how often the keyword
+        has each; ``chars`` numbers characters the text lacks -1
+        """
+        count = len(chars) - self.size + 1
+        usable = np.ones(max(count, 0), dtype=bool)
+        for offset in range(self.size):
+            usable &= chars[offset:offset + count] >= 0
+        codes, counts = np.unique(_pack_grams(chars, self.size, self.base)[usable], return_counts=True)
+        if not len(self.codes):
+            return codes[:0], counts[:0]
+        slots = np.minimum(np.searchsorted(self.codes, codes), len(self.codes) - 1)
+        found = self.codes[slots] == codes
+        return slots[found], counts[found]
+
+    def shared(self, ids: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """How many of the keyword's n-grams each paragraph has, counted as a multiset"""
+        shared = np.zeros(self.paragraphs, dtype=np.int64)
+        for gram, count in zip(ids.tolist(), counts.tolist()):
+            start, end = self.entry_ptr[gram], self.entry_ptr[gram + 1]
+            shared[self.entry_owners[start:end]] += np.minimum(self.entry_counts[start:end], count)
+        return shared
+
+    def hits(self, ids: np.ndarray) -> np.ndarray:
+        """The ascending positions at which one of the keyword's n-grams starts"""
+        if not len(ids):
+            return np.zeros(0, dtype=np.int64)
+        hits = np.concatenate([self.positions[self.position_ptr[gram]:self.position_ptr[gram + 1]]
+                               for gram in ids.tolist()])
+        hits.sort()
+        return hits
+
+
+class FuzzyMatcher:
+    """
+    Batched ``fuzz.partial_ratio`` matching of keywords against paragraphs.
+
+    Pairs are scored in one ``process.cpdist`` call spread over the configured workers, on
+    strings lowercased once, but only the pairs a character n-gram filter leaves. A pair
+    can reach the threshold only if the paragraph, and some stretch of it as long as the
+    keyword, hold enough of the keyword's n-grams (see ``shared_gram_bound``). The filter
+    counts them for every paragraph and stretch at once from an index of the document's
+    n-grams, so a paragraph that merely shares a few letters with a keyword is never
+    scored against it. The bound never rejects a pair that would score at or above the
+    threshold, so results equal pairwise scoring.
+    """
+
+    def __init__(self, threshold: int = 80, workers: Optional[int] = None):
+        self.threshold = threshold
+        self.workers = workers if workers is not None else settings.FUZZY_MATCH_WORKERS
+
+    def match(self, keywords: Sequence[str], paragraphs: Sequence[str],
+              paragraphs_lower: Optional[Sequence[str]] = None) -> Dict[str, List[int]]:
+        """
+        Map each lowercased keyword to the ascending indices of paragraphs whose
+        ``partial_ratio`` with it is at or above the threshold.
+        """
+        keywords_lower = list(dict.fromkeys(k.lower() for k in keywords))
+        if paragraphs_lower is None:
+            paragraphs_lower = [p.lower() for p in paragraphs]
+        matches: Dict[str, List[int]] = {k: [] for k in keywords_lower}
+        if not keywords_lower or not paragraphs_lower:
+            return matches
+
+        candidates = self._candidates(keywords_lower, paragraphs_lower)
+        pairs = [(keyword, index) for keyword in keywords_lower for index in candidates[keyword].tolist()]
+        if not pairs:
+            return matches
+        scores = process.cpdist(
+            [keyword for keyword, _ in pairs],
+            [paragraphs_lower[index] for _, index in pairs],
+            scorer=fuzz.partial_ratio,
+            score_cutoff=self.threshold,
+            dtype=np.float64,
+            workers=self.workers
+        )
+        for (keyword, index), score in zip(pairs, scores.tolist()):
+            if score >= self.threshold:
+                matches[keyword].append(index)
+        return matches
+
+    def _candidates(self, keywords_lower: List[str], paragraphs_lower: Sequence[str]) -> Dict[str, np.ndarray]:
+        """For each keyword, the ascending indices of paragraphs that may reach the threshold"""
+        lengths = np.array([len(p) for p in paragraphs_lower], dtype=np.int64)
+        text = "\n".join(paragraphs_lower)
+        # The paragraph each character belongs to; a separator counts with the one before it
+        owners = np.repeat(np.arange(len(lengths)), lengths + 1)[:len(text)]
+        code_points = _code_points(text)
+        if not len(code_points):
+            return {keyword: np.zeros(0, dtype=np.int64) for keyword in keywords_lower}
+        ranks = np.full(int(code_points.max()) + 1, -1, dtype=np.int64)
+        ranks[code_points] = 0
+        used = ranks == 0
+        ranks[used] = np.arange(np.count_nonzero(used))
+        base = max(np.count_nonzero(used), 1)
+        chars = ranks[code_points]
+        indexes: Dict[int, _GramIndex] = {}
+        candidates: Dict[str, np.ndarray] = {}
+        for keyword in keywords_lower:
+            length = len(keyword)
+            size = next((size for size in GRAM_SIZES
+                         if length >= size and shared_gram_bound(length, size, self.threshold) > 0), None)
+            if size is None:
+                candidates[keyword] = np.nonzero(lengths)[0]
+                continue
+            index = indexes.get(size)
+            if index is None:
+                index = indexes[size] = _GramIndex(chars, base, owners, len(lengths), size)
+            # How many n-grams each paragraph must share, by the shorter of the two lengths
+            bounds = np.array([shared_gram_bound(n, size, self.threshold) for n in range(length + 1)])
+            required = bounds[np.minimum(lengths, length)]
+            keyword_points = _code_points(keyword)
+            known = keyword_points < len(ranks)
+            ids, counts = index.lookup(np.where(known, ranks[np.where(known, keyword_points, 0)], -1))
+            possible = (required <= 0) | (index.shared(ids, counts) >= required)
+            # A paragraph longer than the keyword must also hold them within one stretch as
+            # long as the keyword; the fullest stretches start at one of them
+            longer = possible & (required > 0) & (lengths > length)
+            if longer.any():
+                hits = index.hits(ids)
+                hits = hits[longer[index.owners[hits]]]
+                within = np.searchsorted(hits, hits + length - size + 1) - np.arange(len(hits))
+                reached = np.zeros(len(lengths), dtype=bool)
+                reached[index.owners[hits[within >= bounds[length]]]] = True
+                possible &= ~longer | reached
+            candidates[keyword] = np.nonzero(possible & (lengths > 0))[0]
+        return candidates
@@ -0,0 +1,85 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import logging
+from .clause_traceability import ClauseTracer
+from .ner_engine import NerEngine
+from .paragraph_cache import ParagraphCache, content_hash, exact_hash, get_paragraph_cache
+from .parsed_document import ParsedDocument
+
+logger = logging.getLogger(__name__)
+
+
+def component_version(*parts: Any) -> str:
+    """Short hash identifying whatever produced a cached paragraph output"""
+    return hashlib.sha256(json.dumps(parts, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+class IncrementalAnalyzer:
+    """
+    Paragraph-level reuse across revisions of a document.
+
+    Clause hits are computed per paragraph, and entities and summaries per chunk, and each
+    output is cached under the hash of the text it came from. Entities use the chunks of
+    full-document NER, so entities spanning line breaks are found the same way. Analyzing
+    a revision only runs NER, the rule engine and the summarizer on paragraphs and chunks
+    that are not cached yet, and merges everything back into whole-document results. Every
+    method also returns how many items were reused from the cache and how many were computed.
+    """
+
+    def __init__(self, registry, cache: Optional[ParagraphCache] = None):
+        self.registry = registry
+        self.cache = cache or get_paragraph_cache()
+
+    def _cached_map(self, kind: str, version: str, texts: Sequence[str],
+                    compute: Callable[[List[str]], List[Any]],
+                    digest: Callable[[str], str] = content_hash) -> Tuple[List[Any], Dict[str, int]]:
+        """Map every text to its output, computing each distinct uncached text once"""
+        digests = [digest(text) for text in texts]
+        found = self.cache.get_many(kind, version, digests)
+        missing: Dict[str, str] = {}
+        for key, text in zip(digests, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            outputs = compute(list(missing.values()))
+            computed = dict(zip(missing.keys(), outputs))
+            self.cache.set_many(kind, version, computed)
+            found.update(computed)
+        reused = sum(1 for key in digests if key not in missing)
+        return [found[key] for key in digests], {"reused": reused, "computed": len(texts) - reused}
+
+    def extract_entities(self, document: ParsedDocument) -> Tuple[List[Dict], Dict[str, int]]:
+        """Entities of the document, with offsets into it, from per-chunk NER"""
+        settings = self.registry.settings
+        version = component_version("entities", "chunks", settings.SPACY_MODEL, settings.NER_CHUNK_CHARS)
+        engine = NerEngine(self.registry.nlp)
+        pairs = list(engine.chunks(document.text))
+        offsets = [offset for offset, _ in pairs]
+        chunks = [chunk for _, chunk in pairs]
+        # Keyed by the exact chunk: entity offsets count its leading whitespace
+        per_chunk, stats = self._cached_map("entities", version, chunks, engine.extract_many, digest=exact_hash)
+        entities = []
+        for offset, chunk_entities in zip(offsets, per_chunk):
+            for entity in chunk_entities:
+                entities.append(dict(entity, start=offset + entity["start"], end=offset + entity["end"]))
+        return entities, stats
+
+    def trace_clauses(self, tracer: ClauseTracer, paragraphs: Sequence[str],
+                      offsets: Sequence[int]) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        """The clause traceability report, from per-paragraph rule engine hits"""
+        version = component_version("clauses", tracer.rules_version, tracer.matcher.threshold)
+        per_paragraph, stats = self._cached_map("clauses", version, paragraphs, tracer.engine.scan_paragraphs)
+        return tracer.build_report(tracer.engine.merge_paragraph_hits(per_paragraph, offsets)), stats
+
+    def summarize(self, document: ParsedDocument) -> Tuple[str, Dict[str, int]]:
+        """The abstractive summary, reusing cached summaries of unchanged chunks"""
+        settings = self.registry.settings
+        service = self.registry.summarization
+        version = component_version("summary", settings.SUMMARIZER_MODEL, settings.SUMMARIZER_BACKEND, service.max_tokens)
+        summaries, stats = self._cached_map("summary", version, service.chunk(document), service.summarize_chunks)
+        (summary,), _ = self._cached_map(
+            "summary_combined", version, [" ".join(summaries)],
+            lambda joined: [service.combine([joined[0]])]
+        )
+        return summary, stats
@@ -0,0 +1,135 @@
+from typing import Any, Callable, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+import logging
+import threading
+import time
+import uuid
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFullError(Exception):
+    """Raised when the analysis queue has no room for another job"""
+
+
+class Job:
+    def __init__(self, filename: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.status = "queued"
+        self.result: Optional[Any] = None
+        self.error: Optional[str] = None
+        # HTTP status a synchronous request failing the same way would have answered with
+        self.status_code: Optional[int] = None
+        self.submitted_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._finished_monotonic: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "submitted_at": self.submitted_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "result": self.result,
+            "error": self.error,
+            "status_code": self.status_code
+        }
+
+
+class JobManager:
+    """
+    Runs document analyses on a bounded pool of background worker threads.
+
+    At most ``max_workers`` jobs run at once and at most ``max_queue`` more wait for a
+    worker; further submissions are rejected with JobQueueFullError. Finished jobs are
+    kept for ``result_ttl`` seconds so clients can collect their results.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, result_ttl: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis-worker")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._active = 0
+
+    def submit(self, fn: Callable[..., Any], *args, filename: Optional[str] = None, **kwargs) -> Job:
+        """Queue ``fn(*args, **kwargs)`` and return the job tracking it"""
+        with self._lock:
+            self._prune()
+            if self._active >= self.max_workers + self.max_queue:
+                raise JobQueueFullError("Analysis queue is full, please retry later")
+            job = Job(filename)
+            self._jobs[job.id] = job
+            self._active += 1
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        logger.info(f"Queued job {job.id} for {filename}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.status == "running")
+            return {
+                "workers": self.max_workers,
+                "running": running,
+                "queued": self._active - running,
+                "queue_capacity": self.max_queue,
+                "tracked_jobs": len(self._jobs)
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _run(self, job: Job, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> None:
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        try:
+            job.result = fn(*args, **kwargs)
+            job.status = "completed"
+            logger.info(f"Job {job.id} completed")
+        except Exception as e:
+            job.error = getattr(e, "detail", None) or str(e)
+            job.status_code = getattr(e, "status_code", 500)
+            job.status = "failed"
+            logger.error(f"Job {job.id} failed: {job.error}")
+        finally:
+            job.finished_at = datetime.utcnow()
+            job._finished_monotonic = time.monotonic()
+            with self._lock:
+                self._active -= 1
+
+    def _prune(self) -> None:
+        """Drop finished jobs whose results have outlived the TTL"""
+        cutoff = time.monotonic() - self.result_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.done and job._finished_monotonic is not None and job._finished_monotonic < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+@lru_cache()
+def get_job_manager() -> JobManager:
+    settings = get_settings()
+    return JobManager(
+        max_workers=settings.ANALYSIS_WORKERS,
+        max_queue=settings.ANALYSIS_QUEUE_SIZE,
+        result_ttl=settings.JOB_RESULT_TTL_SECONDS
+    )
@@ -0,0 +1,89 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+import re
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """
+    Build a regex from a character trie of the keywords.
+    Shared prefixes are tested once, and optional continuations are greedy, so a match is
+    always the longest keyword starting at that position.
+    """
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if "" in node:
+            return "(?:" + "|".join(branches) + ")?"
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Finds every occurrence of a fixed set of keywords in a single scan of the text.
+
+    The keywords are compiled once into a trie-shaped regex, so each search reports the
+    longest keyword starting at the next matching position. Shorter keywords that start
+    at the same position are necessarily prefixes of that match and are expanded from a
+    precomputed table. The result is the same set of (position, keyword) hits an
+    Aho-Corasick automaton produces, with the scanning done inside the regex engine.
+    Matching is case-insensitive; hits are reported as lowercased keywords.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = sorted({k.lower() for k in keywords if k})
+        self._pattern = re.compile(_trie_pattern(self.keywords)) if self.keywords else None
+        # For each keyword, every keyword that is a prefix of it (itself included)
+        self._prefixes: Dict[str, Tuple[str, ...]] = {
+            keyword: tuple(k for k in self.keywords if keyword.startswith(k))
+            for keyword in self.keywords
+        }
+
+    def iter_matches(self, text_lower: str) -> Iterator[Tuple[int, str]]:
+        """Yield ``(start, keyword)`` for every keyword occurrence, overlapping ones included"""
+        if self._pattern is None:
+            return
+        search = self._pattern.search
+        match = search(text_lower)
+        while match is not None:
+            start = match.start()
+            for keyword in self._prefixes[match.group()]:
+                yield start, keyword
+            match = search(text_lower, start + 1)
+
+    def paragraph_hits(self, paragraphs: Sequence[str],
+                       paragraphs_lower: Optional[Sequence[str]] = None) -> Dict[int, Set[str]]:
+        """
+        Map paragraph index to the set of keywords it contains.
+        The paragraphs are lowercased, unless already given lowercased, and scanned as one
+        string; an offset index maps each hit back to its paragraph.
+        """
+        lowered = paragraphs_lower if paragraphs_lower is not None else [p.lower() for p in paragraphs]
+        text_lower = "\n".join(lowered)
+        # Start offset of every paragraph in the joined text
+        starts = [0]
+        starts.extend(accumulate(len(p) + 1 for p in lowered[:-1]))
+        hits: Dict[int, Set[str]] = {}
+        for start, keyword in self.iter_matches(text_lower):
+            index = bisect_right(starts, start) - 1
+            hits.setdefault(index, set()).add(keyword)
+        return hits
+
+
+@lru_cache(maxsize=16)
+def get_keyword_matcher(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    """Return the compiled matcher for a keyword set, building it once per distinct set"""
+    return KeywordMatcher(keywords)
@@ -0,0 +1,176 @@
+from typing import Any, Callable, Dict, Optional
+from functools import lru_cache
+import hashlib
+import json
+import logging
+import threading
+import time
+from app.core.config import get_settings
+from .rule_registry import RuleRegistry, get_rule_registry
+from .summarization import SummarizationService
+from .summarizer_backends import load_summarizer
+
+logger = logging.getLogger(__name__)
+
+# Bump when analysis output changes for the same document and rules
+ANALYSIS_VERSION = "5"
+
+WARMUP_TEXT = (
+    "All personnel entering the process area must wear the required personal protective equipment. "
+    "Emergency response procedures are reviewed every six months and evacuation drills are recorded. "
+    "Supervisors shall ensure that safety training records are kept up to date for every contractor. "
+    "Incident reports, including near misses, are investigated within forty-eight hours of occurrence."
+)
+
+
+class ModelRegistry:
+    """
+    Process-wide holder for the spaCy model, the summarization pipeline and its batching
+    service, and the rule registry.
+
+    Every resource is loaded at most once, guarded by a lock, and shared by all requests.
+    """
+
+    def __init__(self, settings=None):
+        self.settings = settings or get_settings()
+        # Reentrant: a loader may fetch the resources it is built on
+        self._lock = threading.RLock()
+        self._resources: Dict[str, Any] = {}
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._analysis_versions: Dict[str, str] = {}
+        self._loaders: Dict[str, Callable[[], Any]] = {
+            "spacy": self._load_spacy,
+            "summarizer": self._load_summarizer,
+            "summarization": lambda: SummarizationService(self.get("summarizer")),
+            "rules": get_rule_registry,
+        }
+        self._warmers: Dict[str, Callable[[Any], None]] = {
+            "spacy": self._warm_spacy,
+            "summarizer": self._warm_summarizer,
+            "rules": lambda rules: rules.current.engine.scan(WARMUP_TEXT),
+        }
+
+    @property
+    def nlp(self):
+        return self.get("spacy")
+
+    @property
+    def summarizer(self):
+        return self.get("summarizer")
+
+    @property
+    def summarization(self) -> SummarizationService:
+        return self.get("summarization")
+
+    @property
+    def rules(self) -> RuleRegistry:
+        return self.get("rules")
+
+    @property
+    def analysis_version(self) -> str:
+        """Hash of the models and the current rule set version that determine analysis output"""
+        rules_version = self.rules.version
+        version = self._analysis_versions.get(rules_version)
+        if version is None:
+            payload = json.dumps({
+                "analysis": ANALYSIS_VERSION,
+                "spacy": self.settings.SPACY_MODEL,
+                "summarizer": self.settings.SUMMARIZER_MODEL,
+                "summarizer_backend": self.settings.SUMMARIZER_BACKEND,
+                "incremental": self.settings.INCREMENTAL_ANALYSIS_ENABLED,
+                "ocr": [self.settings.OCR_BACKEND, self.settings.OCR_LANGUAGE, self.settings.OCR_DPI],
+                "form_recognizer": self.settings.FORM_RECOGNIZER_MODEL if self.settings.FORM_RECOGNIZER_ENABLED else None,
+                "rules": rules_version,
+            }, sort_keys=True)
+            version = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+            self._analysis_versions[rules_version] = version
+        return version
+
+    def get(self, name: str) -> Any:
+        """Return a loaded resource, loading it on first use"""
+        resource = self._resources.get(name)
+        if resource is not None:
+            return resource
+        with self._lock:
+            if name not in self._resources:
+                self._load(name)
+            return self._resources[name]
+
+    def peek(self, name: str) -> Optional[Any]:
+        """Return a resource if it is already loaded, without loading it"""
+        return self._resources.get(name)
+
+    def preload(self, warmup: bool = True) -> None:
+        """Load every resource and optionally run a dummy inference through each one"""
+        for name in self._loaders:
+            try:
+                resource = self.get(name)
+                if warmup and name in self._warmers:
+                    self._warm(name, resource)
+            except Exception as e:
+                logger.error(f"Error preloading {name}: {str(e)}")
+
+    @property
+    def ready(self) -> bool:
+        return all(name in self._resources for name in self._loaders)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Report which resources are loaded and how long loading and warmup took"""
+        report = {}
+        for name in self._loaders:
+            entry = self._status.get(name, {})
+            report[name] = {
+                "loaded": name in self._resources,
+                "load_seconds": entry.get("load_seconds"),
+                "warmup_seconds": entry.get("warmup_seconds"),
+                "error": entry.get("error"),
+            }
+        return report
+
+    def _load(self, name: str) -> None:
+        logger.info(f"Loading {name}")
+        started = time.perf_counter()
+        try:
+            self._resources[name] = self._loaders[name]()
+        except Exception as e:
+            self._status[name] = {"error": str(e)}
+            raise
+        elapsed = time.perf_counter() - started
+        self._status[name] = {"load_seconds": round(elapsed, 3)}
+        logger.info(f"Loaded {name} in {elapsed:.2f}s")
+
+    def _warm(self, name: str, resource: Any) -> None:
+        started = time.perf_counter()
+        try:
+            self._warmers[name](resource)
+        except Exception as e:
+            logger.warning(f"Warmup of {name} failed: {str(e)}")
+            self._status[name]["error"] = f"warmup failed: {str(e)}"
+            return
+        self._status[name]["warmup_seconds"] = round(time.perf_counter() - started, 3)
+
+    def _load_spacy(self):
+        # Heavy imports stay out of module import so the API starts without them
+        import spacy
+
+        model = self.settings.SPACY_MODEL
+        try:
+            return spacy.load(model)
+        except OSError:
+            # If model is not downloaded, download it
+            spacy.cli.download(model)
+            return spacy.load(model)
+
+    def _load_summarizer(self):
+        return load_summarizer(self.settings)
+
+    def _warm_spacy(self, nlp) -> None:
+        nlp(WARMUP_TEXT)
+
+    def _warm_summarizer(self, summarizer) -> None:
+        summarizer(WARMUP_TEXT, max_length=20, min_length=5, do_sample=False)
+
+
+@lru_cache()
+def get_model_registry() -> ModelRegistry:
+    return ModelRegistry()
@@ -0,0 +1,91 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
+import re
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Components an entity recognizer may depend on for its token vectors
+SHARED_EMBEDDINGS = ("tok2vec", "transformer")
+
+_WHITESPACE = re.compile(r"\s")
+
+
+class NerEngine:
+    """
+    Named entity recognition over paragraph-aligned chunks of a document.
+
+    The text is split at line breaks into chunks of at most ``chunk_chars`` characters and
+    run through ``nlp.pipe`` with every component except NER disabled. A shared
+    ``tok2vec`` or ``transformer`` stays enabled only when the NER component listens to
+    it. Entity offsets are mapped back onto the original text.
+    """
+
+    def __init__(self, nlp, batch_size: Optional[int] = None, n_process: Optional[int] = None,
+                 chunk_chars: Optional[int] = None):
+        self.nlp = nlp
+        self.batch_size = batch_size or settings.NER_BATCH_SIZE
+        self.n_process = n_process or settings.NER_N_PROCESS
+        self.chunk_chars = min(chunk_chars or settings.NER_CHUNK_CHARS, nlp.max_length)
+        self.disabled = self._disabled_pipes(nlp)
+
+    @staticmethod
+    def _disabled_pipes(nlp) -> List[str]:
+        if "ner" not in nlp.pipe_names:
+            logger.warning("spaCy pipeline has no ner component; running it unchanged")
+            return []
+        keep = {"ner"}
+        for name, component in nlp.pipeline:
+            if name in SHARED_EMBEDDINGS and "ner" in getattr(component, "listening_components", []):
+                keep.add(name)
+        return [name for name in nlp.pipe_names if name not in keep]
+
+    def chunks(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Yield ``(offset, chunk)`` pairs covering the text, split at line breaks"""
+        start = 0
+        length = len(text)
+        while start < length:
+            end = min(start + self.chunk_chars, length)
+            if end < length:
+                # Prefer the last line break in the window, then the last whitespace
+                cut = text.rfind('\n', start, end)
+                if cut <= start:
+                    match = None
+                    for match in _WHITESPACE.finditer(text, start + 1, end):
+                        pass
+                    cut = match.start() if match else end
+                end = cut + 1 if cut < end else end
+            chunk = text[start:end]
+            if chunk.strip():
+                yield start, chunk
+            start = end
+
+    def extract(self, text: str) -> List[Dict]:
+        """Return the entities in the text with ``start``/``end`` offsets into it"""
+        return self.extract_many([text])[0]
+
+    def extract_many(self, texts: List[str]) -> List[List[Dict]]:
+        """
+        Return the entities of each text, with offsets into that text. All chunks of all
+        texts share the same ``nlp.pipe`` batches.
+        """
+        owners = []
+
+        def chunks() -> Iterator[str]:
+            for index, text in enumerate(texts):
+                for offset, chunk in self.chunks(text):
+                    owners.append((index, offset))
+                    yield chunk
+
+        entities: List[List[Dict]] = [[] for _ in texts]
+        docs = self.nlp.pipe(chunks(), batch_size=self.batch_size, n_process=self.n_process, disable=self.disabled)
+        for position, doc in enumerate(docs):
+            index, offset = owners[position]
+            for ent in doc.ents:
+                entities[index].append({
+                    "text": ent.text,
+                    "label": ent.label_,
+                    "start": offset + ent.start_char,
+                    "end": offset + ent.end_char
+                })
+        return entities
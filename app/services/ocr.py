@@ -0,0 +1,193 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from functools import lru_cache
+import abc
+import hashlib
+import logging
+import zlib
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class OcrBackend(abc.ABC):
+    """
+    Recognizes the text of a rendered page image.
+
+    Backends run inside the PDF extraction worker processes, so instances must be
+    picklable and should import their engine lazily. ``version`` names everything that
+    changes the output; OCR results are cached under it.
+    """
+
+    name = "base"
+
+    def __init__(self, dpi: int = 300):
+        self.dpi = dpi
+
+    @property
+    def version(self) -> str:
+        return f"{self.name}:{self.dpi}"
+
+    @abc.abstractmethod
+    def recognize(self, pixmap) -> str:
+        """The text of a PyMuPDF pixmap of one page"""
+
+
+class TesseractBackend(OcrBackend):
+    """Tesseract through PyMuPDF, which needs the tesseract language data installed"""
+
+    name = "tesseract"
+
+    def __init__(self, language: str = "eng", dpi: int = 300, tessdata: Optional[str] = None):
+        super().__init__(dpi)
+        self.language = language
+        self.tessdata = tessdata
+
+    @property
+    def version(self) -> str:
+        return f"{self.name}:{self.language}:{self.dpi}"
+
+    def recognize(self, pixmap) -> str:
+        import fitz  # PyMuPDF
+
+        ocr_pdf = pixmap.pdfocr_tobytes(compress=False, language=self.language, tessdata=self.tessdata)
+        with fitz.open(stream=ocr_pdf, filetype="pdf") as doc:
+            return doc[0].get_text()
+
+
+def _load_tesseract(settings) -> OcrBackend:
+    return TesseractBackend(language=settings.OCR_LANGUAGE, dpi=settings.OCR_DPI, tessdata=settings.OCR_TESSDATA)
+
+
+OCR_BACKENDS: Dict[str, Callable] = {
+    "tesseract": _load_tesseract,
+    "none": lambda settings: None,
+}
+
+
+def load_ocr_backend(settings, backend: str = None) -> Optional[OcrBackend]:
+    """Build the configured OCR backend; ``none`` disables OCR"""
+    backend = backend or settings.OCR_BACKEND
+    if backend not in OCR_BACKENDS:
+        raise ValueError(f"Unknown OCR backend {backend!r}; expected one of {', '.join(OCR_BACKENDS)}")
+    return OCR_BACKENDS[backend](settings)
+
+
+def needs_ocr(page, text: str) -> bool:
+    """A page needs OCR when it has no text layer but shows at least one image"""
+    return not text.strip() and bool(page.get_images())
+
+
+def render_page(page, backend: OcrBackend):
+    import fitz  # PyMuPDF
+
+    return page.get_pixmap(dpi=backend.dpi, colorspace=fitz.csGRAY, alpha=False)
+
+
+def image_digest(pixmap) -> str:
+    """SHA-256 of a rendered page, so identical scans share one OCR result"""
+    digest = hashlib.sha256(f"{pixmap.width}x{pixmap.height}:".encode("ascii"))
+    digest.update(pixmap.samples_mv)
+    return digest.hexdigest()
+
+
+def pack_image(pixmap) -> Tuple[int, int, bytes]:
+    """A rendering as its size and compressed samples, cheap to send to another process"""
+    return pixmap.width, pixmap.height, zlib.compress(pixmap.samples_mv, 1)
+
+
+def unpack_image(packed: Tuple[int, int, bytes], dpi: int):
+    import fitz  # PyMuPDF
+
+    width, height, samples = packed
+    pixmap = fitz.Pixmap(fitz.csGRAY, width, height, zlib.decompress(samples), False)
+    pixmap.set_dpi(dpi, dpi)
+    return pixmap
+
+
+def recognize_image(image, backend: OcrBackend) -> str:
+    """Run OCR on a page from ``render_page``, given as the pixmap or as ``pack_image`` packed it"""
+    if isinstance(image, tuple):
+        image = unpack_image(image, backend.dpi)
+    return backend.recognize(image)
+
+
+class PageOcr:
+    """
+    OCR of the pages a PDF's text layer left empty, cached by page image hash.
+
+    Text extraction renders each such page once and reports it with the digest of the
+    rendering. Digests already in the cache are answered from it; the renderings of the
+    others are handed to ``submit``, usually the PDF extraction process pool, so pages are
+    recognized in parallel. Results are stored in the paragraph cache as kind ``ocr``.
+    """
+
+    def __init__(self, backend: OcrBackend, cache=None):
+        self.backend = backend
+        self.cache = cache
+
+    def lookup(self, digests: Iterable[str]) -> Dict[str, str]:
+        if self.cache is None:
+            return {}
+        return self.cache.get_many("ocr", self.backend.version, digests)
+
+    def store(self, digest: str, text: str) -> None:
+        if self.cache is not None:
+            self.cache.set_many("ocr", self.backend.version, {digest: text})
+
+    def resolve(self, pages: List[Tuple[str, Optional[str], Any]], submit: Callable[[Any], object],
+                submitted: Optional[Dict[str, object]] = None) -> List[object]:
+        """
+        Turn extracted ``(text, digest, image)`` triples into page texts, or into futures
+        from ``submit(image)`` for pages that must be read. Passing one ``submitted`` dict
+        for every batch of a document reads a scan repeated across batches only once.
+        """
+        cached = self.lookup([digest for _, digest, _ in pages if digest is not None])
+        submitted = {} if submitted is None else submitted
+        items: List[object] = []
+        for text, digest, image in pages:
+            if digest is None:
+                items.append(text)
+            elif digest in cached:
+                items.append(cached[digest])
+            else:
+                # Repeated scans, such as a stamped form on every page, are read once
+                if digest not in submitted:
+                    submitted[digest] = submit(image)
+                items.append((digest, submitted[digest]))
+        return items
+
+    def result(self, item) -> str:
+        """Wait for one item of ``resolve``, caching OCR results as they arrive"""
+        if isinstance(item, str):
+            return item
+        digest, future = item
+        try:
+            text = future.result()
+        except Exception as e:
+            logger.warning(f"OCR of a scanned page failed: {str(e)}")
+            return ""
+        self.store(digest, text)
+        return text
+
+
+@lru_cache()
+def get_page_ocr() -> Optional[PageOcr]:
+    settings = get_settings()
+    try:
+        backend = load_ocr_backend(settings)
+    except Exception as e:
+        logger.error(f"Error loading OCR backend: {str(e)}; scanned pages will not be read")
+        return None
+    if backend is None:
+        return None
+    if not settings.OCR_CACHE_ENABLED:
+        return PageOcr(backend)
+    # Imported here: extraction workers import this module to run the backend
+    from .paragraph_cache import get_paragraph_cache
+
+    cache = None
+    try:
+        cache = get_paragraph_cache()
+    except Exception as e:
+        logger.warning(f"OCR cache unavailable: {str(e)}")
+    return PageOcr(backend, cache)
@@ -0,0 +1,146 @@
+from typing import Any, Dict, Iterable, List, Optional
+from datetime import datetime
+from functools import lru_cache
+import hashlib
+import json
+import logging
+import time
+from sqlalchemy import Column, DateTime, Float, Integer, String, Table, Text, delete, func, insert, select, update
+from app.core.config import get_settings
+from app.core.database import get_engine, metadata, write_transaction
+from app.core.metrics import CACHE_LOOKUPS
+from .cache_usage import add_usage, init_usage
+
+logger = logging.getLogger(__name__)
+
+paragraph_results = Table(
+    "paragraph_results",
+    metadata,
+    Column("cache_key", String(160), primary_key=True),
+    Column("kind", String(32), nullable=False),
+    Column("result", Text, nullable=False),
+    Column("size_bytes", Integer, nullable=False),
+    Column("created_at", DateTime, nullable=False, default=datetime.utcnow),
+    Column("last_accessed", Float, nullable=False, index=True),
+)
+
+# Keys per IN clause; stays well below SQLite's bound parameter limit
+LOOKUP_BATCH = 500
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 of a paragraph or chunk, ignoring surrounding whitespace"""
+    return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()
+
+
+def exact_hash(text: str) -> str:
+    """SHA-256 of a text as is, for outputs whose offsets depend on its surrounding whitespace"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ParagraphCache:
+    """
+    Per-paragraph analysis outputs stored in DATABASE_URL, keyed by kind (entities, clause
+    hits, chunk summaries), the version of whatever produced them and the content hash.
+
+    When the stored outputs exceed ``max_bytes`` the least recently used entries are evicted.
+    Their total size is kept in ``cache_usage``, updated in the transaction that writes them.
+    """
+
+    def __init__(self, engine=None, max_bytes: Optional[int] = None):
+        self.engine = engine or get_engine()
+        self.max_bytes = max_bytes if max_bytes is not None else get_settings().PARAGRAPH_CACHE_MAX_BYTES
+        paragraph_results.create(self.engine, checkfirst=True)
+        init_usage(self.engine, "paragraph", paragraph_results.c.size_bytes)
+
+    @staticmethod
+    def make_key(kind: str, version: str, digest: str) -> str:
+        return f"{kind}:{version}:{digest}"
+
+    def get_many(self, kind: str, version: str, digests: Iterable[str]) -> Dict[str, Any]:
+        """Return the stored outputs found for the given hashes, keyed by hash"""
+        keys = {self.make_key(kind, version, digest): digest for digest in set(digests)}
+        found: Dict[str, Any] = {}
+        if not keys:
+            return found
+        try:
+            key_list = list(keys)
+            with self.engine.begin() as conn:
+                for start in range(0, len(key_list), LOOKUP_BATCH):
+                    batch = key_list[start:start + LOOKUP_BATCH]
+                    rows = conn.execute(
+                        select(paragraph_results.c.cache_key, paragraph_results.c.result)
+                        .where(paragraph_results.c.cache_key.in_(batch))
+                    ).all()
+                    for row in rows:
+                        found[keys[row.cache_key]] = json.loads(row.result)
+                    if rows:
+                        conn.execute(
+                            update(paragraph_results)
+                            .where(paragraph_results.c.cache_key.in_([row.cache_key for row in rows]))
+                            .values(last_accessed=time.time())
+                        )
+        except Exception as e:
+            logger.warning(f"Error reading paragraph cache: {str(e)}")
+        CACHE_LOOKUPS.inc(len(found), cache=f"paragraph_{kind}", outcome="hit")
+        CACHE_LOOKUPS.inc(len(keys) - len(found), cache=f"paragraph_{kind}", outcome="miss")
+        return found
+
+    def set_many(self, kind: str, version: str, values: Dict[str, Any]) -> None:
+        """Store outputs keyed by hash, replacing existing entries"""
+        if not values:
+            return
+        now = time.time()
+        rows: List[Dict[str, Any]] = []
+        for digest, value in values.items():
+            payload = json.dumps(value, default=str)
+            rows.append({
+                "cache_key": self.make_key(kind, version, digest),
+                "kind": kind,
+                "result": payload,
+                "size_bytes": len(payload),
+                "created_at": datetime.utcnow(),
+                "last_accessed": now
+            })
+        try:
+            with write_transaction(self.engine) as conn:
+                keys = [row["cache_key"] for row in rows]
+                delta = sum(row["size_bytes"] for row in rows)
+                for start in range(0, len(keys), LOOKUP_BATCH):
+                    batch = paragraph_results.c.cache_key.in_(keys[start:start + LOOKUP_BATCH])
+                    delta -= conn.execute(
+                        select(func.coalesce(func.sum(paragraph_results.c.size_bytes), 0)).where(batch)
+                    ).scalar()
+                    conn.execute(delete(paragraph_results).where(batch))
+                conn.execute(insert(paragraph_results), rows)
+                self._evict(conn, add_usage(conn, "paragraph", delta))
+        except Exception as e:
+            logger.warning(f"Error writing paragraph cache: {str(e)}")
+
+    def _evict(self, conn, total: int) -> None:
+        """Delete the least recently used outputs until the ``total`` bytes stored fit in ``max_bytes``"""
+        evicted, freed = 0, 0
+        while total - freed > self.max_bytes:
+            rows = conn.execute(
+                select(paragraph_results.c.cache_key, paragraph_results.c.size_bytes)
+                .order_by(paragraph_results.c.last_accessed)
+                .limit(LOOKUP_BATCH)
+            ).all()
+            if not rows:
+                break
+            keys = []
+            for row in rows:
+                if total - freed <= self.max_bytes:
+                    break
+                keys.append(row.cache_key)
+                freed += row.size_bytes
+            conn.execute(delete(paragraph_results).where(paragraph_results.c.cache_key.in_(keys)))
+            evicted += len(keys)
+        if evicted:
+            add_usage(conn, "paragraph", -freed)
+            logger.info(f"Evicted {evicted} cached paragraph results")
+
+
+@lru_cache()
+def get_paragraph_cache() -> ParagraphCache:
+    return ParagraphCache()
@@ -0,0 +1,84 @@
+from typing import Iterable, List, Optional, Tuple, Union
+from array import array
+from bisect import bisect_right
+
+
+def split_paragraphs(text: str) -> Tuple[List[str], List[int]]:
+    """Split text into stripped, non-empty lines and the offset of each one in the text"""
+    paragraphs = []
+    offsets = []
+    position = 0
+    for line in text.split('\n'):
+        stripped = line.strip()
+        if stripped:
+            paragraphs.append(stripped)
+            offsets.append(position + len(line) - len(line.lstrip()))
+        position += len(line) + 1
+    return paragraphs, offsets
+
+
+class ParsedDocument:
+    """
+    A document's text split once into the views every analyzer works from.
+
+    ``paragraphs`` are the stripped, non-empty lines of ``text`` and ``lowered`` their
+    lowercase forms, sharing the original string where it already is lowercase.
+    ``offsets`` holds where each paragraph starts in ``text`` and ``token_counts`` how many
+    whitespace-separated words it has; both are compact integer arrays. ``page_offsets``
+    is where each page starts, when the text was extracted page by page. Instances are
+    immutable, so one can be handed to analyzers running in parallel.
+    """
+
+    __slots__ = ("text", "paragraphs", "lowered", "offsets", "token_counts", "word_count", "page_offsets")
+
+    def __init__(self, text: str, page_offsets: Optional[Iterable[int]] = None):
+        paragraphs, offsets = split_paragraphs(text)
+        lowered = []
+        for paragraph in paragraphs:
+            lower = paragraph.lower()
+            lowered.append(paragraph if lower == paragraph else lower)
+        token_counts = array("I", (len(paragraph.split()) for paragraph in paragraphs))
+        set_slot = object.__setattr__
+        set_slot(self, "text", text)
+        set_slot(self, "paragraphs", tuple(paragraphs))
+        set_slot(self, "lowered", tuple(lowered))
+        set_slot(self, "offsets", array("q", offsets))
+        set_slot(self, "token_counts", token_counts)
+        set_slot(self, "word_count", sum(token_counts))
+        set_slot(self, "page_offsets", None if page_offsets is None else array("q", page_offsets))
+
+    @classmethod
+    def from_pages(cls, pages: Iterable[str]) -> "ParsedDocument":
+        """Join page texts with newlines, as PDF extraction does, remembering where each page starts"""
+        texts = []
+        page_offsets = []
+        position = 0
+        for page in pages:
+            page_offsets.append(position)
+            texts.append(page)
+            position += len(page) + 1
+        return cls("\n".join(texts), page_offsets)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __len__(self) -> int:
+        return len(self.paragraphs)
+
+    @property
+    def page_count(self) -> Optional[int]:
+        return None if self.page_offsets is None else len(self.page_offsets)
+
+    def page_at(self, offset: int) -> Optional[int]:
+        """The 1-based page a character offset falls on, or None if pages are unknown"""
+        if not self.page_offsets:
+            return None
+        return max(bisect_right(self.page_offsets, offset), 1)
+
+
+def parse_text(source: Union[str, ParsedDocument]) -> ParsedDocument:
+    """Return ``source`` if it is already parsed, otherwise parse it"""
+    return source if isinstance(source, ParsedDocument) else ParsedDocument(source)
@@ -0,0 +1,197 @@
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple, Union
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import multiprocessing
+import os
+import threading
+from app.core.config import settings
+from .ocr import OcrBackend, PageOcr, image_digest, needs_ocr, pack_image, recognize_image, render_page
+
+logger = logging.getLogger(__name__)
+
+# A PDF is passed to workers as a file path or as the raw bytes of an in-memory upload
+PdfSource = Union[str, bytes]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _open(source: PdfSource):
+    # Imported here so the API process only loads PyMuPDF once it reads a PDF
+    import fitz  # PyMuPDF
+
+    if isinstance(source, bytes):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+def _read_page(page, backend: Optional[OcrBackend], pack: bool) -> Tuple[str, Optional[str], Any]:
+    """
+    A page's text and, when it has no text layer to read, the digest of its rendering and
+    the rendering itself, packed if OCR will run in another process, so it is rendered once
+    """
+    text = page.get_text()
+    if backend is not None and needs_ocr(page, text):
+        pixmap = render_page(page, backend)
+        return text, image_digest(pixmap), pack_image(pixmap) if pack else pixmap
+    return text, None, None
+
+
+def _extract_page_range(source: PdfSource, start: int, stop: int,
+                        backend: Optional[OcrBackend] = None) -> List[Tuple[str, Optional[str], Any]]:
+    """Worker entry point: open the document independently and extract a range of pages"""
+    with _open(source) as doc:
+        return [_read_page(doc[number], backend, pack=True) for number in range(start, stop)]
+
+
+def _is_finished(item) -> bool:
+    """Whether an item of ``PageOcr.resolve`` can be read without waiting"""
+    return not isinstance(item, tuple) or item[1].done()
+
+
+def _cancel(items) -> None:
+    for item in items:
+        if isinstance(item, tuple):
+            item[1].cancel()
+
+
+def _run_now(fn, *args) -> Future:
+    future: Future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def resolve_workers(workers: Optional[int] = None) -> int:
+    workers = workers if workers is not None else settings.PDF_EXTRACTION_WORKERS
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned workers import only this module, not the ML stack of the parent
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def page_count(source: PdfSource) -> int:
+    with _open(source) as doc:
+        return doc.page_count
+
+
+def iter_pdf_pages(source: PdfSource, workers: Optional[int] = None,
+                   ocr: Optional[PageOcr] = None) -> Iterator[str]:
+    """
+    Yield the text of each page in order, as soon as it is available.
+
+    Documents with at least PDF_PARALLEL_MIN_PAGES pages are split into ranges of
+    PDF_PAGES_PER_TASK pages that are extracted across a process pool, each worker opening
+    the document itself. Only a bounded number of ranges is in flight at a time, so the
+    pages of a large document are never all held in memory before being consumed.
+
+    With ``ocr``, pages that have no text layer are read by its backend instead, one
+    pool task per page, unless their rendering is already in the OCR cache. A page is
+    rendered once, where its text is extracted, and that rendering is both hashed and
+    recognized. Pages are still yielded in order as soon as they are ready, on both paths.
+    """
+    workers = resolve_workers(workers)
+    count = page_count(source)
+    backend = ocr.backend if ocr is not None else None
+    if workers <= 1 or count < settings.PDF_PARALLEL_MIN_PAGES:
+        with _open(source) as doc:
+            if ocr is None:
+                for page in doc:
+                    yield page.get_text()
+                return
+            if workers > 1:
+                def submit(image) -> Future:
+                    return _get_pool(workers).submit(recognize_image, image, backend)
+            else:
+                def submit(image) -> Future:
+                    return _run_now(recognize_image, image, backend)
+            submitted: Dict[str, Future] = {}
+            waiting: Deque = deque()
+            try:
+                # Yield each page once it and every page before it are read, while scanned
+                # pages further on are still being recognized in the pool
+                for page in doc:
+                    waiting.extend(ocr.resolve([_read_page(page, backend, pack=workers > 1)], submit, submitted))
+                    while waiting and _is_finished(waiting[0]):
+                        yield ocr.result(waiting.popleft())
+                while waiting:
+                    yield ocr.result(waiting.popleft())
+            finally:
+                _cancel(waiting)
+        return
+
+    pool = _get_pool(workers)
+    size = max(1, settings.PDF_PAGES_PER_TASK)
+    ranges = iter([(start, min(start + size, count)) for start in range(0, count, size)])
+    pending: Deque[Tuple[int, Future]] = deque()
+    # Extracted ranges waiting to be consumed; OCR of their pages is already under way
+    ready: Deque[List] = deque()
+
+    def submit_range() -> None:
+        page_range = next(ranges, None)
+        if page_range is not None:
+            pending.append((page_range[0], pool.submit(_extract_page_range, source, *page_range, backend)))
+
+    def submit_ocr(image) -> Future:
+        return pool.submit(recognize_image, image, backend)
+
+    submitted: Dict[str, Future] = {}
+
+    def take_finished() -> None:
+        # Take in every range that is done, not just the next one, so scanned pages
+        # further on are recognized while earlier ones are still being waited for
+        while pending and len(ready) < workers * 2 and (not ready or pending[0][1].done()):
+            _, future = pending.popleft()
+            pages = future.result()
+            submit_range()
+            ready.append(ocr.resolve(pages, submit_ocr, submitted) if ocr is not None
+                         else [text for text, _, _ in pages])
+
+    try:
+        for _ in range(workers * 2):
+            submit_range()
+        while pending or ready:
+            take_finished()
+            for item in ready[0]:
+                if ocr is None:
+                    yield item
+                    continue
+                if isinstance(item, tuple):
+                    while not item[1].done() and pending and len(ready) < workers * 2:
+                        wait([item[1], pending[0][1]], return_when=FIRST_COMPLETED)
+                        take_finished()
+                yield ocr.result(item)
+            ready.popleft()
+    except BrokenProcessPool:
+        logger.error("PDF extraction pool broke; it will be recreated on the next document")
+        shutdown_pool()
+        raise
+    finally:
+        # The consumer may stop early; drop work nobody will read
+        for _, future in pending:
+            future.cancel()
+        for items in ready:
+            _cancel(items)
+
+
+def extract_pdf_text(source: PdfSource, workers: Optional[int] = None, ocr: Optional[PageOcr] = None) -> str:
+    """Extract the text of every page, joined with newlines"""
+    return "\n".join(iter_pdf_pages(source, workers, ocr))
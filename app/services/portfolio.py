@@ -0,0 +1,214 @@
+from typing import Any, Dict, List, Optional
+from functools import lru_cache
+import logging
+from sqlalchemy import Column, Integer, String, Table, delete, desc, func, insert, select, update
+from app.core.database import get_engine, metadata, upsert_insert
+
+logger = logging.getLogger(__name__)
+
+# Aggregates keep documents without a site under this key; primary key columns cannot be NULL
+NO_SITE = ""
+
+RISK_LEVELS = ["High", "Medium", "Low", "Unknown"]
+SEVERITIES = ["high", "medium", "low"]
+
+portfolio_risk = Table(
+    "portfolio_risk",
+    metadata,
+    Column("site", String(255), primary_key=True),
+    Column("risk_level", String(16), primary_key=True),
+    Column("documents", Integer, nullable=False, default=0),
+)
+
+portfolio_clauses = Table(
+    "portfolio_clauses",
+    metadata,
+    Column("site", String(255), primary_key=True),
+    Column("clause_id", String(128), primary_key=True),
+    Column("category", String(64), nullable=True),
+    Column("severity", String(16), nullable=True),
+    Column("found", Integer, nullable=False, default=0),
+    Column("missing", Integer, nullable=False, default=0),
+)
+
+
+def _increment(conn, table: Table, keys: Dict[str, Any], deltas: Dict[str, int],
+               extra: Optional[Dict[str, Any]] = None) -> None:
+    extra = extra or {}
+    upsert = upsert_insert(conn)
+    if upsert is not None:
+        # One atomic statement, so concurrent transactions cannot both find no row and insert
+        conn.execute(
+            upsert(table)
+            .values(**keys, **{name: max(delta, 0) for name, delta in deltas.items()}, **extra)
+            .on_conflict_do_update(
+                index_elements=list(keys),
+                set_={**{name: table.c[name] + delta for name, delta in deltas.items()}, **extra}
+            )
+        )
+        return
+    condition = [table.c[name] == value for name, value in keys.items()]
+    result = conn.execute(
+        update(table).where(*condition).values(
+            **{name: table.c[name] + delta for name, delta in deltas.items()}, **extra
+        )
+    )
+    if result.rowcount == 0:
+        conn.execute(insert(table).values(**keys, **{name: max(delta, 0) for name, delta in deltas.items()}, **extra))
+
+
+def apply_document(conn, site: Optional[str], risk_level: Optional[str],
+                   clauses: List[Dict[str, Any]], sign: int = 1) -> None:
+    """
+    Add (``sign=1``) or remove (``sign=-1``) one document's contribution to the aggregates,
+    inside the caller's transaction
+    """
+    site = site or NO_SITE
+    _increment(conn, portfolio_risk, {"site": site, "risk_level": risk_level or "Unknown"}, {"documents": sign})
+    for clause in clauses:
+        found = clause["status"] == "Found"
+        _increment(
+            conn, portfolio_clauses,
+            {"site": site, "clause_id": clause["clause_id"]},
+            {"found": sign if found else 0, "missing": 0 if found else sign},
+            {"category": clause.get("category"), "severity": clause.get("severity")}
+        )
+
+
+class PortfolioAggregates:
+    """
+    Compliance aggregates across every stored document, maintained incrementally by
+    ``DocumentStore.save``. Reading them costs the same however many documents exist:
+    one row per site and risk level, and one per site and clause.
+    """
+
+    def __init__(self, engine=None):
+        self.engine = engine or get_engine()
+        metadata.create_all(self.engine, tables=[portfolio_risk, portfolio_clauses])
+
+    def summary(self, site: Optional[str] = None, recent: int = 5) -> Dict[str, Any]:
+        """Risk distribution, missing clauses by severity and coverage per category and site"""
+        with self.engine.connect() as conn:
+            risk_query = select(portfolio_risk)
+            clause_query = select(portfolio_clauses)
+            if site is not None:
+                risk_query = risk_query.where(portfolio_risk.c.site == site)
+                clause_query = clause_query.where(portfolio_clauses.c.site == site)
+            risk_rows = conn.execute(risk_query).mappings().all()
+            clause_rows = conn.execute(clause_query).mappings().all()
+            recent_rows = self._recent(conn, site, recent)
+
+        risk_distribution = {level: 0 for level in RISK_LEVELS}
+        sites: Dict[str, Dict[str, Any]] = {}
+        for row in risk_rows:
+            # Rows emptied by re-analysis are kept; they simply contribute nothing
+            if not row["documents"]:
+                continue
+            risk_distribution[row["risk_level"]] = risk_distribution.get(row["risk_level"], 0) + row["documents"]
+            entry = sites.setdefault(row["site"], {"documents": 0, "risk_distribution": {}, "found": 0, "missing": 0})
+            entry["documents"] += row["documents"]
+            entry["risk_distribution"][row["risk_level"]] = row["documents"]
+
+        missing_by_severity = {severity: 0 for severity in SEVERITIES}
+        categories: Dict[str, Dict[str, Any]] = {}
+        clauses: Dict[str, Dict[str, Any]] = {}
+        for row in clause_rows:
+            if not row["found"] and not row["missing"]:
+                continue
+            severity = row["severity"] or "medium"
+            missing_by_severity[severity] = missing_by_severity.get(severity, 0) + row["missing"]
+            category = categories.setdefault(row["category"] or "uncategorized", {"found": 0, "missing": 0})
+            category["found"] += row["found"]
+            category["missing"] += row["missing"]
+            clause = clauses.setdefault(row["clause_id"], {
+                "clause_id": row["clause_id"], "category": row["category"], "severity": row["severity"],
+                "found": 0, "missing": 0
+            })
+            clause["found"] += row["found"]
+            clause["missing"] += row["missing"]
+            entry = sites.setdefault(row["site"], {"documents": 0, "risk_distribution": {}, "found": 0, "missing": 0})
+            entry["found"] += row["found"]
+            entry["missing"] += row["missing"]
+
+        for entry in list(categories.values()) + list(clauses.values()) + list(sites.values()):
+            entry["coverage"] = self._coverage(entry["found"], entry["missing"])
+        found = sum(category["found"] for category in categories.values())
+        missing = sum(category["missing"] for category in categories.values())
+        return {
+            "documents": sum(risk_distribution.values()),
+            "risk_distribution": risk_distribution,
+            "missing_by_severity": missing_by_severity,
+            "coverage": self._coverage(found, missing),
+            "categories": categories,
+            "clauses": sorted(clauses.values(), key=lambda clause: clause["clause_id"]),
+            "sites": {name or None: entry for name, entry in sites.items()} if site is None else None,
+            "recent": [
+                dict(row, coverage=self._coverage(row["found"], row["total"] - row["found"]))
+                for row in recent_rows
+            ],
+        }
+
+    @staticmethod
+    def _recent(conn, site: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        """The most recently analyzed documents with their clause counts"""
+        from .document_store import document_clauses, documents
+
+        query = select(
+            documents.c.id, documents.c.filename, documents.c.site, documents.c.risk_level, documents.c.updated_at
+        ).order_by(desc(documents.c.updated_at)).limit(limit)
+        if site is not None:
+            query = query.where(documents.c.site == site)
+        rows = [dict(row) for row in conn.execute(query).mappings().all()]
+        counts = {
+            row["document_id"]: row for row in conn.execute(
+                select(document_clauses.c.document_id,
+                       func.sum((document_clauses.c.status == "Found").cast(Integer)).label("found"),
+                       func.count().label("total"))
+                .where(document_clauses.c.document_id.in_([row["id"] for row in rows]))
+                .group_by(document_clauses.c.document_id)
+            ).mappings().all()
+        } if rows else {}
+        for row in rows:
+            count = counts.get(row["id"])
+            row["found"] = count["found"] if count else 0
+            row["total"] = count["total"] if count else 0
+        return rows
+
+    @staticmethod
+    def _coverage(found: int, missing: int) -> Optional[float]:
+        total = found + missing
+        return round(found / total, 4) if total else None
+
+    def rebuild(self) -> None:
+        """Recompute every aggregate from the stored documents"""
+        from .document_store import document_clauses, documents
+
+        with self.engine.begin() as conn:
+            conn.execute(delete(portfolio_risk))
+            conn.execute(delete(portfolio_clauses))
+            rows = conn.execute(
+                select(func.coalesce(documents.c.site, NO_SITE).label("site"),
+                       func.coalesce(documents.c.risk_level, "Unknown").label("risk_level"),
+                       func.count().label("documents"))
+                .group_by("site", "risk_level")
+            ).mappings().all()
+            if rows:
+                conn.execute(insert(portfolio_risk), [dict(row) for row in rows])
+            site = func.coalesce(documents.c.site, NO_SITE).label("site")
+            rows = conn.execute(
+                select(site, document_clauses.c.clause_id,
+                       func.max(document_clauses.c.category).label("category"),
+                       func.max(document_clauses.c.severity).label("severity"),
+                       func.sum((document_clauses.c.status == "Found").cast(Integer)).label("found"),
+                       func.sum((document_clauses.c.status != "Found").cast(Integer)).label("missing"))
+                .join(documents, documents.c.id == document_clauses.c.document_id)
+                .group_by(site, document_clauses.c.clause_id)
+            ).mappings().all()
+            if rows:
+                conn.execute(insert(portfolio_clauses), [dict(row) for row in rows])
+        logger.info("Portfolio aggregates rebuilt")
+
+
+@lru_cache()
+def get_portfolio() -> PortfolioAggregates:
+    return PortfolioAggregates()
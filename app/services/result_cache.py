@@ -0,0 +1,279 @@
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+from concurrent.futures import Future
+from datetime import datetime
+from functools import lru_cache
+import json
+import logging
+import threading
+import time
+from sqlalchemy import Column, DateTime, Float, Integer, String, Table, Text, delete, insert, select, update
+from app.core.config import get_settings
+from app.core.database import get_engine, metadata, write_transaction
+from app.core.metrics import CACHE_LOOKUPS
+from .cache_usage import add_usage, init_usage
+
+logger = logging.getLogger(__name__)
+
+analysis_results = Table(
+    "analysis_results",
+    metadata,
+    Column("cache_key", String(160), primary_key=True),
+    Column("document_hash", String(64), nullable=False, index=True),
+    Column("version", String(64), nullable=False),
+    Column("result", Text, nullable=False),
+    Column("size_bytes", Integer, nullable=False),
+    Column("created_at", DateTime, nullable=False, default=datetime.utcnow),
+    Column("last_accessed", Float, nullable=False, index=True),
+)
+
+# Least recently used entries read per query while evicting
+EVICTION_BATCH = 100
+
+
+class FlightAbandoned(Exception):
+    """Raised to callers waiting on a computation whose leader stopped before finishing"""
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one computation.
+
+    The first caller for a key runs the function; callers arriving while it is in flight
+    block on the same future and receive its result (or exception). If the leader gives up
+    without a result, as a closed stream does, one of the waiting callers takes over.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+
+    def begin(self, key: str) -> Tuple[Future, bool]:
+        """Join the call in flight for ``key`` or start one; ``(future, True)`` makes the caller its leader"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            return future, True
+
+    def finish(self, key: str, future: Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+        """Hand the leader's result, or error, to everyone waiting and end the call"""
+        with self._lock:
+            del self._calls[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return ``(result, shared)`` where ``shared`` is True for coalesced callers"""
+        while True:
+            future, leader = self.begin(key)
+            if leader:
+                break
+            try:
+                return future.result(), True
+            except FlightAbandoned:
+                continue
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, future, error=e)
+            raise
+        self.finish(key, future, result)
+        return result, False
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+class ResultCache:
+    """
+    Analysis results stored in DATABASE_URL, keyed by document SHA-256 and analysis version.
+
+    When the stored results exceed ``max_bytes`` the least recently used entries are evicted.
+    Their total size is kept in ``cache_usage``, updated in the transaction that writes them.
+    """
+
+    def __init__(self, engine=None, max_bytes: Optional[int] = None):
+        self.engine = engine or get_engine()
+        self.max_bytes = max_bytes if max_bytes is not None else get_settings().RESULT_CACHE_MAX_BYTES
+        analysis_results.create(self.engine, checkfirst=True)
+        init_usage(self.engine, "result", analysis_results.c.size_bytes)
+        self._flight = SingleFlight()
+        self._stats_lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+    @staticmethod
+    def make_key(document_hash: str, version: str) -> str:
+        return f"{document_hash}:{version}"
+
+    def get(self, document_hash: str, version: str) -> Optional[Dict]:
+        key = self.make_key(document_hash, version)
+        try:
+            with self.engine.begin() as conn:
+                row = conn.execute(
+                    select(analysis_results.c.result).where(analysis_results.c.cache_key == key)
+                ).first()
+                if row is None:
+                    return None
+                conn.execute(
+                    update(analysis_results)
+                    .where(analysis_results.c.cache_key == key)
+                    .values(last_accessed=time.time())
+                )
+            return json.loads(row.result)
+        except Exception as e:
+            logger.warning(f"Error reading result cache: {str(e)}")
+            return None
+
+    def lookup(self, document_hash: str, version: str) -> Optional[Dict]:
+        """``get``, counted as a hit or miss in the cache statistics"""
+        cached = self.get(document_hash, version)
+        self._count("hits" if cached is not None else "misses")
+        return cached
+
+    def set(self, document_hash: str, version: str, result: Dict) -> None:
+        key = self.make_key(document_hash, version)
+        try:
+            payload = json.dumps(result, default=str)
+            with write_transaction(self.engine) as conn:
+                replaced = conn.execute(
+                    select(analysis_results.c.size_bytes).where(analysis_results.c.cache_key == key)
+                ).scalar() or 0
+                conn.execute(delete(analysis_results).where(analysis_results.c.cache_key == key))
+                conn.execute(insert(analysis_results).values(
+                    cache_key=key,
+                    document_hash=document_hash,
+                    version=version,
+                    result=payload,
+                    size_bytes=len(payload),
+                    created_at=datetime.utcnow(),
+                    last_accessed=time.time()
+                ))
+                self._evict(conn, add_usage(conn, "result", len(payload) - replaced))
+        except Exception as e:
+            logger.warning(f"Error writing result cache: {str(e)}")
+
+    def get_or_compute(self, document_hash: str, version: str, compute: Callable[[], Dict]) -> Dict:
+        """
+        Return the cached result for the document, computing it at most once.
+        Concurrent requests for the same content share a single in-flight computation.
+        """
+        cached = self.get(document_hash, version)
+        if cached is not None:
+            self._count("hits")
+            return cached
+
+        def run() -> Dict:
+            # Another leader may have stored the result between our lookup and now
+            cached = self.get(document_hash, version)
+            if cached is not None:
+                self._count("hits")
+                return cached
+            self._count("misses")
+            result = compute()
+            self.set(document_hash, version, result)
+            return result
+
+        result, shared = self._flight.do(self.make_key(document_hash, version), run)
+        if shared:
+            self._count("coalesced")
+        return result
+
+    def stream_or_compute(self, document_hash: str, version: str,
+                          stream: Callable[[], Iterator[Tuple[str, Any]]]) -> Iterator[Tuple[str, Any]]:
+        """
+        ``get_or_compute`` for a computation that reports its progress.
+
+        Yields ``("cached", result)`` alone when the result is stored or was computed by a
+        concurrent caller. Otherwise this caller leads the single-flight call and yields the
+        events of ``stream()``, whose ``("complete", result)`` event is stored and handed to
+        the callers waiting on it. Closing the generator early abandons the call.
+        """
+        cached = self.get(document_hash, version)
+        if cached is not None:
+            self._count("hits")
+            yield "cached", cached
+            return
+        key = self.make_key(document_hash, version)
+        while True:
+            future, leader = self._flight.begin(key)
+            if leader:
+                break
+            try:
+                result = future.result()
+            except FlightAbandoned:
+                continue
+            self._count("coalesced")
+            yield "cached", result
+            return
+
+        finished = False
+        try:
+            # Another leader may have stored the result between our lookup and now
+            cached = self.get(document_hash, version)
+            if cached is not None:
+                self._count("hits")
+                self._flight.finish(key, future, cached)
+                finished = True
+                yield "cached", cached
+                return
+            self._count("misses")
+            for stage, payload in stream():
+                if stage == "complete":
+                    self.set(document_hash, version, payload)
+                    self._flight.finish(key, future, payload)
+                    finished = True
+                yield stage, payload
+            if not finished:
+                raise RuntimeError("Analysis ended without a result")
+        except BaseException as e:
+            if not finished:
+                if isinstance(e, GeneratorExit):
+                    error: BaseException = FlightAbandoned("The analysis was abandoned before it finished")
+                else:
+                    error = e
+                self._flight.finish(key, future, error=error)
+            raise
+
+    def info(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["in_flight"] = self._flight.in_flight
+        return stats
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self.stats[name] += 1
+        CACHE_LOOKUPS.inc(cache="result", outcome={"hits": "hit", "misses": "miss"}.get(name, name))
+
+    def _evict(self, conn, total: int) -> None:
+        """Delete the least recently used results until the ``total`` bytes stored fit in ``max_bytes``"""
+        evicted, freed = 0, 0
+        while total - freed > self.max_bytes:
+            rows = conn.execute(
+                select(analysis_results.c.cache_key, analysis_results.c.size_bytes)
+                .order_by(analysis_results.c.last_accessed)
+                .limit(EVICTION_BATCH)
+            ).all()
+            if not rows:
+                break
+            keys = []
+            for row in rows:
+                if total - freed <= self.max_bytes:
+                    break
+                keys.append(row.cache_key)
+                freed += row.size_bytes
+            conn.execute(delete(analysis_results).where(analysis_results.c.cache_key.in_(keys)))
+            evicted += len(keys)
+        if evicted:
+            add_usage(conn, "result", -freed)
+            logger.info(f"Evicted {evicted} cached results")
+
+
+@lru_cache()
+def get_result_cache() -> ResultCache:
+    return ResultCache()
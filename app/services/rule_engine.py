@@ -0,0 +1,222 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from bisect import bisect_right
+import logging
+import re
+from .fuzzy_matcher import FuzzyMatcher
+from .keyword_matcher import KeywordMatcher
+from .parsed_document import ParsedDocument, parse_text
+
+logger = logging.getLogger(__name__)
+
+MATCH_MODES = ("regex", "exact", "fuzzy")
+
+# Numbered backreferences point at the wrong group once a pattern sits inside the alternation
+BACKREFERENCE = re.compile(r"\\[1-9]")
+
+# Flags of a clause pattern without inline flags of its own
+DEFAULT_FLAGS = re.compile("", re.IGNORECASE).flags
+
+
+def _combinable(rule: re.Pattern) -> bool:
+    """Whether a clause pattern keeps its meaning as one named group of the combined alternation"""
+    if rule.flags != DEFAULT_FLAGS or rule.groupindex or BACKREFERENCE.search(rule.pattern):
+        return False
+    try:
+        # Inline global flags such as (?i) are only allowed at the start of a pattern
+        re.compile(f"(?P<r0>{rule.pattern})", re.IGNORECASE)
+    except re.error:
+        return False
+    return True
+
+
+class RuleEngine:
+    """
+    Matches compliance clauses against a document, each clause in its own mode.
+
+    ``regex`` clauses have their ``pattern`` compiled once into a single case-insensitive
+    alternation with one named group per clause, scanned over the text in one pass.
+    Patterns that cannot sit inside it, because they carry inline global flags, named
+    groups or backreferences, are scanned on their own.
+    ``exact`` clauses look for their keywords literally and ``fuzzy`` clauses score them
+    with ``partial_ratio``. A clause without a ``match`` setting uses ``regex`` when it has
+    a pattern and ``fuzzy`` otherwise.
+    """
+
+    def __init__(self, clauses: Dict[str, Dict[str, Any]], fuzzy_matcher: Optional[FuzzyMatcher] = None):
+        self.fuzzy_matcher = fuzzy_matcher or FuzzyMatcher()
+        self.modes: Dict[str, str] = {}
+        self._regex_rules: List[Tuple[str, re.Pattern]] = []
+        self._keywords: Dict[str, List[str]] = {}
+
+        for clause_id, clause in clauses.items():
+            mode = clause.get("match") or ("regex" if clause.get("pattern") else "fuzzy")
+            if mode not in MATCH_MODES:
+                logger.error(f"Unknown match mode {mode!r} for clause {clause_id}; using fuzzy matching")
+                mode = "fuzzy"
+            if mode == "regex":
+                try:
+                    self._regex_rules.append((clause_id, re.compile(clause["pattern"], re.IGNORECASE)))
+                except (KeyError, re.error) as e:
+                    logger.error(f"Invalid pattern for clause {clause_id}: {str(e)}; using exact matching")
+                    mode = "exact"
+            if mode != "regex":
+                self._keywords[clause_id] = list(clause.get("keywords", []))
+            self.modes[clause_id] = mode
+
+        self._separate_rules = [(clause_id, rule) for clause_id, rule in self._regex_rules if not _combinable(rule)]
+        self._regex_rules = [(clause_id, rule) for clause_id, rule in self._regex_rules if _combinable(rule)]
+        self._combined = None
+        if self._regex_rules:
+            try:
+                self._combined = re.compile(
+                    "|".join(f"(?P<r{i}>{rule.pattern})" for i, (_, rule) in enumerate(self._regex_rules)),
+                    re.IGNORECASE
+                )
+            except re.error as e:
+                logger.error(f"Clause patterns cannot be combined: {str(e)}; scanning each on its own")
+                self._separate_rules = self._regex_rules + self._separate_rules
+                self._regex_rules = []
+        exact_keywords = [k for clause_id, keywords in self._keywords.items()
+                          if self.modes[clause_id] == "exact" for k in keywords]
+        self._keyword_matcher = KeywordMatcher(exact_keywords)
+
+    def scan(self, document: Union[str, ParsedDocument]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Return the hits of every clause, keyed by clause id. Each hit names its paragraph,
+        the matched text and the ``start``/``end`` character offsets into the text.
+        """
+        document = parse_text(document)
+        paragraphs, offsets = document.paragraphs, document.offsets
+        hits: Dict[str, List[Dict[str, Any]]] = {clause_id: [] for clause_id in self.modes}
+        if paragraphs:
+            self._scan_regex(document.text, paragraphs, offsets, hits)
+            self._scan_exact(paragraphs, document.lowered, offsets, hits)
+            self._scan_fuzzy(paragraphs, document.lowered, offsets, hits)
+        return hits
+
+    def scan_paragraphs(self, paragraphs: List[str]) -> List[Dict[str, List[Dict[str, Any]]]]:
+        """
+        Scan each paragraph on its own and return its hits per clause id, with ``start``
+        and ``end`` relative to the paragraph. Unlike ``scan``, a regex match never spans
+        two paragraphs, so each result depends only on its paragraph's text.
+        """
+        results = [{clause_id: [] for clause_id in self.modes} for _ in paragraphs]
+        if not paragraphs:
+            return results
+        for paragraph, paragraph_hits in zip(paragraphs, results):
+            self._scan_regex(paragraph, [paragraph], [0], paragraph_hits)
+        hits: Dict[str, List[Dict[str, Any]]] = {clause_id: [] for clause_id in self.modes}
+        offsets = [0] * len(paragraphs)
+        lowered = [p.lower() for p in paragraphs]
+        self._scan_exact(paragraphs, lowered, offsets, hits)
+        self._scan_fuzzy(paragraphs, lowered, offsets, hits)
+        for clause_id, clause_hits in hits.items():
+            for hit in clause_hits:
+                results[hit["paragraph_number"] - 1][clause_id].append(hit)
+        return results
+
+    def merge_paragraph_hits(self, paragraph_hits: List[Dict[str, List[Dict[str, Any]]]],
+                             offsets: List[int]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Combine ``scan_paragraphs`` results of a document's paragraphs into ``scan`` form:
+        paragraph numbers and offsets into the document, in the order ``scan`` reports them.
+        """
+        hits: Dict[str, List[Dict[str, Any]]] = {clause_id: [] for clause_id in self.modes}
+        for index, by_clause in enumerate(paragraph_hits):
+            for clause_id, clause_hits in by_clause.items():
+                if clause_id not in hits:
+                    continue
+                for hit in clause_hits:
+                    hits[clause_id].append(dict(
+                        hit,
+                        paragraph_number=index + 1,
+                        start=offsets[index] + hit["start"],
+                        end=offsets[index] + hit["end"]
+                    ))
+        for clause_id, clause_hits in hits.items():
+            if self.modes[clause_id] == "fuzzy":
+                # Fuzzy hits are reported keyword by keyword
+                order = {}
+                for position, keyword in enumerate(self._keywords[clause_id]):
+                    order.setdefault(keyword, position)
+                clause_hits.sort(key=lambda hit: order.get(hit["keyword"], len(order)))
+        return hits
+
+    def _scan_regex(self, text: str, paragraphs: List[str], offsets: List[int], hits: Dict[str, List[Dict[str, Any]]]) -> None:
+        for clause_id, rule in self._separate_rules:
+            match = rule.search(text)
+            while match is not None:
+                self._add_hit(hits, clause_id, paragraphs, offsets, match.start(), match.end(), match.group())
+                match = rule.search(text, match.start() + 1)
+        if self._combined is None:
+            return
+        search = self._combined.search
+        match = search(text)
+        while match is not None:
+            start = match.start()
+            # The alternation reports the first clause matching here; later clauses may match too
+            first = int(match.lastgroup[1:])
+            self._add_hit(hits, self._regex_rules[first][0], paragraphs, offsets, start, match.end(), match.group())
+            for clause_id, rule in self._regex_rules[first + 1:]:
+                other = rule.match(text, start)
+                if other is not None:
+                    self._add_hit(hits, clause_id, paragraphs, offsets, start, other.end(), other.group())
+            match = search(text, start + 1)
+
+    def _scan_exact(self, paragraphs: Sequence[str], lowered: Sequence[str], offsets: Sequence[int],
+                    hits: Dict[str, List[Dict[str, Any]]]) -> None:
+        clause_ids = [clause_id for clause_id, mode in self.modes.items() if mode == "exact"]
+        if not clause_ids:
+            return
+        keywords = {clause_id: [(keyword, keyword.lower()) for keyword in self._keywords[clause_id]]
+                    for clause_id in clause_ids}
+        for i, paragraph in enumerate(lowered):
+            found = {}
+            for start, keyword in self._keyword_matcher.iter_matches(paragraph):
+                found.setdefault(keyword, start)
+            if not found:
+                continue
+            for clause_id in clause_ids:
+                for keyword, keyword_lower in keywords[clause_id]:
+                    start = found.get(keyword_lower)
+                    if start is not None:
+                        hits[clause_id].append(self._hit(paragraphs, offsets, i, start, start + len(keyword), keyword))
+                        break
+
+    def _scan_fuzzy(self, paragraphs: Sequence[str], lowered: Sequence[str], offsets: Sequence[int],
+                    hits: Dict[str, List[Dict[str, Any]]]) -> None:
+        clause_ids = [clause_id for clause_id, mode in self.modes.items() if mode == "fuzzy"]
+        keywords = [k for clause_id in clause_ids for k in self._keywords[clause_id]]
+        if not keywords:
+            return
+        keyword_matches = self.fuzzy_matcher.match(keywords, paragraphs, lowered)
+        for clause_id in clause_ids:
+            for keyword in self._keywords[clause_id]:
+                for i in keyword_matches[keyword.lower()]:
+                    hits[clause_id].append(self._hit(paragraphs, offsets, i, 0, len(paragraphs[i]), keyword))
+
+    def _add_hit(self, hits, clause_id: str, paragraphs: List[str], offsets: List[int],
+                 start: int, end: int, matched: str) -> None:
+        """Record a regex hit, keeping only the first one per paragraph"""
+        index = max(bisect_right(offsets, start) - 1, 0)
+        clause_hits = hits[clause_id]
+        if clause_hits and clause_hits[-1]["paragraph_number"] == index + 1:
+            return
+        clause_hits.append({
+            "paragraph_number": index + 1,
+            "snippet": paragraphs[index],
+            "keyword": matched,
+            "start": start,
+            "end": end
+        })
+
+    @staticmethod
+    def _hit(paragraphs: List[str], offsets: List[int], index: int, start: int, end: int, keyword: str) -> Dict[str, Any]:
+        """Build a hit from offsets relative to the paragraph"""
+        return {
+            "paragraph_number": index + 1,
+            "snippet": paragraphs[index],
+            "keyword": keyword,
+            "start": offsets[index] + start,
+            "end": offsets[index] + end
+        }
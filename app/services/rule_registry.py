@@ -0,0 +1,190 @@
+from typing import Any, Dict, Optional, Tuple
+from datetime import datetime
+from functools import lru_cache
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from app.core.config import get_settings, resolve_path
+from .rule_engine import RuleEngine
+
+logger = logging.getLogger(__name__)
+
+# Sections of compliance_rules.json that hold traceable clauses
+CLAUSE_SECTIONS = ["general", "ppe", "emergency", "training", "incident"]
+
+# Used when compliance_rules.json is missing or invalid
+DEFAULT_CLAUSES = {
+    "Emergency Drill": {
+        "keywords": ["emergency drill", "evacuation drill", "safety drill", "emergency response"],
+        "severity": "high",
+        "required": True
+    },
+    "PPE Requirements": {
+        "keywords": ["ppe", "personal protective equipment", "safety gear", "protective gear"],
+        "severity": "high",
+        "required": True
+    },
+    "Safety Training": {
+        "keywords": ["safety training", "safety course", "training program", "safety certification"],
+        "severity": "medium",
+        "required": True
+    },
+    "Incident Reporting": {
+        "keywords": ["incident report", "accident report", "safety incident", "near miss"],
+        "severity": "medium",
+        "required": True
+    }
+}
+
+# Used when company_config.json is missing or invalid
+DEFAULT_COMPANY_CONFIG = {
+    "company_name": "Default Company",
+    "compliance_rules": {
+        "ppe_requirements": ["hard hat", "safety boots", "gloves"],
+        "emergency_procedures": ["evacuation", "first aid", "fire safety"],
+        "training_requirements": ["safety training", "certification"]
+    }
+}
+
+
+def build_clauses(compliance_rules: Dict) -> Dict[str, Dict[str, Any]]:
+    """Turn the clause sections of compliance_rules.json into ClauseTracer clauses"""
+    clauses = {}
+    for section in CLAUSE_SECTIONS:
+        for clause in compliance_rules.get(section, []):
+            name = clause.get("clause") or clause.get("text") or clause.get("id")
+            clauses[name] = {
+                "id": clause.get("id"),
+                "category": section,
+                "pattern": clause.get("pattern"),
+                "match": clause.get("match"),
+                "keywords": clause.get("keywords") or [clause.get("text") or name],
+                "severity": clause.get("severity", "medium"),
+                "required": True,
+                "recommendation": clause.get("recommendation", "")
+            }
+    return clauses
+
+
+class RuleSet:
+    """
+    One parsed and compiled snapshot of the rule files.
+    A reload builds a new RuleSet; existing ones are never modified.
+    """
+
+    def __init__(self, compliance_rules: Dict, company_config: Dict, version: str, config_loaded: bool):
+        self.compliance_rules = compliance_rules
+        self.company_config = company_config
+        self.version = version
+        self.config_loaded = config_loaded
+        self.loaded_at = datetime.utcnow()
+        self.clauses = build_clauses(compliance_rules) if config_loaded else copy.deepcopy(DEFAULT_CLAUSES)
+        self.engine = RuleEngine(self.clauses)
+
+
+class RuleRegistry:
+    """
+    Parses and compiles the compliance rules and company configuration once, and reloads
+    them atomically when either file changes on disk.
+
+    File modification times are checked at most every ``check_interval`` seconds when the
+    rules are read. A failed reload keeps serving the previous rule set.
+    """
+
+    def __init__(self, rules_path: str, company_path: str, check_interval: float = 5.0):
+        self.rules_path = rules_path
+        self.company_path = company_path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._stamps: Optional[Tuple] = None
+        self._checked_at = 0.0
+        self._current: Optional[RuleSet] = None
+
+    @property
+    def current(self) -> RuleSet:
+        """The active rule set, reloaded first if the files have changed"""
+        if self._current is None or time.monotonic() - self._checked_at >= self.check_interval:
+            self._refresh()
+        return self._current
+
+    @property
+    def version(self) -> str:
+        return self.current.version
+
+    def reload(self) -> RuleSet:
+        """Reload both files regardless of their modification times"""
+        with self._lock:
+            self._stamps = None
+        self._refresh()
+        return self._current
+
+    def _refresh(self) -> None:
+        with self._lock:
+            self._checked_at = time.monotonic()
+            stamps = (self._stamp(self.rules_path), self._stamp(self.company_path))
+            if self._current is not None and stamps == self._stamps:
+                return
+            try:
+                rule_set = self._load()
+            except Exception as e:
+                if self._current is None:
+                    raise
+                logger.error(f"Error reloading rules, keeping version {self._current.version}: {str(e)}")
+                # Wait for the next change instead of re-reading the broken files every check
+                self._stamps = stamps
+                return
+            if self._current is not None:
+                logger.info(f"Rules reloaded: version {self._current.version} -> {rule_set.version}")
+            self._current = rule_set
+            self._stamps = stamps
+
+    def _load(self) -> RuleSet:
+        rules_bytes, compliance_rules = self._read_json(self.rules_path, "compliance rules")
+        company_bytes, company_config = self._read_json(self.company_path, "company config")
+        if self._current is not None and (compliance_rules is None or company_config is None):
+            raise ValueError("rule files are missing or invalid")
+        config_loaded = compliance_rules is not None
+        if not config_loaded:
+            logger.error(f"Clause config file not found or invalid at {self.rules_path}. Using hardcoded defaults.")
+            compliance_rules = {}
+        if company_config is None:
+            company_config = copy.deepcopy(DEFAULT_COMPANY_CONFIG)
+        digest = hashlib.sha256()
+        digest.update(rules_bytes or b"")
+        digest.update(b"\0")
+        digest.update(company_bytes or b"")
+        return RuleSet(compliance_rules, company_config, digest.hexdigest()[:16], config_loaded)
+
+    @staticmethod
+    def _read_json(path: str, label: str) -> Tuple[Optional[bytes], Optional[Dict]]:
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            return raw, json.loads(raw)
+        except FileNotFoundError:
+            logger.error(f"Error loading {label}: {path} not found")
+        except json.JSONDecodeError as e:
+            logger.error(f"Error loading {label}: {path} is not valid JSON ({str(e)})")
+        return None, None
+
+    @staticmethod
+    def _stamp(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+
+@lru_cache()
+def get_rule_registry() -> RuleRegistry:
+    settings = get_settings()
+    return RuleRegistry(
+        resolve_path(settings.COMPLIANCE_RULES_FILE),
+        resolve_path(settings.COMPANY_CONFIG_FILE),
+        settings.RULES_RELOAD_INTERVAL_SECONDS
+    )
@@ -0,0 +1,175 @@
+from typing import Dict, List, Optional, Tuple, Union
+from concurrent.futures import Future
+import logging
+import queue
+import threading
+import time
+from app.core.config import settings
+from .paragraph_cache import content_hash
+from .parsed_document import ParsedDocument, parse_text
+
+logger = logging.getLogger(__name__)
+
+# Chunks with fewer words are kept as they are instead of being summarized
+MIN_CHUNK_WORDS = 50
+
+
+class _SummaryRequest:
+    __slots__ = ("text", "params", "future")
+
+    def __init__(self, text: str, params: Tuple[int, int]):
+        self.text = text
+        self.params = params
+        self.future: Future = Future()
+
+
+class SummaryBatcher:
+    """
+    Feeds summarization requests from every caller through the pipeline in shared batches.
+
+    A background thread waits for the first request, then keeps collecting requests for up
+    to ``window_seconds`` or until ``batch_size`` are queued, and runs them as one batched
+    pipeline call per set of generation parameters.
+    """
+
+    def __init__(self, summarizer, batch_size: Optional[int] = None, window_seconds: Optional[float] = None):
+        self.summarizer = summarizer
+        self.batch_size = batch_size or settings.SUMMARY_BATCH_SIZE
+        self.window_seconds = window_seconds if window_seconds is not None else settings.SUMMARY_BATCH_WINDOW_SECONDS
+        self._queue: "queue.Queue[_SummaryRequest]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="summary-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str, max_length: int, min_length: int) -> Future:
+        request = _SummaryRequest(text, (max_length, min_length))
+        self._queue.put(request)
+        return request.future
+
+    @property
+    def queue_depth(self) -> int:
+        """Chunks waiting for the next batch"""
+        return self._queue.qsize()
+
+    def summarize_many(self, texts: List[str], max_length: int, min_length: int) -> List[str]:
+        futures = [self.submit(text, max_length, min_length) for text in texts]
+        return [future.result() for future in futures]
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window_seconds
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: List[_SummaryRequest]) -> None:
+        groups: Dict[Tuple[int, int], List[_SummaryRequest]] = {}
+        for request in batch:
+            if request.future.set_running_or_notify_cancel():
+                groups.setdefault(request.params, []).append(request)
+        for (max_length, min_length), requests in groups.items():
+            # Similar lengths together keep padding inside the batch low
+            requests.sort(key=lambda request: len(request.text))
+            try:
+                outputs = self.summarizer(
+                    [request.text for request in requests],
+                    batch_size=len(requests),
+                    max_length=max_length,
+                    min_length=min_length,
+                    do_sample=False,
+                    truncation=True
+                )
+            except Exception as e:
+                logger.error(f"Error summarizing batch of {len(requests)} chunks: {str(e)}")
+                for request in requests:
+                    request.future.set_exception(e)
+                continue
+            for request, output in zip(requests, outputs):
+                request.future.set_result(output["summary_text"])
+
+
+class SummarizationService:
+    """
+    Abstractive summarization of long documents.
+
+    The text is packed paragraph by paragraph into chunks that fit the model's input
+    length as measured by its tokenizer, with content-defined boundaries; paragraphs
+    longer than that are split on token boundaries. Chunks are summarized through a shared
+    ``SummaryBatcher`` and the joined chunk summaries are summarized once more if they are
+    still too long.
+    """
+
+    def __init__(self, summarizer, batcher: Optional[SummaryBatcher] = None, max_input_tokens: Optional[int] = None):
+        self.summarizer = summarizer
+        self.tokenizer = summarizer.tokenizer
+        self.batcher = batcher or SummaryBatcher(summarizer)
+        limit = min(max_input_tokens or settings.SUMMARY_MAX_INPUT_TOKENS, self.tokenizer.model_max_length)
+        # Leave room for the special tokens the pipeline adds around every input
+        self.max_tokens = limit - self.tokenizer.num_special_tokens_to_add()
+        self.anchor_period = max(1, settings.SUMMARY_ANCHOR_PERIOD)
+
+    def chunk(self, document: Union[str, ParsedDocument]) -> List[str]:
+        """
+        Pack paragraphs into chunks of at most ``max_tokens`` tokens.
+
+        Once a chunk is half full it also ends after any anchor paragraph, one whose
+        content hash is divisible by ``SUMMARY_ANCHOR_PERIOD``. Boundaries then depend on
+        nearby paragraphs only, so an edit changes the chunks around it and the rest of
+        the document is chunked as before.
+        """
+        paragraphs = list(parse_text(document).paragraphs)
+        if not paragraphs:
+            return []
+        token_ids = self.tokenizer(paragraphs, add_special_tokens=False)["input_ids"]
+        chunks = []
+        current: List[str] = []
+        current_tokens = 0
+        for paragraph, ids in zip(paragraphs, token_ids):
+            if len(ids) > self.max_tokens:
+                if current:
+                    chunks.append(" ".join(current))
+                    current, current_tokens = [], 0
+                for start in range(0, len(ids), self.max_tokens):
+                    chunks.append(self.tokenizer.decode(ids[start:start + self.max_tokens]).strip())
+                continue
+            # Joining paragraphs with a space may merge a token at the seam; count one extra
+            added = len(ids) + (1 if current else 0)
+            if current_tokens + added > self.max_tokens:
+                chunks.append(" ".join(current))
+                current, current_tokens = [], 0
+                added = len(ids)
+            current.append(paragraph)
+            current_tokens += added
+            if current_tokens * 2 >= self.max_tokens and self._is_anchor(paragraph):
+                chunks.append(" ".join(current))
+                current, current_tokens = [], 0
+        if current:
+            chunks.append(" ".join(current))
+        return chunks
+
+    def _is_anchor(self, paragraph: str) -> bool:
+        return int(content_hash(paragraph)[:8], 16) % self.anchor_period == 0
+
+    def summarize_chunks(self, chunks: List[str]) -> List[str]:
+        """Summarize every chunk long enough to need it, keeping the others as they are"""
+        long_chunks = [i for i, chunk in enumerate(chunks) if len(chunk.split()) > MIN_CHUNK_WORDS]
+        summaries = list(chunks)
+        if long_chunks:
+            results = self.batcher.summarize_many([chunks[i] for i in long_chunks], max_length=130, min_length=40)
+            for i, summary in zip(long_chunks, results):
+                summaries[i] = summary
+        return summaries
+
+    def combine(self, summaries: List[str]) -> str:
+        """Join chunk summaries, summarizing them once more if they are still too long"""
+        final_summary = " ".join(summaries)
+        if len(final_summary.split()) > 200:
+            final_summary = self.batcher.summarize_many([final_summary], max_length=200, min_length=100)[0]
+        return final_summary
+
+    def summarize(self, document: Union[str, ParsedDocument]) -> str:
+        return self.combine(self.summarize_chunks(self.chunk(document)))
@@ -0,0 +1,72 @@
+from typing import Callable, Dict
+import logging
+import os
+from app.core.config import resolve_path
+
+logger = logging.getLogger(__name__)
+
+
+def _load_pipeline(settings):
+    """The fp32 transformers pipeline, on the GPU when there is one"""
+    import torch
+    from transformers import pipeline
+
+    model = settings.SUMMARIZER_MODEL
+    return pipeline(
+        "summarization",
+        model=model,
+        tokenizer=model,
+        device=0 if torch.cuda.is_available() else -1
+    )
+
+
+def _load_quantized(settings):
+    """The PyTorch model with its Linear layers dynamically quantized to int8, on the CPU"""
+    import torch
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, pipeline
+
+    tokenizer = AutoTokenizer.from_pretrained(settings.SUMMARIZER_MODEL)
+    model = AutoModelForSeq2SeqLM.from_pretrained(settings.SUMMARIZER_MODEL)
+    model.eval()
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return pipeline("summarization", model=model, tokenizer=tokenizer, device=-1)
+
+
+def _load_onnx(settings):
+    """
+    The model exported to ONNX and run with ONNX Runtime. The export is written to
+    SUMMARIZER_ONNX_DIR the first time and loaded from there afterwards.
+    """
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError as e:
+        raise ImportError("The onnx summarizer backend requires optimum[onnxruntime]") from e
+    from transformers import AutoTokenizer, pipeline
+
+    export_dir = resolve_path(settings.SUMMARIZER_ONNX_DIR)
+    if os.path.isdir(export_dir) and os.listdir(export_dir):
+        model = ORTModelForSeq2SeqLM.from_pretrained(export_dir)
+        tokenizer = AutoTokenizer.from_pretrained(export_dir)
+    else:
+        logger.info(f"Exporting {settings.SUMMARIZER_MODEL} to ONNX at {export_dir}")
+        model = ORTModelForSeq2SeqLM.from_pretrained(settings.SUMMARIZER_MODEL, export=True)
+        tokenizer = AutoTokenizer.from_pretrained(settings.SUMMARIZER_MODEL)
+        model.save_pretrained(export_dir)
+        tokenizer.save_pretrained(export_dir)
+    return pipeline("summarization", model=model, tokenizer=tokenizer)
+
+
+SUMMARIZER_BACKENDS: Dict[str, Callable] = {
+    "pipeline": _load_pipeline,
+    "quantized": _load_quantized,
+    "onnx": _load_onnx,
+}
+
+
+def load_summarizer(settings, backend: str = None):
+    """Load the summarization pipeline for the configured (or given) backend"""
+    backend = backend or settings.SUMMARIZER_BACKEND
+    if backend not in SUMMARIZER_BACKENDS:
+        raise ValueError(f"Unknown summarizer backend {backend!r}; expected one of {', '.join(SUMMARIZER_BACKENDS)}")
+    logger.info(f"Loading summarizer {settings.SUMMARIZER_MODEL} with the {backend} backend")
+    return SUMMARIZER_BACKENDS[backend](settings)
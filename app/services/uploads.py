@@ -0,0 +1,159 @@
+from typing import BinaryIO, Optional
+import hashlib
+import io
+import logging
+import os
+import tempfile
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size limit"""
+
+
+class UploadedDocument:
+    """
+    Bytes of an uploaded document, hashed while they are received.
+
+    Content stays in memory until it outgrows ``memory_limit``; past that point it is
+    spilled to a uniquely named file in ``spill_dir`` so concurrent uploads of files with
+    the same name never overwrite each other. ``site`` optionally records which site the
+    document belongs to, for the portfolio aggregates.
+    """
+
+    def __init__(self, filename: str, max_size: Optional[int] = None,
+                 memory_limit: Optional[int] = None, spill_dir: Optional[str] = None,
+                 site: Optional[str] = None):
+        self.filename = filename or "document"
+        self.site = site
+        self.max_size = max_size if max_size is not None else settings.MAX_UPLOAD_SIZE
+        self.memory_limit = memory_limit if memory_limit is not None else settings.UPLOAD_MEMORY_LIMIT
+        self.spill_dir = spill_dir or settings.UPLOAD_DIR
+        self.size = 0
+        self.path: Optional[str] = None
+        self._hasher = hashlib.sha256()
+        self._buffer: Optional[io.BytesIO] = io.BytesIO()
+        self._spill: Optional[BinaryIO] = None
+
+    @classmethod
+    def from_bytes(cls, filename: str, content: bytes, **kwargs) -> "UploadedDocument":
+        upload = cls(filename, **kwargs)
+        upload.write(content)
+        upload.close()
+        return upload
+
+    @property
+    def extension(self) -> str:
+        return os.path.splitext(self.filename)[1].lower()
+
+    @property
+    def in_memory(self) -> bool:
+        return self.path is None
+
+    @property
+    def sha256(self) -> str:
+        return self._hasher.hexdigest()
+
+    def write(self, chunk: bytes) -> None:
+        """Append a chunk, rejecting it as soon as the size limit is crossed"""
+        self.size += len(chunk)
+        if self.max_size and self.size > self.max_size:
+            raise UploadTooLargeError(
+                f"File exceeds the maximum upload size of {self.max_size // (1024 * 1024)}MB"
+            )
+        self._hasher.update(chunk)
+        if self._spill is None and self.size > self.memory_limit:
+            self._spill_to_disk()
+        if self._spill is not None:
+            self._spill.write(chunk)
+        else:
+            self._buffer.write(chunk)
+
+    def close(self) -> None:
+        """Finish writing; spilled content is flushed to its file"""
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    def getvalue(self) -> bytes:
+        if self.in_memory:
+            return self._buffer.getvalue()
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def open(self) -> BinaryIO:
+        """Open the content as a readable binary stream"""
+        if self.in_memory:
+            return io.BytesIO(self._buffer.getvalue())
+        return open(self.path, "rb")
+
+    def cleanup(self) -> None:
+        """Release the buffer and remove any spilled file"""
+        self.close()
+        self._buffer = None
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+                logger.info("Temporary file removed")
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Error removing temporary file: {str(e)}")
+
+    def _spill_to_disk(self) -> None:
+        os.makedirs(self.spill_dir, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(prefix="upload-", suffix=self.extension, dir=self.spill_dir)
+        self._spill = os.fdopen(fd, "wb")
+        self._spill.write(self._buffer.getvalue())
+        self._buffer = None
+        logger.info(f"Upload {self.filename} spilled to {self.path}")
+
+    def __enter__(self) -> "UploadedDocument":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.cleanup()
+
+
+def _new_upload(filename: str, declared_size: Optional[int], **kwargs) -> UploadedDocument:
+    upload = UploadedDocument(filename, **kwargs)
+    if declared_size is not None and upload.max_size and declared_size > upload.max_size:
+        # Reject before reading anything when the client told us the size up front
+        raise UploadTooLargeError(
+            f"File exceeds the maximum upload size of {upload.max_size // (1024 * 1024)}MB"
+        )
+    return upload
+
+
+async def read_upload(file, chunk_size: Optional[int] = None, **kwargs) -> UploadedDocument:
+    """Read a FastAPI UploadFile in bounded chunks"""
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    upload = _new_upload(file.filename, getattr(file, "size", None), **kwargs)
+    try:
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+            upload.write(chunk)
+        upload.close()
+    except Exception:
+        upload.cleanup()
+        raise
+    return upload
+
+
+def read_upload_stream(stream: BinaryIO, filename: str, chunk_size: Optional[int] = None,
+                       **kwargs) -> UploadedDocument:
+    """Read a synchronous binary stream in bounded chunks"""
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    upload = _new_upload(filename, None, **kwargs)
+    try:
+        for chunk in iter(lambda: stream.read(chunk_size), b""):
+            upload.write(chunk)
+        upload.close()
+    except Exception:
+        upload.cleanup()
+        raise
+    return upload
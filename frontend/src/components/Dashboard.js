@@ -7,6 +7,9 @@ import {
   ChartBarIcon,
   ShieldCheckIcon
 } from '@heroicons/react/24/outline';
+import apiService from '../services/api';
+
+const ACTIVITY_STATUS = { Low: 'compliant', Medium: 'medium-risk', High: 'high-risk' };
 
 const Dashboard = () => {
   const [stats, setStats] = useState({
@@ -19,23 +22,29 @@ const Dashboard = () => {
   });
 
   useEffect(() => {
-    // Simulate loading dashboard data
-    const mockStats = {
-      totalDocuments: 24,
-      compliantDocuments: 18,
-      highRiskDocuments: 3,
-      pendingReviews: 3,
-      averageComplianceScore: 85,
-      recentActivity: [
-        { id: 1, document: 'Safety Protocol v2.1.pdf', status: 'compliant', date: '2024-06-21', score: 92 },
-        { id: 2, document: 'Emergency Procedures.docx', status: 'high-risk', date: '2024-06-20', score: 45 },
-        { id: 3, document: 'Training Manual.pdf', status: 'pending', date: '2024-06-19', score: 78 },
-        { id: 4, document: 'Compliance Report Q2.pdf', status: 'compliant', date: '2024-06-18', score: 88 }
-      ]
-    };
-    setStats(mockStats);
+    apiService.getPortfolio()
+      .then((portfolio) => {
+        const risk = portfolio.risk_distribution || {};
+        setStats({
+          totalDocuments: portfolio.documents,
+          compliantDocuments: risk.Low || 0,
+          highRiskDocuments: risk.High || 0,
+          pendingReviews: risk.Medium || 0,
+          averageComplianceScore: Math.round((portfolio.coverage || 0) * 100),
+          recentActivity: (portfolio.recent || []).map((document) => ({
+            id: document.id,
+            document: document.filename,
+            status: ACTIVITY_STATUS[document.risk_level] || 'pending',
+            date: String(document.updated_at).slice(0, 10),
+            score: Math.round((document.coverage || 0) * 100)
+          }))
+        });
+      })
+      .catch((error) => console.error('Error loading dashboard:', error));
   }, []);
 
+  const share = (count) => (stats.totalDocuments ? (count / stats.totalDocuments) * 100 : 0);
+
   const StatCard = ({ title, value, icon: Icon, color, subtitle }) => (
     <div className="bg-white rounded-xl shadow-sm border border-gray-200 p-6 hover:shadow-md transition-shadow">
       <div className="flex items-center justify-between">
@@ -64,7 +73,7 @@ const Dashboard = () => {
             <div className="w-32 bg-gray-200 rounded-full h-2">
               <div 
                 className="bg-green-500 h-2 rounded-full" 
-                style={{ width: `${(stats.compliantDocuments / stats.totalDocuments) * 100}%` }}
+                style={{ width: `${share(stats.compliantDocuments)}%` }}
               ></div>
             </div>
             <span className="text-sm font-medium text-gray-900">
@@ -78,7 +87,7 @@ const Dashboard = () => {
             <div className="w-32 bg-gray-200 rounded-full h-2">
               <div 
                 className="bg-red-500 h-2 rounded-full" 
-                style={{ width: `${(stats.highRiskDocuments / stats.totalDocuments) * 100}%` }}
+                style={{ width: `${share(stats.highRiskDocuments)}%` }}
               ></div>
             </div>
             <span className="text-sm font-medium text-gray-900">
@@ -87,12 +96,12 @@ const Dashboard = () => {
           </div>
         </div>
         <div className="flex items-center justify-between">
-          <span className="text-sm text-gray-600">Pending Review</span>
+          <span className="text-sm text-gray-600">Medium Risk</span>
           <div className="flex items-center space-x-2">
             <div className="w-32 bg-gray-200 rounded-full h-2">
               <div 
                 className="bg-yellow-500 h-2 rounded-full" 
-                style={{ width: `${(stats.pendingReviews / stats.totalDocuments) * 100}%` }}
+                style={{ width: `${share(stats.pendingReviews)}%` }}
               ></div>
             </div>
             <span className="text-sm font-medium text-gray-900">
@@ -171,11 +180,11 @@ const Dashboard = () => {
           subtitle="Requires attention"
         />
         <StatCard
-          title="Pending Review"
+          title="Medium Risk"
           value={stats.pendingReviews}
           icon={ClockIcon}
           color="bg-yellow-500"
-          subtitle="Under analysis"
+          subtitle="Review recommended"
         />
       </div>
 
@@ -185,7 +194,7 @@ const Dashboard = () => {
           <div>
             <h3 className="text-lg font-semibold mb-2">Average Compliance Score</h3>
             <p className="text-3xl font-bold">{stats.averageComplianceScore}%</p>
-            <p className="text-blue-100 text-sm mt-1">Based on all analyzed documents</p>
+            <p className="text-blue-100 text-sm mt-1">Share of required clauses found across all analyzed documents</p>
           </div>
           <ShieldCheckIcon className="w-16 h-16 text-blue-200" />
         </div>
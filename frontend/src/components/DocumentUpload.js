@@ -9,9 +9,19 @@ import {
 } from '@heroicons/react/24/outline';
 import apiService from '../services/api';
 
+// Analysis stages streamed by the server, in the order they usually finish
+const STAGES = [
+    { key: 'extraction', label: 'Text extracted' },
+    { key: 'compliance_report', label: 'Compliance report' },
+    { key: 'clause_traceability', label: 'Clause traceability' },
+    { key: 'entities', label: 'Entities' },
+    { key: 'summary', label: 'Summary' }
+];
+
 const DocumentUpload = ({ onUploadComplete, onError, setLoading }) => {
     const [uploading, setUploading] = useState(false);
     const [uploadProgress, setUploadProgress] = useState(0);
+    const [completedStages, setCompletedStages] = useState([]);
 
     const onDrop = async (acceptedFiles) => {
         if (acceptedFiles.length === 0) return;
@@ -35,21 +45,17 @@ const DocumentUpload = ({ onUploadComplete, onError, setLoading }) => {
         setUploading(true);
         setLoading(true);
         setUploadProgress(0);
+        setCompletedStages([]);
 
-        // Simulate progress
-        const progressInterval = setInterval(() => {
-            setUploadProgress(prev => {
-                if (prev >= 90) {
-                    clearInterval(progressInterval);
-                    return 90;
-                }
-                return prev + 10;
-            });
-        }, 200);
+        // Progress advances as each analysis stage arrives from the server
+        const onStage = (event) => {
+            if (!STAGES.some(stage => stage.key === event)) return;
+            setCompletedStages(prev => [...prev, event]);
+            setUploadProgress(prev => Math.min(100, prev + Math.round(100 / STAGES.length)));
+        };
 
         try {
-            const result = await apiService.uploadDocument(file);
-            clearInterval(progressInterval);
+            const result = await apiService.uploadDocumentStream(file, onStage);
             setUploadProgress(100);
             
             console.log('Upload result:', result);
@@ -61,7 +67,6 @@ const DocumentUpload = ({ onUploadComplete, onError, setLoading }) => {
                 throw new Error('Invalid response format from server');
             }
         } catch (error) {
-            clearInterval(progressInterval);
             console.error('Upload error:', error);
             toast.error(error.message || 'Failed to upload document. Please try again.');
             onError(error);
@@ -70,6 +75,7 @@ const DocumentUpload = ({ onUploadComplete, onError, setLoading }) => {
                 setUploading(false);
                 setLoading(false);
                 setUploadProgress(0);
+                setCompletedStages([]);
             }, 1000);
         }
     };
@@ -117,6 +123,13 @@ const DocumentUpload = ({ onUploadComplete, onError, setLoading }) => {
                                     <p className="text-lg font-medium text-gray-900">Processing document...</p>
                                     <p className="text-sm text-gray-600 mt-1">AI is analyzing your document</p>
                                 </div>
+                                <ul className="text-sm text-left inline-block space-y-1">
+                                    {STAGES.map(stage => (
+                                        <li key={stage.key} className={completedStages.includes(stage.key) ? 'text-green-600' : 'text-gray-400'}>
+                                            {completedStages.includes(stage.key) ? '✓' : '○'} {stage.label}
+                                        </li>
+                                    ))}
+                                </ul>
                                 {uploadProgress > 0 && (
                                     <div className="w-full bg-gray-200 rounded-full h-2">
                                         <div 
@@ -57,6 +57,65 @@ class ApiService {
     }
   }
 
+  // Upload a document and receive its analysis stage by stage as newline-delimited JSON.
+  // onEvent is called with (event, data) for every stage as soon as it arrives.
+  async uploadDocumentStream(file, onEvent = () => {}) {
+    const formData = new FormData();
+    formData.append('file', file);
+
+    const response = await fetch(getApiUrl('/documents/upload/stream'), {
+      method: 'POST',
+      body: formData,
+      headers: {
+        'Accept': 'application/x-ndjson'
+      }
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let result = null;
+
+    const handleLine = (line) => {
+      if (!line.trim()) return;
+      const { event, data } = JSON.parse(line);
+      if (event === 'error') {
+        throw new Error(data.detail || 'Document analysis failed');
+      }
+      if (event === 'complete') {
+        result = data;
+      }
+      onEvent(event, data);
+    };
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const lines = buffer.split('\n');
+      buffer = lines.pop();
+      lines.forEach(handleLine);
+    }
+    handleLine(buffer);
+
+    if (!result) {
+      throw new Error('Analysis stream ended before completion');
+    }
+    return {
+      results: {
+        summary: result.summary,
+        entities: result.entities,
+        compliance_report: result.compliance_report,
+        clause_traceability: result.clause_traceability
+      }
+    };
+  }
+
   async getCompanyConfig() {
     try {
       const response = await fetch(getApiUrl('/config/company'), {
@@ -102,6 +161,29 @@ class ApiService {
       throw error;
     }
   }
+
+  // Precomputed compliance aggregates across every analyzed document, optionally for one site
+  async getPortfolio(site = null) {
+    try {
+      const query = site ? `?site=${encodeURIComponent(site)}` : '';
+      const response = await fetch(getApiUrl(`/portfolio${query}`), {
+        method: 'GET',
+        headers: {
+          'Accept': 'application/json'
+        }
+      });
+
+      if (!response.ok) {
+        const errorData = await response.json().catch(() => ({}));
+        throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
+      }
+
+      return await response.json();
+    } catch (error) {
+      console.error('Error fetching portfolio:', error);
+      throw error;
+    }
+  }
 }
 
 const apiService = new ApiService();
@@ -0,0 +1,97 @@
+"""
+Benchmark ClauseTracer's batched fuzzy matching against the pairwise loop it replaced.
+Every configured clause is traced in fuzzy mode for the comparison; the time of the
+default per-clause modes (regex patterns where configured) is reported alongside.
+
+Usage:
+    python scripts/benchmark_clause_tracing.py --copies 50 --runs 3
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from rapidfuzz import fuzz
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.clause_traceability import ClauseTracer
+from app.services.rule_engine import RuleEngine
+
+SAMPLE_DOCUMENT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               'sample_documents', 'safety_policy_2023.md')
+
+
+def pairwise_trace(clauses, text, threshold=80):
+    """The original one-pair-at-a-time implementation, kept as the reference"""
+    paragraphs = [p.strip() for p in text.split('\n') if p.strip()]
+    results = {}
+    for clause_name, clause_info in clauses.items():
+        matched = []
+        for keyword in clause_info.get("keywords", []):
+            for i, paragraph in enumerate(paragraphs):
+                if fuzz.partial_ratio(keyword.lower(), paragraph.lower()) >= threshold:
+                    matched.append({"paragraph_number": i + 1, "snippet": paragraph, "keyword": keyword})
+        results[clause_info.get("id") or clause_name] = matched
+    return results
+
+
+def best_of(runs, fn, *args):
+    timings = []
+    result = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, default=50, help="Copies of the sample document to concatenate")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per implementation; the best is reported")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    with open(SAMPLE_DOCUMENT, 'r') as f:
+        text = "\n".join([f.read()] * args.copies)
+    paragraphs = len([p for p in text.split('\n') if p.strip()])
+
+    tracer = ClauseTracer()
+    fuzzy_clauses = {name: dict(info, match="fuzzy") for name, info in tracer.clauses.items()}
+    fuzzy_engine = RuleEngine(fuzzy_clauses, tracer.matcher)
+    baseline_seconds, baseline = best_of(args.runs, pairwise_trace, fuzzy_clauses, text)
+    batched_seconds, batched = best_of(args.runs, fuzzy_engine.scan, text)
+    configured_seconds, _ = best_of(args.runs, tracer.trace_clauses, text)
+
+    keywords = list(dict.fromkeys(k.lower() for info in fuzzy_clauses.values() for k in info.get("keywords", [])))
+    lowered = [p.strip().lower() for p in text.split('\n') if p.strip()]
+    candidates = tracer.matcher._candidates(keywords, lowered)
+
+    legacy_fields = ("paragraph_number", "snippet", "keyword")
+    identical = baseline == {
+        fuzzy_clauses[name].get("id") or name: [{field: hit[field] for field in legacy_fields} for hit in hits]
+        for name, hits in batched.items()
+    }
+    report = {
+        "paragraphs": paragraphs,
+        "clauses": len(tracer.clauses),
+        "pairwise_seconds": round(baseline_seconds, 4),
+        "batched_seconds": round(batched_seconds, 4),
+        "speedup": round(baseline_seconds / batched_seconds, 2) if batched_seconds else None,
+        "pairs": len(keywords) * paragraphs,
+        "scored_pairs": sum(len(indices) for indices in candidates.values()),
+        "configured_modes_seconds": round(configured_seconds, 4),
+        "identical": identical,
+    }
+    if args.json:
+        print(json.dumps(report))
+    else:
+        for key, value in report.items():
+            print(f"{key:>24}: {value}")
+    return 0 if identical else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
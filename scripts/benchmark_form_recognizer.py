@@ -0,0 +1,113 @@
+"""
+Measure Form Recognizer extraction throughput at different concurrency limits.
+
+Starts the mock service from mock_form_recognizer.py in-process unless --endpoint is
+given, then analyzes --documents synthetic PDFs of each size at once through one
+FormRecognizerClient per --concurrency value, and reports the wall time, pages per
+second and what the mock saw (calls, throttled calls, most operations running at once).
+
+Usage:
+    python scripts/benchmark_form_recognizer.py --pages 10 100 --concurrency 1 8
+    python scripts/benchmark_form_recognizer.py --endpoint https://<resource>.cognitiveservices.azure.com --key <key>
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generate_documents import generate
+
+
+def start_mock(seconds_per_page, requests_per_second):
+    """Serve the mock on a free local port from a background thread; returns its URL"""
+    import uvicorn
+    from mock_form_recognizer import create_app
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(seconds_per_page, requests_per_second), host="127.0.0.1", port=port, log_level="warning"
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def mock_stats(endpoint, reset=False):
+    import httpx
+
+    return httpx.request("DELETE" if reset else "GET", f"{endpoint}/stats").json()
+
+
+async def run(endpoint, key, documents, concurrency, args):
+    from app.services.form_recognizer import FormRecognizerClient
+
+    client = FormRecognizerClient(
+        endpoint, key,
+        max_connections=max(concurrency, 1),
+        max_concurrent=concurrency,
+        requests_per_second=args.requests_per_second,
+        pages_per_request=args.pages_per_request,
+        poll_interval=args.poll_interval,
+    )
+    try:
+        started = time.perf_counter()
+        results = await asyncio.gather(*(client.extract_pages(document) for document in documents))
+        return time.perf_counter() - started, sum(len(pages) for pages in results)
+    finally:
+        await client.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint", help="Form Recognizer endpoint; defaults to an in-process mock")
+    parser.add_argument("--key", default="mock")
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100], help="Document sizes in pages")
+    parser.add_argument("--documents", type=int, default=4, help="Documents analyzed at once")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8], help="Analyze operations in flight")
+    parser.add_argument("--pages-per-request", type=int, default=16)
+    parser.add_argument("--requests-per-second", type=float, default=15.0)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--seconds-per-page", type=float, default=0.05, help="Mock analysis time per page")
+    parser.add_argument("--documents-dir", default=os.path.join(ROOT, "benchmark_documents"),
+                        help="Directory generated documents are cached in")
+    args = parser.parse_args()
+
+    endpoint = args.endpoint or start_mock(args.seconds_per_page, args.requests_per_second)
+    results = []
+    for pages in args.pages:
+        path = generate(args.documents_dir, pages, "pdf", 0.1)
+        with open(path, "rb") as f:
+            document = f.read()
+        for concurrency in args.concurrency:
+            if not args.endpoint:
+                mock_stats(endpoint, reset=True)
+            seconds, extracted = asyncio.run(run(endpoint, args.key, [document] * args.documents, concurrency, args))
+            result = {
+                "pages": pages,
+                "documents": args.documents,
+                "concurrency": concurrency,
+                "seconds": round(seconds, 3),
+                "pages_per_second": round(extracted / seconds, 1),
+                "pages_extracted": extracted,
+            }
+            if not args.endpoint:
+                result["service"] = mock_stats(endpoint)
+            results.append(result)
+            print(f"{pages:>6}p x{args.documents} concurrency {concurrency:>3}: {result['seconds']:.2f}s "
+                  f"({result['pages_per_second']} pages/s)", file=sys.stderr)
+    print(json.dumps({"endpoint": endpoint, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Report what importing a module costs, using ``python -X importtime`` in a fresh
+interpreter, and check that heavy libraries stay out of the API's startup path.
+
+Prints the wall time of the import, the slowest modules by cumulative time and which
+of the heavy libraries were loaded. Exits non-zero if any of those were imported or
+the import took longer than --max-seconds.
+
+Usage:
+    python scripts/benchmark_import_time.py
+    python scripts/benchmark_import_time.py --module app.main --max-seconds 1 --json
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries that belong to the inference path only
+HEAVY_MODULES = ["spacy", "torch", "transformers", "fitz", "PyPDF2", "docx", "optimum"]
+
+LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+PROBE = """
+import sys, time
+started = time.perf_counter()
+import {module}
+print(time.perf_counter() - started)
+"""
+
+
+def measure(module, python=sys.executable):
+    """Import ``module`` in a fresh interpreter; returns (wall seconds, [(module, self us, cumulative us, depth)])"""
+    completed = subprocess.run(
+        [python, "-X", "importtime", "-c", PROBE.format(module=module)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+    imports = []
+    for line in completed.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return float(completed.stdout.strip().splitlines()[-1]), imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main", help="Module to import")
+    parser.add_argument("--top", type=int, default=20, help="Slowest modules to list")
+    parser.add_argument("--max-seconds", type=float, help="Fail if the import takes longer than this")
+    parser.add_argument("--allow", nargs="*", default=[], help="Heavy modules that may be imported")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    seconds, imports = measure(args.module)
+    loaded = {name for name, _, _, _ in imports}
+    heavy = [name for name in HEAVY_MODULES if name in loaded and name not in args.allow]
+    # Only the module itself and top-level packages, so submodules are not counted twice
+    slowest = sorted(
+        (entry for entry in imports if "." not in entry[0] or entry[0] == args.module),
+        key=lambda entry: -entry[2]
+    )[:args.top]
+    report = {
+        "module": args.module,
+        "seconds": round(seconds, 3),
+        "modules_imported": len(imports),
+        "heavy_modules": heavy,
+        "slowest": [
+            {"module": name, "cumulative_ms": round(cumulative / 1000, 1), "self_ms": round(own / 1000, 1)}
+            for name, own, cumulative, _ in slowest
+        ],
+    }
+
+    failures = []
+    if heavy:
+        failures.append(f"heavy modules imported: {', '.join(heavy)}")
+    if args.max_seconds is not None and seconds > args.max_seconds:
+        failures.append(f"import took {seconds:.2f}s, over {args.max_seconds}s")
+    report["failures"] = failures
+
+    if args.json:
+        print(json.dumps(report))
+    else:
+        print(f"import {args.module}: {report['seconds']}s, {report['modules_imported']} modules")
+        for entry in report["slowest"]:
+            print(f"{entry['cumulative_ms']:>10.1f} ms  {entry['module']}")
+        for failure in failures:
+            print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
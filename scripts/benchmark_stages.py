@@ -0,0 +1,163 @@
+"""
+Time every analysis stage separately on synthetic documents of increasing size.
+
+Stages are extract_text, extract_entities, generate_summary, analyze_compliance and
+trace_clauses, each called directly on a DocumentProcessor with models preloaded, so
+model loading is reported once and kept out of the stage timings. As in the API, the
+analyzers share one parsed representation of the document. Results are written
+as JSON. With --baseline the run fails when a stage's median is slower than the stored
+one by more than --tolerance (and by at least --min-delta seconds, to ignore noise on
+very fast stages).
+
+Usage:
+    python scripts/benchmark_stages.py --pages 1 10 100 --output benchmark.json
+    python scripts/benchmark_stages.py --pages 1 10 100 --baseline benchmarks/baseline.json
+    python scripts/benchmark_stages.py --pages 1 10 100 --baseline benchmarks/baseline.json --update-baseline
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generate_documents import generate
+
+STAGES = ["extract_text", "extract_entities", "generate_summary", "analyze_compliance", "trace_clauses"]
+
+
+def stage_functions(processor):
+    """Each stage as a function of the document path and its parsed text"""
+    return {
+        "extract_text": lambda path, document: processor.parse(path),
+        "extract_entities": lambda path, document: processor.extract_entities(document),
+        "generate_summary": lambda path, document: processor.generate_summary(document),
+        "analyze_compliance": lambda path, document: processor.analyze_compliance(document),
+        "trace_clauses": lambda path, document: processor.clause_tracer.trace_clauses(document),
+    }
+
+
+def time_runs(runs, fn, *args):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def result_key(result):
+    return f"{result['format']}/{result['pages']}p/{result['stage']}"
+
+
+def compare(results, baseline, tolerance, min_delta):
+    """Stages slower than the baseline beyond both thresholds"""
+    previous = {result_key(result): result for result in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get(result_key(result))
+        if before is None:
+            continue
+        delta = result["median_seconds"] - before["median_seconds"]
+        if delta > min_delta and delta > before["median_seconds"] * tolerance:
+            regressions.append({
+                "key": result_key(result),
+                "baseline_seconds": before["median_seconds"],
+                "median_seconds": result["median_seconds"],
+                "ratio": round(result["median_seconds"] / before["median_seconds"], 2)
+                if before["median_seconds"] else None,
+            })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000], help="Document sizes in pages")
+    parser.add_argument("--formats", nargs="+", choices=["pdf", "docx"], default=["pdf", "docx"])
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--clause-density", type=float, default=0.1,
+                        help="Share of paragraphs that state a compliance clause (0-1)")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per stage and document")
+    parser.add_argument("--documents", default=os.path.join(ROOT, "benchmark_documents"),
+                        help="Directory generated documents are cached in")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Overwrite --baseline with this run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown as a fraction of the baseline")
+    parser.add_argument("--min-delta", type=float, default=0.05, help="Slowdowns below this many seconds are ignored")
+    args = parser.parse_args()
+
+    from app.core.config import get_settings
+    from app.services.document_processor import DocumentProcessor
+    from app.services.model_registry import get_model_registry
+
+    settings = get_settings()
+    started = time.perf_counter()
+    registry = get_model_registry()
+    registry.preload(warmup=True)
+    load_seconds = time.perf_counter() - started
+    processor = DocumentProcessor(registry)
+    functions = stage_functions(processor)
+
+    results = []
+    for file_format in args.formats:
+        for pages in args.pages:
+            path = generate(args.documents, pages, file_format, args.clause_density)
+            document = processor.parse(path)
+            for stage in args.stages:
+                timings = time_runs(args.runs, functions[stage], path, document)
+                result = {
+                    "format": file_format,
+                    "pages": pages,
+                    "characters": len(document.text),
+                    "stage": stage,
+                    "runs": args.runs,
+                    "min_seconds": round(min(timings), 4),
+                    "median_seconds": round(statistics.median(timings), 4),
+                }
+                results.append(result)
+                print(f"{result_key(result):>36}: {result['median_seconds']:.4f}s", file=sys.stderr)
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "spacy_model": settings.SPACY_MODEL,
+            "summarizer_model": settings.SUMMARIZER_MODEL,
+            "summarizer_backend": settings.SUMMARIZER_BACKEND,
+        },
+        "clause_density": args.clause_density,
+        "model_load_seconds": round(load_seconds, 2),
+        "results": results,
+    }
+
+    status = 0
+    if args.baseline and not args.update_baseline:
+        with open(args.baseline, 'r') as f:
+            report["regressions"] = compare(results, json.load(f), args.tolerance, args.min_delta)
+        for regression in report["regressions"]:
+            print(f"REGRESSION {regression['key']}: {regression['baseline_seconds']}s -> "
+                  f"{regression['median_seconds']}s", file=sys.stderr)
+        status = 1 if report["regressions"] else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if args.baseline and args.update_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            f.write(output + "\n")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Compare summarizer backends on the sample documents: load time, per-document latency,
+peak memory, and ROUGE of each backend's summaries against the fp32 pipeline's.
+Each backend runs in its own process so memory figures do not overlap.
+
+Usage:
+    python scripts/benchmark_summarizer.py --backends pipeline quantized onnx --runs 3
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SAMPLE_DOCUMENTS = sorted(glob.glob(os.path.join(ROOT, 'sample_documents', '*')))
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_backend(backend, documents, runs):
+    """Load one backend and summarize every document, in a fresh process"""
+    from app.core.config import get_settings
+    from app.services.summarization import SummarizationService, SummaryBatcher
+    from app.services.summarizer_backends import load_summarizer
+
+    settings = get_settings()
+    baseline_rss = peak_rss_mb()
+    started = time.perf_counter()
+    summarizer = load_summarizer(settings, backend)
+    load_seconds = time.perf_counter() - started
+    # No collection window: documents are summarized one at a time here
+    service = SummarizationService(summarizer, SummaryBatcher(summarizer, window_seconds=0))
+
+    summaries, latencies = [], []
+    for path in documents:
+        with open(path, 'r') as f:
+            text = f.read()
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            summary = service.summarize(text)
+            timings.append(time.perf_counter() - started)
+        summaries.append(summary)
+        latencies.append(min(timings))
+    return {
+        "backend": backend,
+        "load_seconds": round(load_seconds, 2),
+        "mean_latency_seconds": round(sum(latencies) / len(latencies), 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "model_rss_mb": round(peak_rss_mb() - baseline_rss, 1),
+        "summaries": summaries,
+    }
+
+
+def _ngrams(tokens, n):
+    counts = {}
+    for i in range(len(tokens) - n + 1):
+        gram = tuple(tokens[i:i + n])
+        counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+def _f1(overlap, candidate_total, reference_total):
+    if not overlap or not candidate_total or not reference_total:
+        return 0.0
+    precision = overlap / candidate_total
+    recall = overlap / reference_total
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge(candidate, reference):
+    """ROUGE-1, ROUGE-2 and ROUGE-L F1 over lowercased whitespace tokens"""
+    cand, ref = candidate.lower().split(), reference.lower().split()
+    scores = {}
+    for n in (1, 2):
+        c, r = _ngrams(cand, n), _ngrams(ref, n)
+        overlap = sum(min(count, r.get(gram, 0)) for gram, count in c.items())
+        scores[f"rouge{n}"] = _f1(overlap, sum(c.values()), sum(r.values()))
+    # Longest common subsequence
+    previous = [0] * (len(ref) + 1)
+    for token in cand:
+        current = [0]
+        for j, other in enumerate(ref):
+            current.append(previous[j] + 1 if token == other else max(previous[j + 1], current[j]))
+        previous = current
+    scores["rougeL"] = _f1(previous[-1], len(cand), len(ref))
+    return scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["pipeline", "quantized", "onnx"])
+    parser.add_argument("--documents", nargs="+", default=SAMPLE_DOCUMENTS, help="Text or markdown files to summarize")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per document; the best is reported")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    backends = ["pipeline"] + [b for b in args.backends if b != "pipeline"]
+    context = multiprocessing.get_context("spawn")
+    reports = []
+    for backend in backends:
+        with context.Pool(1) as pool:
+            try:
+                reports.append(pool.apply(run_backend, (backend, args.documents, args.runs)))
+            except Exception as e:
+                reports.append({"backend": backend, "error": str(e)})
+
+    reference = reports[0].get("summaries")
+    for report in reports:
+        summaries = report.pop("summaries", None)
+        if summaries is None or reference is None:
+            continue
+        scores = [rouge(candidate, ref) for candidate, ref in zip(summaries, reference)]
+        for key in ("rouge1", "rouge2", "rougeL"):
+            report[key] = round(sum(score[key] for score in scores) / len(scores), 4)
+
+    if args.json:
+        print(json.dumps(reports))
+    else:
+        for report in reports:
+            print(" ".join(f"{key}={value}" for key, value in report.items()))
+    return 0 if all("error" not in report for report in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
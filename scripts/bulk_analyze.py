@@ -0,0 +1,207 @@
+"""
+Analyze every document under a directory tree with a pool of worker processes and
+write one JSON line per document.
+
+Each worker loads the models once and then analyzes documents one after another.
+Workers leave the database alone: they run without the result and paragraph caches,
+and the documents they analyze are stored, with the portfolio aggregates, by this
+process alone, so SQLite never sees concurrent writers. Finished paths are appended to
+a checkpoint file, so running the same command again after an interruption skips
+everything already written. If a worker process dies, the pool is replaced and the
+documents that were in flight are tried again one at a time; a document that takes a
+second pool down with it is recorded as failed.
+
+Usage:
+    python scripts/bulk_analyze.py /data/site-archive --output results.jsonl --workers 8
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_processor = None
+_saves = []
+
+# Broken pools a document may be in flight in before it is recorded as failed
+MAX_ATTEMPTS = 2
+
+
+class _DeferredStore:
+    """Stands in for the document store in workers, recording saves for the parent to apply"""
+
+    def save(self, document_hash, filename, document, result, **kwargs):
+        # Only the text crosses back; the parent parses it again
+        _saves.append((document_hash, filename, getattr(document, "text", document), result, kwargs))
+
+
+def _init_worker(threads_per_worker):
+    """Load the models once per worker process"""
+    global _processor
+    # Read by the settings on first use, so they must be set before the app is imported.
+    # A worker's share of the cores bounds its own PDF extraction pool.
+    os.environ["PDF_EXTRACTION_WORKERS"] = str(threads_per_worker)
+    os.environ["RESULT_CACHE_ENABLED"] = "false"
+    os.environ["INCREMENTAL_ANALYSIS_ENABLED"] = "false"
+    os.environ["DOCUMENT_STORE_ENABLED"] = "false"
+    os.environ["OCR_CACHE_ENABLED"] = "false"
+    try:
+        import torch
+        # Workers share the cores; keep each one from spawning a thread per core
+        torch.set_num_threads(threads_per_worker)
+    except ImportError:
+        pass
+    from app.core.config import get_settings
+    from app.services.document_processor import DocumentProcessor
+    from app.services.model_registry import get_model_registry
+
+    registry = get_model_registry()
+    registry.preload(warmup=get_settings().WARMUP_MODELS)
+    _processor = DocumentProcessor(registry)
+    _processor.document_store = _DeferredStore()
+
+
+def _analyze(path, relative_path):
+    """Analyze one document; returns its JSONL record and the store writes it asked for"""
+    started = time.perf_counter()
+    del _saves[:]
+    try:
+        with open(path, 'rb') as f:
+            result = _processor.process_content(os.path.basename(path), f.read())
+        record = {"path": relative_path, "status": "completed", "result": result}
+    except Exception as e:
+        record = {"path": relative_path, "status": "failed", "error": getattr(e, "detail", None) or str(e)}
+    record["seconds"] = round(time.perf_counter() - started, 3)
+    return record, list(_saves)
+
+
+def _new_pool(workers, threads_per_worker):
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_worker, initargs=(threads_per_worker,))
+
+
+def _open_store():
+    """The document store the parent writes to, or None when DOCUMENT_STORE_ENABLED is off"""
+    from app.core.config import get_settings
+    from app.services.document_store import get_document_store
+
+    if not get_settings().DOCUMENT_STORE_ENABLED:
+        return None
+    return get_document_store()
+
+
+def _store(store, saves, path):
+    for document_hash, filename, text, result, kwargs in saves:
+        try:
+            store.save(document_hash, filename, text, result, **kwargs)
+        except Exception as e:
+            print(f"[store failed] {path}: {str(e)}", file=sys.stderr)
+
+
+def find_documents(root, extensions):
+    """Supported files under root, as (absolute path, path relative to root), in a stable order"""
+    for directory, subdirectories, filenames in os.walk(root):
+        subdirectories.sort()
+        for filename in sorted(filenames):
+            if os.path.splitext(filename)[1].lower().lstrip(".") in extensions:
+                path = os.path.join(directory, filename)
+                yield path, os.path.relpath(path, root)
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path, 'r') as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root", help="Directory to analyze recursively")
+    parser.add_argument("--output", default="results.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("--checkpoint", help="File of finished paths (default: OUTPUT.checkpoint)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--extensions", nargs="+", default=["pdf", "docx"], help="File extensions to analyze")
+    args = parser.parse_args()
+
+    checkpoint_path = args.checkpoint or f"{args.output}.checkpoint"
+    done = load_checkpoint(checkpoint_path)
+    extensions = {extension.lower().lstrip(".") for extension in args.extensions}
+    documents = ((path, rel) for path, rel in find_documents(args.root, extensions) if rel not in done)
+    threads_per_worker = max(1, (os.cpu_count() or 1) // args.workers)
+
+    store = _open_store()
+    counts = {"completed": 0, "failed": 0, "skipped": len(done)}
+    started = time.perf_counter()
+    attempts = {}
+    retries = deque()
+    pool = _new_pool(args.workers, threads_per_worker)
+    try:
+        with open(args.output, 'a') as output, open(checkpoint_path, 'a') as checkpoint:
+            pending = {}
+            exhausted = False
+            while pending or retries or not exhausted:
+                # Keep every worker busy without queueing the whole tree up front
+                while len(pending) < args.workers * 2:
+                    if retries:
+                        # Survivors of a broken pool run one at a time, so the next crash is theirs alone
+                        if not pending:
+                            document = retries.popleft()
+                            pending[pool.submit(_analyze, *document)] = document
+                        break
+                    document = None if exhausted else next(documents, None)
+                    if document is None:
+                        exhausted = True
+                        break
+                    pending[pool.submit(_analyze, *document)] = document
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                broken = any(isinstance(future.exception(), BrokenProcessPool) for future in finished)
+                if broken:
+                    # Everything in flight fails with the pool; settle it all before replacing it
+                    finished, _ = wait(pending)
+                for future in finished:
+                    document = pending.pop(future)
+                    try:
+                        record, saves = future.result()
+                    except BrokenProcessPool as e:
+                        attempts[document] = attempts.get(document, 0) + 1
+                        if attempts[document] < MAX_ATTEMPTS:
+                            retries.append(document)
+                            continue
+                        record = {"path": document[1], "status": "failed", "seconds": None,
+                                  "error": f"Worker process died: {str(e)}"}
+                        saves = []
+                    if store is not None:
+                        _store(store, saves, record["path"])
+                    output.write(json.dumps(record, default=str) + "\n")
+                    output.flush()
+                    # Only checkpoint once the result line is safely written
+                    checkpoint.write(record["path"] + "\n")
+                    checkpoint.flush()
+                    counts[record["status"]] += 1
+                    took = "" if record["seconds"] is None else f" ({record['seconds']}s)"
+                    print(f"[{record['status']}] {record['path']}{took}", file=sys.stderr)
+                if broken:
+                    print("[pool broken] a worker process died; starting a new pool", file=sys.stderr)
+                    pool.shutdown(wait=False)
+                    pool = _new_pool(args.workers, threads_per_worker)
+    finally:
+        pool.shutdown()
+
+    elapsed = time.perf_counter() - started
+    processed = counts["completed"] + counts["failed"]
+    print(json.dumps(dict(counts, seconds=round(elapsed, 1),
+                          documents_per_second=round(processed / elapsed, 2) if elapsed else None)))
+    return 0 if counts["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
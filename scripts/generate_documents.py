@@ -0,0 +1,115 @@
+"""
+Generate synthetic safety documents as PDF (PyMuPDF) or DOCX (python-docx), entirely
+offline. Every page holds the same number of paragraphs; ``--clause-density`` is the
+share of paragraphs that state a compliance clause, the rest is neutral filler. The
+same seed always produces the same document.
+
+Usage:
+    python scripts/generate_documents.py --pages 1 10 100 1000 --formats pdf docx --output benchmark_documents
+"""
+import argparse
+import os
+import random
+import sys
+
+# Each sentence satisfies at least one clause of analyze_compliance and of the clause tracer
+CLAUSE_SENTENCES = [
+    "All employees must complete the safety training program and keep their training records current.",
+    "Required PPE for this activity includes personal protective equipment such as hard hats and safety gear.",
+    "The emergency response plan sets out the evacuation plan, assembly points and first aid arrangements.",
+    "Every incident report and near miss is logged within 24 hours and followed by an incident investigation.",
+    "A risk assessment with hazard identification is carried out before work starts and reviewed yearly.",
+    "Management states its commitment to health and safety and assigns responsibility for safety performance.",
+    "Emergency drills, including an evacuation drill and a fire drill, are held every quarter.",
+    "Supervisors verify safety certification and competency assessment of every contractor on site.",
+]
+
+FILLER_SUBJECTS = ["The site", "The warehouse team", "Operations", "The quarterly review", "Maintenance",
+                   "The logistics group", "Facilities", "The project office", "Procurement", "The night shift"]
+FILLER_VERBS = ["coordinates", "reviews", "documents", "schedules", "tracks", "updates", "plans", "reports on"]
+FILLER_OBJECTS = ["delivery windows", "inventory levels", "equipment budgets", "staffing rosters",
+                  "vendor contracts", "floor layouts", "parking arrangements", "office supplies",
+                  "cleaning schedules", "meeting minutes", "production targets", "shipping manifests"]
+FILLER_TAILS = ["for the coming month", "with the regional office", "every Monday morning",
+                "before the end of each quarter", "in the shared planning sheet", "as agreed with the client"]
+
+PARAGRAPHS_PER_PAGE = 6
+SENTENCES_PER_PARAGRAPH = 5
+
+
+def _filler_sentence(rng):
+    return (f"{rng.choice(FILLER_SUBJECTS)} {rng.choice(FILLER_VERBS)} "
+            f"{rng.choice(FILLER_OBJECTS)} {rng.choice(FILLER_TAILS)}.")
+
+
+def generate_pages(pages, clause_density=0.1, seed=0):
+    """Paragraphs of every page, as a list of pages"""
+    rng = random.Random(seed)
+    result = []
+    for _ in range(pages):
+        paragraphs = []
+        for _ in range(PARAGRAPHS_PER_PAGE):
+            sentences = [_filler_sentence(rng) for _ in range(SENTENCES_PER_PARAGRAPH)]
+            if rng.random() < clause_density:
+                sentences[rng.randrange(len(sentences))] = rng.choice(CLAUSE_SENTENCES)
+            paragraphs.append(" ".join(sentences))
+        result.append(paragraphs)
+    return result
+
+
+def write_pdf(path, pages):
+    import fitz
+
+    document = fitz.open()
+    for paragraphs in pages:
+        page = document.new_page()
+        rect = page.rect + (50, 50, -50, -50)
+        page.insert_textbox(rect, "\n\n".join(paragraphs), fontsize=10, fontname="helv")
+    document.save(path, garbage=3, deflate=True)
+    document.close()
+
+
+def write_docx(path, pages):
+    from docx import Document
+
+    document = Document()
+    for number, paragraphs in enumerate(pages):
+        if number:
+            document.add_page_break()
+        for paragraph in paragraphs:
+            document.add_paragraph(paragraph)
+    document.save(path)
+
+
+WRITERS = {"pdf": write_pdf, "docx": write_docx}
+
+
+def generate(output_dir, pages, file_format, clause_density=0.1, seed=0):
+    """Write one synthetic document, reusing it if it already exists; returns its path"""
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"synthetic-{pages}p-d{clause_density:g}-s{seed}.{file_format}")
+    if not os.path.exists(path):
+        partial = f"{path}.partial"
+        WRITERS[file_format](partial, generate_pages(pages, clause_density, seed))
+        os.replace(partial, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000], help="Page counts")
+    parser.add_argument("--formats", nargs="+", choices=sorted(WRITERS), default=["pdf", "docx"])
+    parser.add_argument("--clause-density", type=float, default=0.1,
+                        help="Share of paragraphs that state a compliance clause (0-1)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_documents", help="Directory to write documents to")
+    args = parser.parse_args()
+
+    for file_format in args.formats:
+        for pages in args.pages:
+            print(generate(args.output, pages, file_format, args.clause_density, args.seed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
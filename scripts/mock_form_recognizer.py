@@ -0,0 +1,165 @@
+"""
+A local stand-in for the Azure Form Recognizer analyze API, so the Form Recognizer
+backend can be tested and benchmarked offline.
+
+Implements analyze (POST /formrecognizer/documentModels/{model}:analyze, answered with
+202 and an Operation-Location) and result polling (GET .../analyzeResults/{id}). PDF pages
+are read with PyMuPDF and reported as layout lines. An operation runs for
+--seconds-per-page per page before it succeeds, and calls beyond --requests-per-second
+get 429 with Retry-After, as the real service throttles. GET /stats reports calls,
+throttled calls and the most operations that were running at once; DELETE /stats
+resets them.
+
+Usage:
+    python scripts/mock_form_recognizer.py --port 5050
+    FORM_RECOGNIZER_ENABLED=true AZURE_FORM_RECOGNIZER_ENDPOINT=http://127.0.0.1:5050 \\
+        AZURE_FORM_RECOGNIZER_KEY=mock uvicorn app.main:app
+"""
+import argparse
+import threading
+import time
+import uuid
+from collections import deque
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+
+def analyze_pdf(document, model_id, api_version):
+    """An analyzeResult for a PDF, with one layout line per line of PyMuPDF text"""
+    import fitz  # PyMuPDF
+
+    content = []
+    pages = []
+    offset = 0
+    with fitz.open(stream=document, filetype="pdf") as doc:
+        for number, page in enumerate(doc, start=1):
+            lines = []
+            start = offset
+            for text in page.get_text().splitlines():
+                if not text.strip():
+                    continue
+                lines.append({"content": text, "polygon": [], "spans": [{"offset": offset, "length": len(text)}]})
+                content.append(text)
+                offset += len(text) + 1
+            pages.append({
+                "pageNumber": number,
+                "angle": 0,
+                "width": round(page.rect.width / 72, 4),
+                "height": round(page.rect.height / 72, 4),
+                "unit": "inch",
+                "words": [],
+                "lines": lines,
+                "spans": [{"offset": start, "length": offset - start}],
+            })
+    return {
+        "apiVersion": api_version,
+        "modelId": model_id,
+        "content": "\n".join(content),
+        "pages": pages,
+        "paragraphs": [],
+        "tables": [],
+    }
+
+
+def error(status, code, message, headers=None):
+    return JSONResponse({"error": {"code": code, "message": message}}, status_code=status, headers=headers)
+
+
+def create_app(seconds_per_page=0.05, requests_per_second=15.0, key=None):
+    app = FastAPI(title="Mock Form Recognizer")
+    lock = threading.Lock()
+    calls = deque()
+    operations = {}
+    stats = {"analyze_calls": 0, "poll_calls": 0, "throttled": 0, "pages": 0, "max_running": 0}
+
+    def throttled():
+        """Admit at most requests_per_second calls in any one-second window"""
+        now = time.monotonic()
+        with lock:
+            while calls and calls[0] <= now - 1:
+                calls.popleft()
+            if len(calls) >= requests_per_second:
+                stats["throttled"] += 1
+                return True
+            calls.append(now)
+            return False
+
+    def rejected(request):
+        if key is not None and request.headers.get("ocp-apim-subscription-key") != key:
+            return error(401, "401", "Access denied due to invalid subscription key")
+        if throttled():
+            return error(429, "429", "Rate limit is exceeded", headers={"Retry-After": "1"})
+        return None
+
+    @app.post("/formrecognizer/documentModels/{model_id}:analyze")
+    async def analyze(model_id: str, request: Request):
+        response = rejected(request)
+        if response is not None:
+            return response
+        api_version = request.query_params.get("api-version", "2023-07-31")
+        try:
+            result = analyze_pdf(await request.body(), model_id, api_version)
+        except Exception as e:
+            return error(400, "InvalidRequest", f"Invalid request: {str(e)}")
+        result_id = uuid.uuid4().hex
+        now = time.monotonic()
+        with lock:
+            operations[result_id] = (now + seconds_per_page * len(result["pages"]), result)
+            running = sum(1 for ready_at, _ in operations.values() if ready_at > now)
+            stats["analyze_calls"] += 1
+            stats["pages"] += len(result["pages"])
+            stats["max_running"] = max(stats["max_running"], running)
+        location = f"{str(request.base_url).rstrip('/')}/formrecognizer/documentModels/{model_id}/analyzeResults/{result_id}?api-version={api_version}"
+        return Response(status_code=202, headers={"Operation-Location": location, "Retry-After": "1"})
+
+    @app.get("/formrecognizer/documentModels/{model_id}/analyzeResults/{result_id}")
+    async def analyze_result(model_id: str, result_id: str, request: Request):
+        response = rejected(request)
+        if response is not None:
+            return response
+        with lock:
+            stats["poll_calls"] += 1
+            operation = operations.get(result_id)
+        if operation is None:
+            return error(404, "NotFound", "Resource not found")
+        ready_at, result = operation
+        remaining = ready_at - time.monotonic()
+        if remaining > 0:
+            # Hint a short wait, as the service does for small documents
+            retry = f"{min(1.0, max(0.05, remaining)):.2f}"
+            return JSONResponse({"status": "running"}, headers={"Retry-After": retry})
+        return {"status": "succeeded", "analyzeResult": result}
+
+    @app.get("/stats")
+    async def get_stats():
+        with lock:
+            return dict(stats)
+
+    @app.delete("/stats")
+    async def reset_stats():
+        with lock:
+            for name in stats:
+                stats[name] = 0
+            return dict(stats)
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5050)
+    parser.add_argument("--seconds-per-page", type=float, default=0.05, help="Simulated analysis time per page")
+    parser.add_argument("--requests-per-second", type=float, default=15.0, help="Calls allowed per second before 429")
+    parser.add_argument("--key", help="Require this Ocp-Apim-Subscription-Key")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    uvicorn.run(create_app(args.seconds_per_page, args.requests_per_second, args.key),
+                host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
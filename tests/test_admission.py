@@ -0,0 +1,188 @@
+import asyncio
+import io
+import json
+import threading
+import time
+import pytest
+from fastapi import UploadFile
+from starlette.requests import Request
+from app.api.endpoints import documents
+from app.services.admission import AdmissionController, AdmissionRejected
+from app.services.job_manager import JobManager
+
+
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected_with_429():
+    admission = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=5)
+    granted_at = await admission.acquire()
+    waiting = asyncio.ensure_future(admission.acquire())
+    await asyncio.sleep(0)
+    with pytest.raises(AdmissionRejected) as rejected:
+        await admission.acquire()
+    assert rejected.value.status_code == 429
+    assert 1 <= rejected.value.retry_after <= 60
+
+    admission.release(granted_at)
+    admission.release(await waiting)
+    stats = admission.stats()
+    assert (stats["running"], stats["queued"], stats["rejected_queue_full"]) == (0, 0, 1)
+
+
+@pytest.mark.asyncio
+async def test_wait_past_deadline_is_rejected_with_503():
+    admission = AdmissionController(max_concurrent=1, max_queue=5, queue_timeout=0.05)
+    granted_at = await admission.acquire()
+    with pytest.raises(AdmissionRejected) as rejected:
+        await admission.acquire()
+    assert rejected.value.status_code == 503
+    assert admission.stats()["queued"] == 0
+    admission.release(granted_at)
+    assert admission.stats()["running"] == 0
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_admitted_in_arrival_order():
+    admission = AdmissionController(max_concurrent=1, max_queue=3, queue_timeout=5)
+    granted_at = await admission.acquire()
+    order = []
+
+    async def analysis(name):
+        granted = await admission.acquire()
+        order.append(name)
+        admission.release(granted)
+
+    tasks = []
+    for name in "abc":
+        tasks.append(asyncio.ensure_future(analysis(name)))
+        await asyncio.sleep(0)
+    admission.release(granted_at)
+    await asyncio.gather(*tasks)
+    assert order == ["a", "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_gives_up_its_place():
+    admission = AdmissionController(max_concurrent=1, max_queue=2, queue_timeout=5)
+    granted_at = await admission.acquire()
+    waiting = asyncio.ensure_future(admission.acquire())
+    await asyncio.sleep(0)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert admission.stats()["queued"] == 0
+    admission.release(granted_at)
+    assert admission.stats()["running"] == 0
+
+
+def test_threads_share_the_limit():
+    admission = AdmissionController(max_concurrent=2, max_queue=0, queue_timeout=5)
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def analysis():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.pop()
+
+    threads = [threading.Thread(target=admission.run, args=(analysis,)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(peak) == 2
+    assert admission.stats()["admitted"] == 6
+    assert admission.stats()["running"] == 0
+
+
+def test_blocking_acquire_times_out_with_503():
+    admission = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout=5)
+    granted_at = admission.acquire_blocking()
+    with pytest.raises(AdmissionRejected) as rejected:
+        admission.acquire_blocking(timeout=0.05)
+    assert rejected.value.status_code == 503
+    admission.release(granted_at)
+    assert admission.stats()["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_slot_released_by_a_thread_wakes_the_loop():
+    admission = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=5)
+    granted_at = admission.acquire_blocking()
+    waiting = asyncio.ensure_future(admission.acquire())
+    await asyncio.sleep(0)
+    threading.Timer(0.02, admission.release, args=(granted_at,)).start()
+    admission.release(await asyncio.wait_for(waiting, 1))
+    assert admission.stats()["running"] == 0
+
+
+def test_run_gives_up_after_its_timeout():
+    admission = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout=5)
+    granted_at = admission.acquire_blocking()
+    with pytest.raises(AdmissionRejected) as rejected:
+        admission.run(lambda: "analyzed", timeout=0.05)
+    assert rejected.value.status_code == 503
+    admission.release(granted_at)
+    assert admission.run(lambda value: value, "analyzed", timeout=0.05) == "analyzed"
+
+
+def test_job_waiting_too_long_for_a_slot_fails_with_503():
+    admission = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout=0.05)
+    jobs = JobManager(max_workers=1, max_queue=1, result_ttl=60)
+    granted_at = admission.acquire_blocking()
+    try:
+        job = jobs.submit(admission.run, lambda: "analyzed", timeout=admission.queue_timeout)
+        deadline = time.monotonic() + 5
+        while not job.done and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        admission.release(granted_at)
+        jobs.shutdown(wait=True)
+    assert job.to_dict()["status"] == "failed"
+    assert job.to_dict()["status_code"] == 503
+
+
+class StubProcessor:
+    def iter_upload_analysis(self, upload):
+        try:
+            yield "complete", {"filename": upload.filename}
+        finally:
+            upload.cleanup()
+
+
+@pytest.fixture
+def stream_admission(monkeypatch):
+    admission = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout=5)
+    monkeypatch.setattr(documents, "get_admission_controller", lambda: admission)
+    monkeypatch.setattr(documents, "DocumentProcessor", StubProcessor)
+    return admission
+
+
+async def start_stream(admission):
+    file = UploadFile(io.BytesIO(b"Wear PPE at all times."), filename="rules.txt")
+    request = Request({"type": "http", "method": "POST", "headers": []})
+    response = await documents.upload_document_stream(request, file=file, site=None)
+    assert admission.stats()["running"] == 1
+    return response
+
+
+@pytest.mark.asyncio
+async def test_stream_never_sent_still_releases_its_slot(stream_admission):
+    response = await start_stream(stream_admission)
+    # The client went away before the body started: only the background task runs
+    await response.background()
+    assert stream_admission.stats()["running"] == 0
+    assert not documents.ongoing_uploads
+
+
+@pytest.mark.asyncio
+async def test_finished_stream_releases_its_slot_once(stream_admission):
+    response = await start_stream(stream_admission)
+    body = [chunk async for chunk in response.body_iterator]
+    await response.background()
+    assert json.loads(body[0])["event"] == "complete"
+    assert stream_admission.stats()["running"] == 0
+    assert stream_admission.stats()["admitted"] == 1
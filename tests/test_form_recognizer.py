@@ -0,0 +1,94 @@
+import os
+import sys
+import httpx
+import pytest
+from app.services.form_recognizer import FormRecognizerClient, FormRecognizerError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+from mock_form_recognizer import create_app  # noqa: E402
+
+ENDPOINT = "http://form-recognizer.test"
+
+
+def make_pdf(pages):
+    import fitz  # PyMuPDF
+
+    with fitz.open() as doc:
+        for number in range(1, pages + 1):
+            doc.new_page().insert_text((72, 72), f"Page {number} of the agreement")
+        return doc.tobytes()
+
+
+async def mock_stats(transport):
+    async with httpx.AsyncClient(transport=transport, base_url=ENDPOINT) as client:
+        return (await client.get("/stats")).json()
+
+
+def scripted(poll_body, poll_headers=None):
+    """A transport that accepts every analyze call and answers every poll with ``poll_body``"""
+    calls = {"analyze": 0, "poll": 0}
+
+    def handler(request):
+        if request.method == "POST":
+            calls["analyze"] += 1
+            return httpx.Response(202, headers={
+                "Operation-Location": f"{ENDPOINT}/operations/{calls['analyze']}", "Retry-After": "0"
+            })
+        calls["poll"] += 1
+        return httpx.Response(200, json=poll_body, headers=poll_headers or {"Retry-After": "0.05"})
+
+    return httpx.MockTransport(handler), calls
+
+
+@pytest.mark.asyncio
+async def test_batches_are_merged_and_renumbered():
+    transport = httpx.ASGITransport(app=create_app(seconds_per_page=0, requests_per_second=100))
+    client = FormRecognizerClient(ENDPOINT, "mock", pages_per_request=2, transport=transport)
+    try:
+        pages = await client.analyze(make_pdf(5))
+    finally:
+        await client.aclose()
+    assert [page["pageNumber"] for page in pages] == [1, 2, 3, 4, 5]
+    assert [page["lines"][0]["content"] for page in pages] == [f"Page {n} of the agreement" for n in range(1, 6)]
+    stats = await mock_stats(transport)
+    assert stats["analyze_calls"] == 3
+    assert stats["pages"] == 5
+
+
+@pytest.mark.asyncio
+async def test_throttled_calls_are_retried_after_the_hint():
+    transport = httpx.ASGITransport(app=create_app(seconds_per_page=0, requests_per_second=1))
+    client = FormRecognizerClient(ENDPOINT, "mock", pages_per_request=1, transport=transport)
+    try:
+        texts = await client.extract_pages(make_pdf(2))
+    finally:
+        await client.aclose()
+    assert texts == ["Page 1 of the agreement", "Page 2 of the agreement"]
+    stats = await mock_stats(transport)
+    assert stats["throttled"] >= 1
+    assert stats["analyze_calls"] == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_operation_raises():
+    transport, calls = scripted({"status": "failed", "error": {"code": "InvalidContent", "message": "Corrupt file"}})
+    client = FormRecognizerClient(ENDPOINT, "mock", transport=transport)
+    try:
+        with pytest.raises(FormRecognizerError, match="Corrupt file"):
+            await client.analyze(make_pdf(1))
+    finally:
+        await client.aclose()
+    assert calls == {"analyze": 1, "poll": 1}
+
+
+@pytest.mark.asyncio
+async def test_operation_that_never_finishes_times_out():
+    transport, calls = scripted({"status": "running"})
+    client = FormRecognizerClient(ENDPOINT, "mock", timeout=0.3, transport=transport)
+    try:
+        with pytest.raises(FormRecognizerError, match="did not finish"):
+            await client.analyze(make_pdf(1))
+    finally:
+        await client.aclose()
+    assert calls["poll"] >= 2
@@ -0,0 +1,67 @@
+import random
+from rapidfuzz import fuzz
+from app.services.fuzzy_matcher import FuzzyMatcher
+
+KEYWORDS = ["emergency drill", "personal protective equipment", "ppe", "safety training", "near miss"]
+
+
+def pairwise(keywords, paragraphs, threshold):
+    """The original scoring: one ``partial_ratio`` call per keyword and paragraph"""
+    return {
+        keyword.lower(): [
+            index for index, paragraph in enumerate(paragraphs)
+            if fuzz.partial_ratio(keyword.lower(), paragraph.lower()) >= threshold
+        ]
+        for keyword in keywords
+    }
+
+
+def test_matches_pairwise_scoring():
+    paragraphs = [
+        "All staff attend an emergency drill every quarter.",
+        "Personal protective equipment is mandatory.",
+        "PPE",
+        "Page 3",
+        "Emergncy dril",
+        "near-miss reports go to the safety officer",
+        "",
+        "7",
+    ]
+    for threshold in (60, 80, 95):
+        matcher = FuzzyMatcher(threshold=threshold, workers=1)
+        assert matcher.match(KEYWORDS, paragraphs) == pairwise(KEYWORDS, paragraphs, threshold)
+
+
+def test_unrelated_paragraphs_are_not_scored():
+    paragraphs = [
+        "All staff attend an emergency drill every quarter.",
+        "The canteen opens at noon and closes at three.",
+        "Visitors sign in at the front desk.",
+        "Section 4.2",
+    ]
+    candidates = FuzzyMatcher(threshold=80, workers=1)._candidates(["emergency drill"], [p.lower() for p in paragraphs])
+    assert candidates["emergency drill"].tolist() == [0]
+
+
+def test_prefilter_never_drops_a_match():
+    rng = random.Random(11)
+    scored = pairs = 0
+    for _ in range(300):
+        alphabet = rng.choice(["abcde ", "abcdefghijklmnopqrstuvwxyz ", "\u00e9\u00df\u4e00\u4e01\u4e02ab "])
+        keywords = list({"".join(rng.choice(alphabet) for _ in range(rng.randint(1, 20))) for _ in range(3)})
+        paragraphs = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 60))) for _ in range(6)]
+        # Plant a near match, so thresholds are reached as well as missed
+        paragraphs[1] = paragraphs[1][:5] + keywords[0][1:] + paragraphs[1][5:]
+        threshold = rng.choice([50, 70, 80, 90, 100])
+        matcher = FuzzyMatcher(threshold=threshold, workers=1)
+        assert matcher.match(keywords, paragraphs) == pairwise(keywords, paragraphs, threshold)
+        candidates = matcher._candidates(keywords, paragraphs)
+        scored += sum(len(indices) for indices in candidates.values())
+        pairs += len(keywords) * len(paragraphs)
+    # The filter is only worth having if it removes a good share of the scoring
+    assert scored < 0.75 * pairs
+
+
+def test_duplicate_keywords_are_scored_once():
+    matcher = FuzzyMatcher(threshold=80, workers=1)
+    assert matcher.match(["PPE", "ppe"], ["Wear PPE"]) == {"ppe": [0]}
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import httpx
+import pytest
+from app import main
+
+
+class StubRegistry:
+    """Stands in for the model registry; ``preload`` waits until the test releases it"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.warmup = None
+        self.loaded = False
+
+    def preload(self, warmup=True):
+        self.warmup = warmup
+        self.started.set()
+        self.release.wait(5)
+        self.loaded = self.error is None
+
+    @property
+    def ready(self):
+        return self.loaded
+
+    def status(self):
+        return {"spacy": {"loaded": self.loaded, "load_seconds": None, "warmup_seconds": None,
+                          "error": self.error if self.release.is_set() else None}}
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = StubRegistry()
+    shutdowns = []
+    monkeypatch.setattr(main, "get_model_registry", lambda: registry)
+    monkeypatch.setattr(main, "get_job_manager", lambda: type("Jobs", (), {"shutdown": lambda self: shutdowns.append("jobs")})())
+    monkeypatch.setattr(main, "shutdown_pool", lambda: shutdowns.append("pool"))
+    monkeypatch.setattr(main, "shutdown_form_recognizer", lambda: shutdowns.append("form_recognizer"))
+    monkeypatch.setattr(main.settings, "PRELOAD_MODELS", True)
+    monkeypatch.setattr(main.settings, "WARMUP_MODELS", False)
+    registry.shutdowns = shutdowns
+    return registry
+
+
+async def health_status(client):
+    response = await client.get("/health")
+    assert response.status_code == 200
+    return response.json()["status"]
+
+
+async def run_lifespan(registry):
+    """Enter the app lifespan in the background; returns the health status during and after preload"""
+    stop = asyncio.Event()
+    serving = asyncio.Event()
+
+    async def serve():
+        async with main.lifespan(main.app):
+            serving.set()
+            await stop.wait()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+        task = asyncio.ensure_future(serve())
+        assert await asyncio.to_thread(registry.started.wait, 5)
+        before = await health_status(client)
+        assert not serving.is_set()
+        registry.release.set()
+        await asyncio.wait_for(serving.wait(), 5)
+        after = await health_status(client)
+        stop.set()
+        await task
+    return before, after
+
+
+@pytest.mark.asyncio
+async def test_health_is_loading_until_preload_finishes(registry):
+    assert await run_lifespan(registry) == ("loading", "healthy")
+    assert registry.warmup is False
+    assert registry.shutdowns == ["jobs", "pool", "form_recognizer"]
+
+
+@pytest.mark.asyncio
+async def test_health_is_degraded_when_a_model_fails_to_load(registry):
+    registry.error = "model not found"
+    assert await run_lifespan(registry) == ("loading", "degraded")
+
+
+@pytest.mark.asyncio
+async def test_startup_skips_preload_when_disabled(registry, monkeypatch):
+    monkeypatch.setattr(main.settings, "PRELOAD_MODELS", False)
+    async with main.lifespan(main.app):
+        assert not registry.started.is_set()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            assert await health_status(client) == "loading"
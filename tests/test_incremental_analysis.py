@@ -0,0 +1,59 @@
+import re
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import create_engine
+from app.core.config import get_settings
+from app.services.incremental_analysis import IncrementalAnalyzer
+from app.services.ner_engine import NerEngine
+from app.services.paragraph_cache import ParagraphCache
+from app.services.parsed_document import ParsedDocument
+
+ORGANIZATION = re.compile(r"Acme\s+Corp")
+
+
+class StubNlp:
+    """Tags every "Acme Corp" as an organization, even when a line break splits it"""
+
+    max_length = 1_000_000
+    pipe_names = ["ner"]
+    pipeline = [("ner", None)]
+
+    def __init__(self):
+        self.texts = []
+
+    def pipe(self, texts, **kwargs):
+        for text in texts:
+            self.texts.append(text)
+            ents = [SimpleNamespace(text=m.group(), label_="ORG", start_char=m.start(), end_char=m.end())
+                    for m in ORGANIZATION.finditer(text)]
+            yield SimpleNamespace(ents=ents)
+
+
+@pytest.fixture
+def analyzer(tmp_path):
+    registry = SimpleNamespace(settings=get_settings(), nlp=StubNlp())
+    cache = ParagraphCache(create_engine(f"sqlite:///{tmp_path / 'paragraphs.db'}"), max_bytes=1_000_000)
+    return IncrementalAnalyzer(registry, cache)
+
+
+def test_entities_match_full_document_ner(analyzer):
+    document = ParsedDocument("Agreement between Acme\nCorp and the Buyer.\n\n  Acme Corp shall deliver.\n")
+    entities, stats = analyzer.extract_entities(document)
+    assert entities == NerEngine(StubNlp()).extract(document.text)
+    assert [document.text[e["start"]:e["end"]] for e in entities] == ["Acme\nCorp", "Acme Corp"]
+    assert stats == {"reused": 0, "computed": 1}
+
+
+def test_unchanged_chunks_are_reused(analyzer):
+    chunk_chars = get_settings().NER_CHUNK_CHARS
+    first = "Acme Corp signs.\n" * (chunk_chars // 17)
+    document = ParsedDocument(first + "Acme Corp pays.\n")
+    entities, _ = analyzer.extract_entities(document)
+
+    analyzer.registry.nlp.texts.clear()
+    revised = ParsedDocument(first + "Acme Corp pays in full.\n")
+    revised_entities, stats = analyzer.extract_entities(revised)
+    assert stats == {"reused": 1, "computed": 1}
+    assert analyzer.registry.nlp.texts == ["Acme Corp pays in full.\n"]
+    assert revised_entities == NerEngine(StubNlp()).extract(revised.text)
+    assert len(revised_entities) == len(entities)
@@ -0,0 +1,60 @@
+import random
+from app.services.keyword_matcher import KeywordMatcher
+
+KEYWORDS = ["ppe", "ppe kit", "hard hat", "hard", "safety", "safety training", "training", "fire", "fire safety"]
+
+
+def naive_hits(keywords, paragraphs):
+    """What the per-keyword ``keyword.lower() in para.lower()`` loop found"""
+    hits = {}
+    for index, paragraph in enumerate(paragraphs):
+        found = {keyword.lower() for keyword in keywords if keyword.lower() in paragraph.lower()}
+        if found:
+            hits[index] = found
+    return hits
+
+
+def naive_matches(keywords, text):
+    keywords = {keyword.lower() for keyword in keywords}
+    return sorted(
+        (start, keyword) for keyword in keywords
+        for start in range(len(text)) if text.startswith(keyword, start)
+    )
+
+
+def test_paragraph_hits_match_substring_check():
+    matcher = KeywordMatcher(KEYWORDS)
+    paragraphs = [
+        "Wear PPE at all times.",
+        "The PPE kit includes a Hard Hat.",
+        "Fire Safety Training is held yearly.",
+        "Nothing relevant here.",
+        "firesafety and hardhat written together",
+        "",
+    ]
+    assert matcher.paragraph_hits(paragraphs) == naive_hits(KEYWORDS, paragraphs)
+
+
+def test_overlapping_and_prefix_keywords_are_all_reported():
+    matcher = KeywordMatcher(KEYWORDS)
+    text = "fire safety training with a ppe kit"
+    assert sorted(matcher.iter_matches(text)) == naive_matches(KEYWORDS, text)
+
+
+def test_random_text_matches_substring_check():
+    rng = random.Random(7)
+    alphabet = "abc "
+    for _ in range(200):
+        keywords = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 6))]
+        paragraphs = ["".join(rng.choice(alphabet + "ABC") for _ in range(rng.randint(0, 30))) for _ in range(5)]
+        matcher = KeywordMatcher(keywords)
+        assert matcher.paragraph_hits(paragraphs) == naive_hits(keywords, paragraphs)
+        for paragraph in paragraphs:
+            assert sorted(matcher.iter_matches(paragraph.lower())) == naive_matches(keywords, paragraph.lower())
+
+
+def test_empty_keywords_match_nothing():
+    matcher = KeywordMatcher(["", ""])
+    assert matcher.keywords == []
+    assert list(matcher.iter_matches("anything")) == []
+    assert matcher.paragraph_hits(["anything"]) == {}
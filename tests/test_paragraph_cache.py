@@ -0,0 +1,31 @@
+import time
+from sqlalchemy import create_engine, func, select
+from app.services.cache_usage import cache_usage
+from app.services.paragraph_cache import ParagraphCache, paragraph_results
+
+
+def stored_bytes(cache):
+    with cache.engine.begin() as conn:
+        usage = conn.execute(select(cache_usage.c.size_bytes).where(cache_usage.c.cache == "paragraph")).scalar()
+        total = conn.execute(select(func.coalesce(func.sum(paragraph_results.c.size_bytes), 0))).scalar()
+    return usage, total
+
+
+def test_eviction_tracks_the_stored_size(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'paragraphs.db'}")
+    cache = ParagraphCache(engine, max_bytes=130)
+    cache.set_many("entities", "v1", {f"old{index}": ["x" * 16] for index in range(4)})
+    time.sleep(0.01)
+    cache.set_many("entities", "v1", {"old3": ["y" * 16], "new": ["z" * 16]})
+    usage, total = stored_bytes(cache)
+    assert usage == total == 5 * 20
+
+    time.sleep(0.01)
+    cache.set_many("entities", "v1", {f"more{index}": ["w" * 16] for index in range(3)})
+    usage, total = stored_bytes(cache)
+    assert usage == total == 6 * 20
+    kept = cache.get_many("entities", "v1", ["old0", "old1", "old2", "old3", "new", "more2"])
+    assert len(kept) == 4 and {"old3", "new", "more2"} <= set(kept)
+
+    reopened = ParagraphCache(engine, max_bytes=130)
+    assert stored_bytes(reopened) == (total, total)
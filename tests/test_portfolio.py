@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy import create_engine
+from app.services.document_store import DocumentStore
+from app.services.portfolio import PortfolioAggregates, apply_document
+
+CLAUSES = [
+    {"clause_id": "PPE", "status": "Found", "severity": "high", "category": "ppe"},
+    {"clause_id": "Drill", "status": "Missing", "severity": "high", "category": "emergency"},
+]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'portfolio.db'}")
+    DocumentStore(engine)
+    return engine
+
+
+def result(risk_level, statuses):
+    return {
+        "compliance_report": {"risk_level": risk_level},
+        "clause_traceability": {
+            clause_id: {"status": status, "severity": "high", "matched_paragraphs": []}
+            for clause_id, status in statuses.items()
+        },
+    }
+
+
+def test_apply_document_adds_and_removes(engine):
+    portfolio = PortfolioAggregates(engine)
+    with engine.begin() as conn:
+        apply_document(conn, "north", "High", CLAUSES)
+        apply_document(conn, "north", "High", CLAUSES)
+    summary = portfolio.summary()
+    assert summary["documents"] == 2
+    assert summary["risk_distribution"]["High"] == 2
+    assert summary["missing_by_severity"]["high"] == 2
+    assert summary["categories"]["ppe"] == {"found": 2, "missing": 0, "coverage": 1.0}
+
+    with engine.begin() as conn:
+        apply_document(conn, "north", "High", CLAUSES, sign=-1)
+        apply_document(conn, "north", "High", CLAUSES, sign=-1)
+    summary = portfolio.summary()
+    assert summary["documents"] == 0
+    assert summary["clauses"] == []
+    assert summary["coverage"] is None
+
+
+def test_resave_replaces_the_previous_contribution(engine):
+    store = DocumentStore(engine)
+    portfolio = PortfolioAggregates(engine)
+    categories = {"PPE": "ppe", "Drill": "emergency"}
+    first = store.save("hash", "a.txt", "Wear PPE", result("High", {"PPE": "Found", "Drill": "Missing"}),
+                       categories, site="north")
+    second = store.save("hash", "a.txt", "Wear PPE\nRun a drill", result("Low", {"PPE": "Found", "Drill": "Found"}),
+                        categories, site="south")
+    assert first == second
+
+    summary = portfolio.summary()
+    assert summary["documents"] == 1
+    assert summary["risk_distribution"] == {"High": 0, "Medium": 0, "Low": 1, "Unknown": 0}
+    assert set(summary["sites"]) == {"south"}
+    assert summary["coverage"] == 1.0
+    assert portfolio.summary(site="north")["documents"] == 0
+
+
+def test_increments_match_a_rebuild(engine):
+    store = DocumentStore(engine)
+    portfolio = PortfolioAggregates(engine)
+    store.save("a", "a.txt", "one", result("High", {"PPE": "Missing", "Drill": "Missing"}), site="north")
+    store.save("b", "b.txt", "two", result("Medium", {"PPE": "Found", "Drill": "Missing"}), site=None)
+    store.save("a", "a.txt", "one", result("Low", {"PPE": "Found", "Drill": "Found"}), site="north")
+    incremental = portfolio.summary()
+    portfolio.rebuild()
+    assert portfolio.summary() == incremental
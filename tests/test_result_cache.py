@@ -0,0 +1,127 @@
+import threading
+import time
+import pytest
+from sqlalchemy import create_engine, func, select
+from app.services.cache_usage import cache_usage
+from app.services.result_cache import ResultCache, SingleFlight, analysis_results
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(create_engine(f"sqlite:///{tmp_path / 'cache.db'}"), max_bytes=1_000_000)
+
+
+def run_concurrently(count, target):
+    results = [None] * count
+
+    def call(i):
+        results[i] = target()
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_calls_share_one_computation():
+    flight = SingleFlight()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"value": 42}
+
+    results = run_concurrently(4, lambda: flight.do("key", compute))
+    assert len(calls) == 1
+    assert all(result == {"value": 42} for result, _ in results)
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert flight.in_flight == 0
+
+
+def test_error_reaches_every_caller():
+    flight = SingleFlight()
+
+    def compute():
+        time.sleep(0.1)
+        raise ValueError("bad document")
+
+    def call():
+        try:
+            flight.do("key", compute)
+        except ValueError as e:
+            return str(e)
+
+    assert run_concurrently(3, call) == ["bad document"] * 3
+    assert flight.in_flight == 0
+
+
+def test_get_or_compute_stores_the_result(cache):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"risk": "Low"}
+
+    assert cache.get_or_compute("hash", "v1", compute) == {"risk": "Low"}
+    assert cache.get_or_compute("hash", "v1", compute) == {"risk": "Low"}
+    assert len(calls) == 1
+    assert cache.get("hash", "v2") is None
+
+
+def test_stream_waiters_receive_the_leaders_result(cache):
+    def stream():
+        yield "stage", None
+        yield "complete", {"risk": "High"}
+
+    leader = cache.stream_or_compute("hash", "v1", stream)
+    assert next(leader) == ("stage", None)
+    follower = []
+    thread = threading.Thread(target=lambda: follower.extend(cache.stream_or_compute("hash", "v1", stream)))
+    thread.start()
+    assert list(leader) == [("complete", {"risk": "High"})]
+    thread.join()
+    assert follower == [("cached", {"risk": "High"})]
+    assert list(cache.stream_or_compute("hash", "v1", stream)) == [("cached", {"risk": "High"})]
+
+
+def test_abandoned_stream_is_taken_over(cache):
+    def stream():
+        yield "stage", None
+        yield "complete", {"risk": "Medium"}
+
+    leader = cache.stream_or_compute("hash", "v1", stream)
+    assert next(leader) == ("stage", None)
+    follower = []
+    thread = threading.Thread(target=lambda: follower.extend(cache.stream_or_compute("hash", "v1", stream)))
+    thread.start()
+    time.sleep(0.05)
+    leader.close()
+    thread.join(5)
+    assert follower == [("stage", None), ("complete", {"risk": "Medium"})]
+    assert cache.get("hash", "v1") == {"risk": "Medium"}
+
+
+def stored_bytes(cache):
+    with cache.engine.begin() as conn:
+        usage = conn.execute(select(cache_usage.c.size_bytes).where(cache_usage.c.cache == "result")).scalar()
+        total = conn.execute(select(func.coalesce(func.sum(analysis_results.c.size_bytes), 0))).scalar()
+    return usage, total
+
+
+def test_eviction_tracks_the_stored_size(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    cache = ResultCache(engine, max_bytes=100)
+    for index in range(5):
+        cache.set(f"hash{index}", "v1", {"text": "x" * 20})
+        time.sleep(0.01)
+    cache.set("hash4", "v1", {"text": "y" * 20})
+    usage, total = stored_bytes(cache)
+    assert usage == total <= 100
+    assert cache.get("hash0", "v1") is None
+    assert cache.get("hash4", "v1") == {"text": "y" * 20}
+
+    reopened = ResultCache(engine, max_bytes=100)
+    assert stored_bytes(reopened) == (total, total)
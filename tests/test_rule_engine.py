@@ -0,0 +1,77 @@
+from app.services.rule_engine import RuleEngine
+from app.services.fuzzy_matcher import FuzzyMatcher
+
+TEXT = "Site rules\nWear a hard hat and safety boots.\nRun an evacuation drill twice a year.\nHard hats are inspected monthly."
+
+
+def engine(clauses):
+    return RuleEngine(clauses, FuzzyMatcher(workers=1))
+
+
+def test_hits_are_keyed_by_clause_id():
+    clauses = {
+        "PPE: Hard hat (1.2)": {"pattern": r"hard hats?"},
+        "Emergency Drill": {"match": "exact", "keywords": ["evacuation drill"]},
+        "Boots": {"match": "fuzzy", "keywords": ["safety boots"]},
+        "Absent": {"match": "exact", "keywords": ["fire extinguisher"]},
+    }
+    hits = engine(clauses).scan(TEXT)
+    assert list(hits) == list(clauses)
+    assert [hit["paragraph_number"] for hit in hits["PPE: Hard hat (1.2)"]] == [2, 4]
+    assert [hit["paragraph_number"] for hit in hits["Emergency Drill"]] == [3]
+    assert [hit["paragraph_number"] for hit in hits["Boots"]] == [2]
+    assert hits["Absent"] == []
+
+
+def test_overlapping_patterns_report_every_clause():
+    clauses = {
+        "A": {"pattern": r"hard hat"},
+        "B": {"pattern": r"hard"},
+        "C": {"pattern": r"hat"},
+    }
+    hits = engine(clauses).scan(TEXT)
+    for clause_id, keyword in (("A", "hard hat"), ("B", "hard"), ("C", "hat")):
+        first = hits[clause_id][0]
+        assert first["paragraph_number"] == 2
+        assert TEXT[first["start"]:first["end"]] == keyword
+
+
+def test_invalid_pattern_falls_back_to_exact_keywords():
+    rule_engine = engine({"Broken": {"pattern": "(unclosed", "keywords": ["evacuation drill"]}})
+    assert rule_engine.modes == {"Broken": "exact"}
+    assert [hit["paragraph_number"] for hit in rule_engine.scan(TEXT)["Broken"]] == [3]
+
+
+def test_paragraph_scan_merges_into_document_scan():
+    clauses = {
+        "Hat": {"pattern": r"hard hats?"},
+        "Drill": {"match": "exact", "keywords": ["evacuation drill"]},
+        "Boots": {"keywords": ["safety boots"]},
+    }
+    rule_engine = engine(clauses)
+    paragraphs = [line for line in TEXT.split("\n")]
+    offsets = [0]
+    for line in paragraphs[:-1]:
+        offsets.append(offsets[-1] + len(line) + 1)
+    merged = rule_engine.merge_paragraph_hits(rule_engine.scan_paragraphs(paragraphs), offsets)
+    assert merged == rule_engine.scan(TEXT)
+
+
+def test_patterns_that_cannot_be_combined_are_scanned_on_their_own():
+    clauses = {
+        "Inline flags": {"pattern": r"(?i)evacuation drill"},
+        "Verbose": {"pattern": r"(?x) safety \s boots"},
+        "Named group": {"pattern": r"(?P<item>hard) hats?"},
+        "Same group name": {"pattern": r"(?P<item>safety) boots"},
+        "Backreference": {"pattern": r"(a)\1"},
+        "Plain": {"pattern": r"inspected"},
+    }
+    rule_engine = engine(clauses)
+    assert set(rule_engine.modes.values()) == {"regex"}
+    hits = rule_engine.scan(TEXT + "\nAaa batteries")
+    assert [hit["paragraph_number"] for hit in hits["Inline flags"]] == [3]
+    assert [hit["paragraph_number"] for hit in hits["Verbose"]] == [2]
+    assert [hit["paragraph_number"] for hit in hits["Named group"]] == [2, 4]
+    assert [hit["paragraph_number"] for hit in hits["Same group name"]] == [2]
+    assert [hit["keyword"] for hit in hits["Backreference"]] == ["Aa"]
+    assert [hit["paragraph_number"] for hit in hits["Plain"]] == [4]
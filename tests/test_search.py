@@ -0,0 +1,35 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from app.api.endpoints import search
+from app.services.document_store import DocumentStore, fts_query
+
+RESULT = {"compliance_report": {"risk_level": "Low"}, "clause_traceability": {}}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    store = DocumentStore(create_engine(f"sqlite:///{tmp_path / 'search.db'}"))
+    store.save("hash", "plan.txt", "Section 4.2 covers PPE.\nFire drills run monthly.", RESULT)
+    monkeypatch.setattr(search, "get_document_store", lambda: store)
+    app = FastAPI()
+    app.include_router(search.router)
+    return TestClient(app)
+
+
+def test_terms_are_quoted_and_punctuation_dropped():
+    assert fts_query(' "PPE" ... 4.2 ') == '"""PPE""" "4.2"'
+    assert fts_query(" \t ") == ""
+
+
+def test_search_finds_paragraphs(client):
+    response = client.get("/paragraphs", params={"q": "4.2 -- ppe"})
+    assert response.status_code == 200
+    assert [result["paragraph_number"] for result in response.json()["results"]] == [1]
+
+
+@pytest.mark.parametrize("query", ["   ", "...", "\" - *"])
+def test_query_without_terms_is_rejected(client, query):
+    response = client.get("/paragraphs", params={"q": query})
+    assert response.status_code == 422